@@ -0,0 +1,63 @@
+import sys
+import timeit
+from textnode import TextNode, TextType, split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes, text_node_to_html_node
+from blockmarkdown import text_to_children
+
+#the five-pass cascade text_to_textnodes used before the single-pass scanner
+def split_cascade(text):
+    textnodes = [TextNode(text, TextType.TEXT)]
+    textnodes = split_nodes_delimiter(textnodes, "**", TextType.BOLD)
+    textnodes = split_nodes_delimiter(textnodes, "_", TextType.ITALIC)
+    textnodes = split_nodes_delimiter(textnodes, "`", TextType.CODE)
+    textnodes = split_nodes_image(textnodes)
+    textnodes = split_nodes_link(textnodes)
+    return textnodes
+
+def link_dense_paragraph(links):
+    parts = []
+    for i in range(links):
+        parts.append(f"see [link number {i}](/pages/{i}) or ![img {i}](/images/{i}.png)")
+    return " ".join(parts)
+
+def bench(links, repeat=3):
+    text = link_dense_paragraph(links)
+    if split_cascade(text) != text_to_textnodes(text):
+        raise Exception("Error: the scanner and the split cascade disagree")
+    number = max(1, 2000 // links)
+    old = min(timeit.repeat(lambda: split_cascade(text), number=number, repeat=repeat)) / number
+    new = min(timeit.repeat(lambda: text_to_textnodes(text), number=number, repeat=repeat)) / number
+    return old, new
+
+#text_to_children without the plain-text fast path
+def scanned_children(text):
+    return [text_node_to_html_node(node) for node in text_to_textnodes(text)]
+
+def prose_paragraphs(count):
+    sentence = "The road goes ever on and on, down from the door where it began."
+    return [f"{sentence} Paragraph {i} has no inline markup at all. {sentence}" for i in range(count)]
+
+def bench_prose(count, repeat=3):
+    texts = prose_paragraphs(count)
+    if [node.to_html() for text in texts for node in scanned_children(text)] != [node.to_html() for text in texts for node in text_to_children(text)]:
+        raise Exception("Error: the fast path and the scanner disagree")
+    number = max(1, 20000 // count)
+    old = min(timeit.repeat(lambda: [scanned_children(text) for text in texts], number=number, repeat=repeat)) / number
+    new = min(timeit.repeat(lambda: [text_to_children(text) for text in texts], number=number, repeat=repeat)) / number
+    return old, new
+
+def main():
+    sizes = [10, 100, 1000, 10000, 20000]
+    if len(sys.argv) > 1:
+        sizes = [int(size) for size in sys.argv[1:]]
+    print(f"{'links':>8} {'cascade ms':>12} {'scanner ms':>12} {'speedup':>8}")
+    for links in sizes:
+        old, new = bench(links)
+        print(f"{links:>8} {old * 1000:>12.3f} {new * 1000:>12.3f} {old / new:>7.1f}x")
+    print()
+    print(f"{'prose':>8} {'scanner ms':>12} {'fast ms':>12} {'speedup':>8}")
+    for count in (100, 1000, 10000):
+        old, new = bench_prose(count)
+        print(f"{count:>8} {old * 1000:>12.3f} {new * 1000:>12.3f} {old / new:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
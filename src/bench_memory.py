@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+#builds one large synthetic document in a fresh interpreter and reports its peak memory;
+#pass --compare with another src directory (e.g. from `git archive <rev> src | tar -x -C /tmp/old`)
+#to measure the node classes from that tree the same way
+
+def synthetic_document(sections):
+    parts = []
+    for i in range(sections):
+        parts.append(f"## Section {i}")
+        parts.append(f"Paragraph {i} has **bold** words, _italic_ words, `code` and [a link](/pages/{i}) in it.")
+        parts.append("\n".join(f"- item {j} of list {i} with [link {j}](/items/{j})" for j in range(8)))
+        parts.append(f"> quoted line {i}\n> and another")
+    return "\n\n".join(parts)
+
+def measure(src_directory, sections):
+    command = [sys.executable, os.path.abspath(__file__), "--child", src_directory, "--sections", str(sections)]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+def child(src_directory, sections):
+    sys.path.insert(0, os.path.abspath(src_directory))
+    import resource
+    from blockmarkdown import markdown_to_html_node
+
+    document = synthetic_document(sections)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    node = markdown_to_html_node(document)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    count = 0
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        count += 1
+        if item.children:
+            stack.extend(item.children)
+    #ru_maxrss is reported in kilobytes on Linux
+    print(json.dumps({"nodes": count, "peak_rss_kb": peak_rss, "tree_rss_kb": peak_rss - baseline_rss}))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sections", type=int, default=20000)
+    parser.add_argument("--compare", help="another src directory to measure as the baseline")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.sections)
+        return
+
+    current = measure(os.path.dirname(os.path.abspath(__file__)), args.sections)
+    rows = [("current", current)]
+    if args.compare:
+        rows.insert(0, ("baseline", measure(args.compare, args.sections)))
+    print(f"{'build':>10} {'nodes':>10} {'peak RSS MB':>12} {'tree MB':>10}")
+    for name, result in rows:
+        print(f"{name:>10} {result['nodes']:>10} {result['peak_rss_kb'] / 1024:>12.1f} {result['tree_rss_kb'] / 1024:>10.1f}")
+    if args.compare:
+        saved = 1 - current["tree_rss_kb"] / rows[0][1]["tree_rss_kb"]
+        print(f"tree memory saved: {saved:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+from contextlib import redirect_stdout
+from corpus import DEFAULT_MIX, generate_corpus, parse_mix
+from blockmarkdown import markdown_to_blocks, iter_typed_blocks, markdown_lines, block_tag_and_text, markdown_to_html_node, BlockType
+from textnode import text_to_textnodes
+from render import scan_page
+
+BENCHMARKS = ["scan_metadata", "markdown_to_blocks", "text_to_textnodes", "markdown_to_html_node", "to_html", "build"]
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def best_of(repeat, function, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def run_blocks(documents):
+    for document in documents:
+        markdown_to_blocks(document)
+
+def run_inline(texts):
+    for text in texts:
+        text_to_textnodes(text)
+
+def run_html_node(documents):
+    for document in documents:
+        markdown_to_html_node(document)
+
+def run_scan(paths):
+    #reads each file from disk, but only up to its title
+    for path in paths:
+        scan_page(path)
+
+def run_to_html(nodes):
+    for node in nodes:
+        node.to_html()
+
+def run_build(site_path):
+    #an end-to-end main() run, inside the generated site and without per-file logging
+    from main import main
+    old_cwd = os.getcwd()
+    old_argv = sys.argv
+    os.chdir(site_path)
+    sys.argv = ["main.py", "--quiet"]
+    try:
+        with redirect_stdout(io.StringIO()):
+            main()
+    finally:
+        sys.argv = old_argv
+        os.chdir(old_cwd)
+
+def inline_texts(documents):
+    texts = []
+    for document in documents:
+        for block, blocktype in iter_typed_blocks(markdown_lines(document)):
+            if blocktype != BlockType.CODE:
+                texts.append(block_tag_and_text(block, blocktype)[1])
+    return texts
+
+def bench_size(pages, mix, blocks, seed, repeat):
+    site_path = tempfile.mkdtemp(prefix="ssg-bench-")
+    try:
+        shutil.copytree(os.path.join(REPO_ROOT, "static"), os.path.join(site_path, "static"))
+        shutil.copy(os.path.join(REPO_ROOT, "template.html"), os.path.join(site_path, "template.html"))
+        paths = generate_corpus(os.path.join(site_path, "content"), pages, mix, blocks, seed)
+        documents = []
+        for path in paths:
+            with open(path) as f:
+                documents.append(f.read())
+        texts = inline_texts(documents)
+        nodes = [markdown_to_html_node(document) for document in documents]
+        return {
+            "scan_metadata": best_of(repeat, run_scan, paths),
+            "markdown_to_blocks": best_of(repeat, run_blocks, documents),
+            "text_to_textnodes": best_of(repeat, run_inline, texts),
+            "markdown_to_html_node": best_of(repeat, run_html_node, documents),
+            "to_html": best_of(repeat, run_to_html, nodes),
+            "build": best_of(repeat, run_build, site_path),
+            "bytes": sum(len(document) for document in documents),
+        }
+    finally:
+        shutil.rmtree(site_path)
+
+def compare(results, baseline, threshold):
+    #returns (size, benchmark, old, new) for every timing that got slower by more than threshold
+    regressions = []
+    for size, timings in results["results"].items():
+        old_timings = baseline["results"].get(size)
+        if old_timings is None:
+            continue
+        for name in BENCHMARKS:
+            if name not in timings or name not in old_timings:
+                continue
+            if timings[name] > old_timings[name] * (1 + threshold):
+                regressions.append((size, name, old_timings[name], timings[name]))
+    return regressions
+
+def print_results(results):
+    print(f"{'pages':>8} " + " ".join(f"{name:>22}" for name in BENCHMARKS))
+    for size, timings in results["results"].items():
+        print(f"{size:>8} " + " ".join(f"{timings[name] * 1000:>19.1f} ms" for name in BENCHMARKS))
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the pipeline stages on a deterministic synthetic corpus")
+    parser.add_argument("--sizes", default="10,100,1000", help="comma separated page counts, e.g. 10,100,1000,10000,100000")
+    parser.add_argument("--mix", default=",".join(f"{kind}={weight}" for kind, weight in DEFAULT_MIX.items()), help="block kind weights")
+    parser.add_argument("--blocks", type=int, default=20, help="blocks per page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing, the best one is kept")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown against the baseline, 0.10 is 10%%")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "mix": mix,
+            "blocks": args.blocks,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    for size in [int(size) for size in args.sizes.split(",")]:
+        results["results"][str(size)] = bench_size(size, mix, args.blocks, args.seed, args.repeat)
+    print_results(results)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=1)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("mix") != mix or baseline.get("meta", {}).get("seed") != args.seed:
+            print("Warning: the baseline was made with a different corpus mix or seed")
+        regressions = compare(results, baseline, args.threshold)
+        for size, name, old, new in regressions:
+            print(f"Regression: {name} at {size} pages went from {old * 1000:.1f} ms to {new * 1000:.1f} ms")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
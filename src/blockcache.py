@@ -0,0 +1,135 @@
+import hashlib
+from collections import OrderedDict
+from manifest import read_json, write_json
+
+BLOCK_CACHE_VERSION = 2
+BLOCK_CACHE_PATH = "./.ssg-cache/blocks.json"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class BlockCache:
+    #maps (context, block text) -> (rendered html fragment, links in it), least recently used entries are evicted first.
+    #context holds everything besides the block that changes its html, e.g. the basepath
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, path=None, version=BLOCK_CACHE_VERSION):
+        self.max_bytes = max_bytes
+        self.path = path
+        #other html kept the same way, e.g. highlighted code, has a version of its own
+        self.version = version
+        self.entries = OrderedDict()
+        self.size = 0
+        self.disk = None
+        self.disk_used = set()
+        self.new_entries = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+
+    def digest(self, context, block):
+        return hashlib.sha256(f"{self.version}\0{context}\0{block}".encode()).hexdigest()
+
+    def get(self, context, block):
+        key = (context, block)
+        entry = self.entries.get(key)
+        if entry is None and self.path is not None:
+            digest = self.digest(context, block)
+            stored = self.load().get(digest)
+            if stored is not None:
+                entry = (stored[0], [tuple(link) for link in stored[1]])
+                self.disk_hits += 1
+                self.disk_used.add(digest)
+                self.store(key, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        self.bytes_saved += len(entry[0])
+        return entry
+
+    def put(self, context, block, html, links=()):
+        entry = (html, list(links))
+        self.store((context, block), entry)
+        if self.path is not None:
+            self.new_entries[self.digest(context, block)] = entry
+
+    def entry_size(self, key, entry):
+        return len(key[0]) + len(key[1]) + len(entry[0]) + sum(len(url) for attribute, url in entry[1])
+
+    def store(self, key, entry):
+        entry_size = self.entry_size(key, entry)
+        if entry_size > self.max_bytes:
+            return
+        old_entry = self.entries.pop(key, None)
+        if old_entry is not None:
+            self.size -= self.entry_size(key, old_entry)
+        self.entries[key] = entry
+        self.size += entry_size
+        while self.size > self.max_bytes:
+            old_key, old_entry = self.entries.popitem(last=False)
+            self.size -= self.entry_size(old_key, old_entry)
+            self.evictions += 1
+
+    def read_disk(self):
+        data = read_json(self.path)
+        if not isinstance(data, dict) or data.get("version") != self.version or not isinstance(data.get("entries"), dict):
+            return {}
+        return data["entries"]
+
+    def load(self):
+        if self.disk is None:
+            self.disk = self.read_disk()
+        return self.disk
+
+    def save(self):
+        if self.path is None:
+            return
+        #other builds sharing the cache, e.g. shards running at once, may have saved since it was loaded
+        disk = {**self.load(), **self.read_disk()}
+        #entries used or made by this build go last so they are the ones kept when trimming
+        entries = {}
+        for digest, entry in disk.items():
+            if digest not in self.disk_used and digest not in self.new_entries:
+                entries[digest] = entry
+        for digest in self.disk_used:
+            if digest in disk:
+                entries[digest] = disk[digest]
+        entries.update(self.new_entries)
+        size = sum(len(entry[0]) for entry in entries.values())
+        for digest in list(entries):
+            if size <= self.max_bytes:
+                break
+            size -= len(entries.pop(digest)[0])
+
+        write_json(self.path, {"version": self.version, "entries": entries})
+        self.disk = entries
+        self.disk_used = set()
+        self.new_entries = {}
+
+    def counters(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bytes_saved": self.bytes_saved,
+            "evictions": self.evictions,
+        }
+
+    def merge(self, counters, new_entries):
+        #folds in the work a worker process did with its own copy of the cache
+        self.hits += counters["hits"]
+        self.disk_hits += counters["disk_hits"]
+        self.misses += counters["misses"]
+        self.bytes_saved += counters["bytes_saved"]
+        self.evictions += counters["evictions"]
+        if self.path is not None:
+            self.new_entries.update(new_entries)
+
+    def report(self):
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return "Block cache: no lookups"
+        return (
+            f"Block cache: {self.hits}/{lookups} hits ({self.hits / lookups:.1%}, {self.disk_hits} from disk), "
+            f"{self.bytes_saved / 1024:.1f} KB of html reused, {self.evictions} evictions"
+        )
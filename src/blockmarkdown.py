@@ -1,16 +1,11 @@
 from enum import Enum
 import re
 from htmlnode import HTMLNode, LeafNode, ParentNode
-from textnode import TextType, TextNode, text_node_to_html_node, text_to_textnodes
-
-def markdown_to_blocks(markdown):
-    final_list = []
-    split_text = markdown.split("\n\n")
-    for block in split_text:
-        stripped_block = block.strip()
-        if stripped_block != "":
-            final_list.append(stripped_block)
-    return final_list
+from textnode import TextType, TextNode, text_node_to_html_node, text_to_textnodes, INLINE_MARKER
+from frontmatter import split_front_matter
+from template import url_context
+from html import escape
+import highlight
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -20,74 +15,244 @@ class BlockType(Enum):
     UNORDERED_LIST = "unordered list"
     ORDERED_LIST = "ordered list"
 
+HEADING_PATTERN = re.compile(r"^#{1,6}$")
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+class BlockBuilder:
+    #collects the lines of one block and keeps the quote/list checks up to date line by line,
+    #so the finished block never has to be split again to classify it
+    def __init__(self):
+        self.lines = []
+        self.started = False
+        self.blank_run = False
+        self.fenced = False
+        self.fence_open = False
+        self.quote = True
+        self.unordered = True
+        self.ordered = 1
+        self.last = None
+
+    def add(self, line):
+        self.lines.append(line)
+        if line.strip() == "":
+            if self.started:
+                self.blank_run = True
+            return
+        if not self.started:
+            #the block gets stripped, so the first line is checked without its indentation
+            self.started = True
+            line = line.lstrip()
+            stripped = line.rstrip()
+            self.fenced = stripped.startswith("```") and not (len(stripped) >= 6 and stripped.endswith("```"))
+            self.fence_open = self.fenced
+        elif self.blank_run:
+            self.blank_run = False
+            self.quote = self.unordered = False
+            self.ordered = 0
+        self.check(line)
+        self.last = line
+
+    def check(self, line):
+        self.quote = self.quote and line[:2] == "> "
+        self.unordered = self.unordered and line[:2] == "- "
+        if self.ordered:
+            self.ordered = self.ordered + 1 if line[:3] == f"{self.ordered}. " else 0
+
+    def finish(self):
+        block = "\n".join(self.lines).strip()
+        if block == "":
+            return None, None
+        #trailing whitespace on the last line is stripped too, which can undo its prefix
+        last = self.last.rstrip()
+        if last != self.last:
+            self.quote = self.quote and last[:2] == "> "
+            self.unordered = self.unordered and last[:2] == "- "
+            if self.ordered:
+                self.ordered = self.ordered if last[:3] == f"{self.ordered - 1}. " else 0
+        return block, self.block_type(block)
+
+    def block_type(self, block):
+        if block[:3] == "```" and block[-3:] == "```":
+            return BlockType.CODE
+        if block[:1] == "#":
+            space = block.find(" ")
+            if HEADING_PATTERN.match(block if space == -1 else block[:space]):
+                return BlockType.HEADING
+        if block[:2] == "> ":
+            return BlockType.QUOTE if self.quote else BlockType.PARAGRAPH
+        if block[:2] == "- ":
+            return BlockType.UNORDERED_LIST if self.unordered else BlockType.PARAGRAPH
+        if block[:3] == "1. ":
+            return BlockType.ORDERED_LIST if self.ordered else BlockType.PARAGRAPH
+        return BlockType.PARAGRAPH
+
+def iter_typed_blocks(lines):
+    #lines can be any iterable of lines, e.g. an open file, and blocks are yielded as soon as they end;
+    #blank lines separate blocks except inside a ``` fence
+    builder = BlockBuilder()
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if builder.fence_open:
+            builder.add(line)
+            if line.rstrip().endswith("```"):
+                builder.fence_open = False
+            continue
+        if line == "":
+            block, block_type = builder.finish()
+            if block is not None:
+                yield block, block_type
+            builder = BlockBuilder()
+            continue
+        builder.add(line)
+    block, block_type = builder.finish()
+    if block is not None:
+        yield block, block_type
+
+def iter_string_lines(text):
+    #lazy line iterator over a string, io.StringIO would copy the whole text into its own buffer first
+    start = 0
+    end = text.find("\n")
+    while end != -1:
+        yield text[start:end + 1]
+        start = end + 1
+        end = text.find("\n", start)
+    if start < len(text):
+        yield text[start:]
+
+def markdown_lines(markdown):
+    if isinstance(markdown, str):
+        return iter_string_lines(markdown)
+    return markdown
+
+def iter_blocks(lines):
+    for block, block_type in iter_typed_blocks(lines):
+        yield block
+
+def markdown_to_blocks(markdown):
+    return list(iter_blocks(markdown_lines(markdown)))
+
 def block_to_block_type(block):
-    if block[:3] == "```" and block[-3:] == "```":
-        return BlockType.CODE
-    if re.match(r"^#{1,6}$", block.split(" ", 1)[0]):
-        return BlockType.HEADING
-    block_lines = block.split("\n")
-    if block[:2] == "> ":
-        for line in block_lines:
-            if line[:2] != "> ":
-                return BlockType.PARAGRAPH
-        return BlockType.QUOTE
-    if block[:2] == "- ":
-        for line in block_lines:
-            if line[:2] != "- ":
-                return BlockType.PARAGRAPH
-        return BlockType.UNORDERED_LIST
-    if block[:3] == "1. ":
-        count = 1
-        for line in block_lines:
-            if line[:3] != f"{count}. ":
-                return BlockType.PARAGRAPH
-            count += 1
-        return BlockType.ORDERED_LIST
-    return BlockType.PARAGRAPH
-
-def text_to_children(text):
+    builder = BlockBuilder()
+    for line in block.split("\n"):
+        builder.add(line)
+    return builder.block_type(block)
+
+def text_to_children(text, basepath=None, links=None):
+    #text without any inline marker becomes one leaf without going through the scanner
+    if INLINE_MARKER.search(text) is None:
+        return [LeafNode(None, text)]
     htmlnodes = []
     for node in text_to_textnodes(text):
-        htmlnodes.append(text_node_to_html_node(node))
+        htmlnodes.append(text_node_to_html_node(node, basepath, links))
     return htmlnodes
 
 
-def markdown_to_html_node(markdown):
-    markdown_blocks = markdown_to_blocks(markdown)
+def code_language(block):
+    #the language after the opening fence (```python), or "" when there is none
+    newline = block.find("\n")
+    if newline == -1:
+        return ""
+    words = block[3:newline].split()
+    return words[0] if words else ""
+
+def block_tag_and_text(block, blocktype):
+    #the tag a block becomes and the text its children are parsed from
+    if blocktype == BlockType.CODE:
+        if code_language(block):
+            return "pre", block[block.find("\n") + 1:-3]
+        return "pre", block[4:-3]
+    elif blocktype == BlockType.PARAGRAPH:
+        return "p", " ".join(block.split())
+    elif blocktype == BlockType.QUOTE:
+        quotelines = block.split("\n")
+        for i in range(len(quotelines)):
+            quotelines[i] = quotelines[i][2:]
+        return "blockquote", " ".join(quotelines)
+    elif blocktype == BlockType.UNORDERED_LIST:
+        list_lines = block.split("\n")
+        text = ""
+        for line in list_lines:
+            text += "<li>" + line[2:] + "</li>"
+        return "ul", text
+    elif blocktype == BlockType.ORDERED_LIST:
+        list_lines = block.split("\n")
+        text = ""
+        for line in list_lines:
+            text += "<li>" + line[3:] + "</li>"
+        return "ol", text
+    else:
+        seperate_heading = block.split(" ", 1)
+        heading_number = seperate_heading[0].count("#")
+        return HEADING_TAGS[heading_number - 1], seperate_heading[1]
+
+def block_to_html_node(block, blocktype, basepath=None, links=None):
+    tag, text = block_tag_and_text(block, blocktype)
+    if blocktype == BlockType.CODE:
+        language = code_language(block)
+        if language:
+            return ParentNode(tag, [code_node(text, language)])
+        return ParentNode(tag, [text_node_to_html_node(TextNode(text, TextType.CODE))])
+    return ParentNode(tag, text_to_children(text, basepath, links))
+
+def code_node(code, language):
+    #highlighted when there is a lexer for the language, otherwise the code as written like any other code block
+    html = highlight.highlighter.highlight(code, language)
+    if html is None:
+        html = code
+    return LeafNode("code", html, {"class": "language-" + escape(language)})
+
+def markdown_to_html_node(markdown, basepath=None, cache=None, links=None):
+    #markdown can be a string or an open file, blocks are parsed lazily either way;
+    #links, when given, collects every (attribute, url) the page points at
+    return blocks_to_html_node(markdown_lines(markdown), basepath, cache, links)[1]
+
+def markdown_to_page(markdown, basepath=None, cache=None, links=None):
+    #returns (front matter, title, node) from one pass over the page; the front matter title wins over the first h1
+    meta, lines = split_front_matter(markdown_lines(markdown))
+    title, node = blocks_to_html_node(lines, basepath, cache, links)
+    title = meta.get("title", title)
+    if title is None:
+        raise Exception("Error: No h1 header found")
+    return meta, title, node
+
+def blocks_to_html_node(lines, basepath=None, cache=None, links=None):
+    #returns (text of the first h1 or None, node)
+    title = None
     children_list = []
-    for block in markdown_blocks:
-        blocktype = block_to_block_type(block)
-        if blocktype == BlockType.CODE:
-            node = TextNode(block[4:-3], TextType.CODE)
-            children_list.append(ParentNode("pre", [text_node_to_html_node(node)]))
-        elif blocktype == BlockType.PARAGRAPH:
-            children_list.append(ParentNode("p", text_to_children(" ".join(block.split()))))
-        elif blocktype == BlockType.QUOTE:
-            quotelines = block.split("\n")
-            for i in range(len(quotelines)):
-                quotelines[i] = quotelines[i][2:]
-            text = " ".join(quotelines)
-            children_list.append(ParentNode("blockquote", text_to_children(text)))
-        elif blocktype == BlockType.UNORDERED_LIST:
-            list_lines = block.split("\n")
-            text = ""
-            for line in list_lines:
-                text += "<li>" + line[2:] + "</li>"
-            children_list.append(ParentNode("ul", text_to_children(text)))
-        elif blocktype == BlockType.ORDERED_LIST:
-            list_lines = block.split("\n")
-            text = ""
-            for line in list_lines:
-                text += "<li>" + line[3:] + "</li>"
-            children_list.append(ParentNode("ol", text_to_children(text)))
+    context = url_context(basepath) if cache is not None else None
+    for block, blocktype in iter_typed_blocks(lines):
+        if title is None and block.startswith("# "):
+            title = block[2:]
+        #code with a language goes through the highlighter's own cache, which knows whether highlighting is on
+        if cache is None or (blocktype == BlockType.CODE and code_language(block)):
+            children_list.append(block_to_html_node(block, blocktype, basepath, links))
+            continue
+        #a repeated block is emitted as its already rendered html, along with the links it held
+        cached = cache.get(context, block)
+        if cached is None:
+            block_links = []
+            html = block_to_html_node(block, blocktype, basepath, block_links).to_html()
+            cache.put(context, block, html, block_links)
+        else:
+            html, block_links = cached
+        if links is not None:
+            links.extend(block_links)
+        children_list.append(LeafNode(None, html))
+    return title, ParentNode("div", children_list)
+
+def scan_metadata(markdown):
+    #the front matter plus a title, without parsing the page: reading stops after the front matter
+    #when it has a title, otherwise at the end of the first h1 block
+    meta, lines = split_front_matter(markdown_lines(markdown))
+    if "title" not in meta:
+        for block in iter_blocks(lines):
+            if block.startswith("# "):
+                meta["title"] = block[2:]
+                break
         else:
-            seperate_heading = block.split(" ", 1)
-            heading_number = seperate_heading[0].count("#")
-            children_list.append(ParentNode(f"h{heading_number}", text_to_children(seperate_heading[1])))
-    return ParentNode("div", children_list)
+            raise Exception("Error: No h1 header found")
+    return meta
 
 def extract_title(markdown):
-    for block in markdown_to_blocks(markdown):
-        if block.startswith("# "):
-            return block[2:]
-    raise Exception("Error: No h1 header found")
+    return scan_metadata(markdown)["title"]
@@ -0,0 +1,78 @@
+import os
+import random
+
+DEFAULT_MIX = {"headings": 2, "prose": 4, "links": 3, "lists": 2, "quotes": 1, "code": 1}
+PAGES_PER_SECTION = 100
+WORDS = (
+    "ring hobbit shire wizard elf dwarf mountain river forest tower road journey council "
+    "sword king steward horse bridge song lantern valley gate star shadow fellowship "
+    "map letter pipe garden harbour ship storm ember stone"
+).split()
+
+def parse_mix(text):
+    #"prose=4,links=3" -> {"prose": 4, "links": 3}, unknown kinds are rejected
+    mix = {}
+    for part in text.split(","):
+        kind, weight = part.split("=")
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise Exception(f"Error: Unknown block kind {kind}, expected one of {', '.join(DEFAULT_MIX)}")
+        mix[kind] = int(weight)
+    return mix
+
+def page_path(index):
+    return os.path.join(f"section{index // PAGES_PER_SECTION}", f"page{index % PAGES_PER_SECTION}", "index.md")
+
+def page_url(index):
+    return f"/section{index // PAGES_PER_SECTION}/page{index % PAGES_PER_SECTION}"
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def link_target(rng, pages):
+    #the same number of random bits whatever pages is, so the rest of the page doesn't depend on the corpus size
+    return rng.getrandbits(32) % pages
+
+def make_block(kind, rng, pages):
+    if kind == "headings":
+        return "#" * rng.randint(2, 6) + " " + words(rng, 4).title()
+    if kind == "prose":
+        sentences = [words(rng, rng.randint(6, 14)).capitalize() + "." for _ in range(rng.randint(2, 5))]
+        return "\n".join(sentences)
+    if kind == "links":
+        parts = []
+        for _ in range(rng.randint(4, 12)):
+            target = link_target(rng, pages)
+            parts.append(f"{words(rng, 3)} [{words(rng, 2)}]({page_url(target)}) **{words(rng, 1)}** _{words(rng, 1)}_ `{rng.choice(WORDS)}`")
+        parts.append(f"![{words(rng, 2)}](/images/tolkien.png)")
+        return " ".join(parts)
+    if kind == "lists":
+        if rng.random() < 0.5:
+            return "\n".join(f"- {words(rng, 5)} [{words(rng, 1)}]({page_url(link_target(rng, pages))})" for _ in range(rng.randint(3, 9)))
+        return "\n".join(f"{i}. {words(rng, 5)}" for i in range(1, rng.randint(3, 9) + 1))
+    if kind == "quotes":
+        return "\n".join(f"> {words(rng, 8)}" for _ in range(rng.randint(1, 4)))
+    lines = [f"    {words(rng, 4).replace(' ', '_')}()" for _ in range(rng.randint(2, 12))]
+    return "```\n" + "\n".join(lines) + "\n```"
+
+def make_page(index, pages, mix, blocks, seed):
+    #every page gets its own generator, so page i has the same text whatever the corpus size, only where its links point changes
+    rng = random.Random(f"{seed}:{index}")
+    kinds = [kind for kind, weight in mix.items() if weight > 0]
+    weights = [mix[kind] for kind in kinds]
+    parts = [f"# Page {index}: {words(rng, 3).title()}"]
+    for kind in rng.choices(kinds, weights, k=blocks):
+        parts.append(make_block(kind, rng, pages))
+    return "\n\n".join(parts) + "\n"
+
+def generate_corpus(content_path, pages, mix=None, blocks=20, seed=0):
+    if mix is None:
+        mix = DEFAULT_MIX
+    paths = []
+    for index in range(pages):
+        path = os.path.join(content_path, page_path(index))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(make_page(index, pages, mix, blocks, seed))
+        paths.append(path)
+    return paths
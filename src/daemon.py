@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import time
+import threading
+from socketserver import ThreadingUnixStreamServer, StreamRequestHandler
+from render import render_markdown
+from layout import Layouts
+from lint import lint_text
+
+#one JSON object per line each way:
+#  {"id": 1, "markdown": "# Title\n\ntext"}                -> {"id": 1, "html": "<!doctype html>...", "ms": 0.4}
+#  {"id": 2, "markdown": "some _text_", "page": false}    -> {"id": 2, "html": "<div><p>...</p></div>", "ms": 0.1}
+#  {"id": 3, "markdown": "# Title\n\nbad **bold"}          -> {"id": 3, "error": "...", "problems": [[3, 5, "..."]]}
+#  {"id": 4, "op": "ping"}                                 -> {"id": 4, "ok": true}
+#page defaults to true and renders the whole page through the template, false renders just the content
+
+class RenderDaemon:
+    #renders documents sent to it instead of files, so a preview costs one render rather than a process start,
+    #imports and a site build; the template, the block cache and highlighted code stay warm between requests
+    def __init__(self, basepath, template_path, cache=None):
+        self.basepath = basepath
+        self.template_path = template_path
+        self.cache = cache
+        #the block cache and highlighter aren't thread safe, socket clients take turns rendering
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def handle(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request is a JSON object")
+        except ValueError as e:
+            return {"id": None, "error": f"Error: Invalid request, {e}"}
+        response = {"id": request.get("id")}
+        if request.get("op") == "ping":
+            response["ok"] = True
+            return response
+        markdown = request.get("markdown")
+        if not isinstance(markdown, str):
+            response["error"] = 'Error: Invalid request, "markdown" has to be a string'
+            return response
+        start = time.perf_counter()
+        #layouts and partials are only read again when they changed, see load_template
+        layouts = Layouts(self.template_path, self.basepath) if request.get("page", True) else None
+        try:
+            with self.lock:
+                response["html"] = render_markdown(markdown, self.basepath, layouts, self.cache)
+                self.requests += 1
+        except Exception as e:
+            response["error"] = str(e)
+            problems = lint_text(markdown, layouts)
+            if problems:
+                response["problems"] = [list(problem) for problem in problems]
+            return response
+        response["ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return response
+
+    def serve_stream(self, reader, writer):
+        #answers every line from reader on writer until reader is closed
+        for line in reader:
+            if line.strip() == "":
+                continue
+            writer.write(json.dumps(self.handle(line), ensure_ascii=False) + "\n")
+            writer.flush()
+
+class DaemonRequestHandler(StreamRequestHandler):
+    def handle(self):
+        reader = (line.decode("utf-8") for line in self.rfile)
+        self.server.render_daemon.serve_stream(reader, SocketWriter(self.wfile))
+
+class SocketWriter:
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        self.wfile.write(text.encode("utf-8"))
+
+    def flush(self):
+        self.wfile.flush()
+
+def serve_daemon(daemon, socket_path=None):
+    #stdin/stdout by default, stdout then only carries responses so notes go to stderr
+    if socket_path is None:
+        print("Render daemon reading requests from stdin", file=sys.stderr)
+        daemon.serve_stream(sys.stdin, sys.stdout)
+        return
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = ThreadingUnixStreamServer(socket_path, DaemonRequestHandler)
+    server.daemon_threads = True
+    server.render_daemon = daemon
+    print(f"Render daemon listening on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
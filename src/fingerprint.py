@@ -0,0 +1,127 @@
+import os
+import re
+import posixpath
+from manifest import hash_file, hash_bytes, write_json, StampCache
+
+FINGERPRINT_CACHE_PATH = "./.ssg-cache/fingerprints.json"
+ASSET_MANIFEST = "asset-manifest.json"
+#files that are only ever fetched through a reference we rewrite; html, robots.txt, favicon.ico and the like
+#are looked up by name, so they keep it
+FINGERPRINT_EXTENSIONS = (".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg",
+                          ".woff", ".woff2", ".ttf", ".otf", ".mp3", ".mp4", ".webm", ".pdf")
+#url(...) in a stylesheet, quoted or not; fonts and background images are only ever referenced this way
+CSS_URL_PATTERN = re.compile(r"""url\(\s*(["']?)([^"')]+?)\1\s*\)""")
+
+def fingerprinted_name(filename, digest):
+    #index.css -> index.<digest>.css
+    stem, extension = os.path.splitext(filename)
+    return f"{stem}.{digest}{extension}"
+
+def asset_url(target_path, dest_path):
+    return "/" + os.path.relpath(target_path, dest_path).replace(os.sep, "/")
+
+def split_suffix(url):
+    #("fonts/a.woff", "?#iefix") for "fonts/a.woff?#iefix"
+    for i, character in enumerate(url):
+        if character in "?#":
+            return url[:i], url[i:]
+    return url, ""
+
+def resolve_css_url(url, stylesheet_url):
+    #the site url a url() in the stylesheet at stylesheet_url points at, None for external and data urls
+    path = split_suffix(url.strip())[0]
+    if path == "" or path.startswith("//") or ":" in path:
+        return None
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(stylesheet_url), path)
+    return posixpath.normpath(path)
+
+class Fingerprinter:
+    #renames static outputs to name.<content hash>.ext so they can be cached forever, and keeps the
+    #url -> fingerprinted url map links are rewritten through; hashes are kept in cache_path by
+    #(size, mtime) so an unchanged asset is never read again
+    def __init__(self, cache_path=FINGERPRINT_CACHE_PATH, length=10):
+        self.length = length
+        self.cache = StampCache(cache_path)
+        self.assets = {}
+        #target -> text of stylesheets whose url()s point at fingerprinted assets, written instead of copied
+        self.stylesheets = {}
+
+    def hash(self, source_path):
+        return self.cache.get(source_path, lambda path: hash_file(path)[:self.length])
+
+    def rename(self, pairs, dest_path):
+        #returns pairs with fingerprinted targets, and sets assets to {"/index.css": "/index.<hash>.css", ...};
+        #stylesheets go last, their url()s are rewritten through the map of everything else before they are hashed
+        targets = {}
+        self.assets = {}
+        self.stylesheets = {}
+        stylesheets = []
+        for source_path, target_path in pairs:
+            if not source_path.lower().endswith(FINGERPRINT_EXTENSIONS):
+                targets[source_path] = target_path
+            elif source_path.lower().endswith(".css"):
+                stylesheets.append((source_path, target_path))
+            else:
+                targets[source_path] = self.fingerprint(target_path, self.hash(source_path), dest_path)
+        #a stylesheet can @import another through url(), each one is rewritten after the ones it imports;
+        #one is taken out of pending before its imports are, which ends import cycles
+        pending = {asset_url(target_path, dest_path): (source_path, target_path) for source_path, target_path in stylesheets}
+        def finish(url):
+            source_path, target_path = pending.pop(url)
+            with open(source_path, encoding="utf-8", errors="surrogateescape") as f:
+                text = f.read()
+            for match in CSS_URL_PATTERN.finditer(text):
+                imported = resolve_css_url(match.group(2), url)
+                if imported in pending:
+                    finish(imported)
+            rewritten = self.rewrite_css(text, url)
+            if rewritten == text:
+                targets[source_path] = self.fingerprint(target_path, self.hash(source_path), dest_path)
+                return
+            new_target = self.fingerprint(target_path, hash_bytes(rewritten.encode("utf-8", "surrogateescape"))[:self.length], dest_path)
+            targets[source_path] = new_target
+            self.stylesheets[new_target] = rewritten
+        while pending:
+            finish(next(iter(pending)))
+        return [(source_path, targets[source_path]) for source_path, target_path in pairs]
+
+    def fingerprint(self, target_path, digest, dest_path):
+        directory, filename = os.path.split(target_path)
+        new_target = os.path.join(directory, fingerprinted_name(filename, digest))
+        self.assets[asset_url(target_path, dest_path)] = asset_url(new_target, dest_path)
+        return new_target
+
+    def rewrite_css(self, text, stylesheet_url):
+        #url()s of fingerprinted assets get the new name, written relative or absolute like they were
+        def replace(match):
+            url = match.group(2)
+            fingerprinted = self.assets.get(resolve_css_url(url, stylesheet_url))
+            if fingerprinted is None:
+                return match.group(0)
+            path, suffix = split_suffix(url)
+            if not path.startswith("/"):
+                fingerprinted = posixpath.relpath(fingerprinted, posixpath.dirname(stylesheet_url))
+            return f"url({match.group(1)}{fingerprinted}{suffix}{match.group(1)})"
+        return CSS_URL_PATTERN.sub(replace, text)
+
+    def write_stylesheet(self, target_path):
+        #writes next to the target and renames over it, like copy_file does
+        tmp_path = target_path + ".sync-tmp"
+        with open(tmp_path, "w", encoding="utf-8", errors="surrogateescape") as f:
+            f.write(self.stylesheets[target_path])
+        os.replace(tmp_path, target_path)
+
+    def outputs(self, dest_path):
+        return [os.path.join(dest_path, ASSET_MANIFEST)]
+
+    def write(self, dest_path):
+        #the same map for other tools, as paths relative to dest_path like most bundlers write it
+        assets = {url[1:]: fingerprinted[1:] for url, fingerprinted in self.assets.items()}
+        write_json(os.path.join(dest_path, ASSET_MANIFEST), assets, indent=1, sort_keys=True)
+
+    def save(self):
+        self.cache.save()
+
+    def report(self):
+        return f"Fingerprinted {len(self.assets)} assets, {self.cache.computed} hashed, {self.cache.reused} unchanged"
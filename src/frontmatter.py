@@ -0,0 +1,72 @@
+import re
+from datetime import datetime, timezone
+
+#a page may start with YAML-style front matter between two --- lines:
+#  title: Hello
+#  date: 2024-05-01
+#  tags: [elves, history]
+#only "key: value" pairs, [a, b] lists, "- item" lists below an empty key, quotes and true/false are understood
+FRONT_MATTER_FENCE = "---"
+KEY_PATTERN = re.compile(r"^([A-Za-z_][\w-]*)\s*:(.*)$")
+
+def parse_value(text):
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    if text.startswith("[") and text.endswith("]"):
+        return [parse_value(item) for item in text[1:-1].split(",") if item.strip() != ""]
+    if text in ("true", "false"):
+        return text == "true"
+    return text
+
+def parse_front_matter(lines):
+    #lines are the ones between the fences, without line endings
+    meta = {}
+    key = None
+    for line in lines:
+        stripped = line.strip()
+        if stripped == "" or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key is not None and isinstance(meta[key], list):
+            meta[key].append(parse_value(stripped[2:]))
+            continue
+        match = KEY_PATTERN.match(line)
+        if match is None:
+            raise Exception(f'Error: Invalid front matter line "{line}"')
+        key = match.group(1)
+        value = match.group(2).strip()
+        #an empty value is the start of a "- item" list
+        meta[key] = parse_value(value) if value != "" else []
+    return meta
+
+def split_front_matter(lines):
+    #returns (meta, the remaining lines); only the front matter is read from lines, the rest stays lazy
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(())
+    if first.rstrip() != FRONT_MATTER_FENCE:
+        return {}, prepend(first, lines)
+    front_matter = []
+    for line in lines:
+        if line.rstrip() == FRONT_MATTER_FENCE:
+            return parse_front_matter(front_matter), lines
+        front_matter.append(line.rstrip("\n"))
+    raise Exception("Error: Front matter is not closed with ---")
+
+def prepend(first, lines):
+    yield first
+    yield from lines
+
+def meta_timestamp(meta):
+    #the date field as a unix timestamp, dates without a timezone are taken as UTC
+    date = meta.get("date")
+    if not isinstance(date, str) or date == "":
+        return None
+    try:
+        parsed = datetime.fromisoformat(date)
+    except ValueError:
+        raise Exception(f'Error: Invalid front matter date "{date}", use YYYY-MM-DD')
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
@@ -0,0 +1,219 @@
+import re
+import time
+from html import escape
+from blockcache import BlockCache
+
+#entries are stored the way the block cache stores them since version 2
+HIGHLIGHT_VERSION = 2
+HIGHLIGHT_CACHE_PATH = "./.ssg-cache/highlight.json"
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+def words(*names):
+    return r"\b(?:" + "|".join(names) + r")\b"
+
+class Lexer:
+    #rules are (token class, regex) pairs tried in order at every position; text no rule matches is left plain.
+    #the combined regex is compiled the first time the language shows up, so importing this module stays cheap
+    def __init__(self, rules):
+        self.rules = rules
+        self.tokens = [token for token, pattern in rules]
+        self.pattern = None
+
+    def highlight(self, code):
+        if self.pattern is None:
+            self.pattern = re.compile("|".join(f"(?P<t{i}>{pattern})" for i, (token, pattern) in enumerate(self.rules)), re.M)
+        parts = []
+        position = 0
+        for match in self.pattern.finditer(code):
+            if match.start() > position:
+                parts.append(escape(code[position:match.start()], quote=False))
+            token = self.tokens[int(match.lastgroup[1:])]
+            parts.append(f'<span class="tok-{token}">{escape(match.group(), quote=False)}</span>')
+            position = match.end()
+        parts.append(escape(code[position:], quote=False))
+        return "".join(parts)
+
+NUMBER = r"\b(?:0[xXbBoO][0-9a-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?)\b"
+DOUBLE_QUOTED = r'"(?:\\.|[^"\\\n])*"'
+SINGLE_QUOTED = r"'(?:\\.|[^'\\\n])*'"
+LINE_COMMENT = r"//[^\n]*"
+BLOCK_COMMENT = r"/\*[\s\S]*?\*/"
+
+def c_like(keywords, types=(), strings=(DOUBLE_QUOTED, SINGLE_QUOTED)):
+    rules = [("com", LINE_COMMENT), ("com", BLOCK_COMMENT)]
+    rules += [("str", string) for string in strings]
+    rules += [("kw", words(*keywords)), ("num", NUMBER)]
+    if types:
+        rules.append(("type", words(*types)))
+    rules.append(("fn", r"\b[A-Za-z_]\w*(?=\s*\()"))
+    return Lexer(rules)
+
+LEXERS = {
+    "python": Lexer([
+        ("com", r"#[^\n]*"),
+        ("str", r"[rRbBuUfF]{0,2}(?:\"\"\"[\s\S]*?\"\"\"|'''[\s\S]*?'''|" + DOUBLE_QUOTED + "|" + SINGLE_QUOTED + ")"),
+        ("kw", words("and", "as", "assert", "async", "await", "break", "class", "continue", "def", "del", "elif", "else", "except",
+                     "finally", "for", "from", "global", "if", "import", "in", "is", "lambda", "nonlocal", "not", "or", "pass",
+                     "raise", "return", "try", "while", "with", "yield", "match", "case", "True", "False", "None")),
+        ("num", NUMBER),
+        ("type", words("int", "str", "float", "bool", "list", "dict", "set", "tuple", "bytes", "object", "Exception")),
+        ("fn", r"\b[A-Za-z_]\w*(?=\s*\()"),
+    ]),
+    "javascript": c_like(
+        ("break", "case", "catch", "class", "const", "continue", "default", "delete", "do", "else", "export", "extends",
+         "finally", "for", "function", "if", "import", "from", "in", "instanceof", "let", "new", "of", "return", "super",
+         "switch", "this", "throw", "try", "typeof", "var", "void", "while", "yield", "async", "await", "true", "false",
+         "null", "undefined", "interface", "type", "enum", "implements"),
+        ("string", "number", "boolean", "any", "unknown", "never", "Array", "Promise", "Map", "Set", "Object"),
+        (DOUBLE_QUOTED, SINGLE_QUOTED, r"`(?:\\.|[^`\\])*`"),
+    ),
+    "go": c_like(
+        ("break", "case", "chan", "const", "continue", "default", "defer", "else", "fallthrough", "for", "func", "go",
+         "goto", "if", "import", "interface", "map", "package", "range", "return", "select", "struct", "switch", "type",
+         "var", "true", "false", "nil"),
+        ("bool", "byte", "error", "float32", "float64", "int", "int8", "int16", "int32", "int64", "rune", "string",
+         "uint", "uint8", "uint16", "uint32", "uint64", "any"),
+        (DOUBLE_QUOTED, SINGLE_QUOTED, r"`[^`]*`"),
+    ),
+    "rust": c_like(
+        ("as", "async", "await", "break", "const", "continue", "crate", "else", "enum", "extern", "fn", "for", "if", "impl",
+         "in", "let", "loop", "match", "mod", "move", "mut", "pub", "ref", "return", "self", "Self", "static", "struct",
+         "super", "trait", "type", "unsafe", "use", "where", "while", "true", "false"),
+        ("bool", "char", "f32", "f64", "i8", "i16", "i32", "i64", "i128", "isize", "str", "u8", "u16", "u32", "u64",
+         "u128", "usize", "String", "Vec", "Option", "Result", "Box"),
+        (DOUBLE_QUOTED,),
+    ),
+    "c": c_like(
+        ("auto", "break", "case", "catch", "class", "const", "continue", "default", "delete", "do", "else", "enum", "extern",
+         "for", "goto", "if", "inline", "namespace", "new", "private", "protected", "public", "return", "sizeof", "static",
+         "struct", "switch", "template", "this", "throw", "try", "typedef", "union", "using", "virtual", "volatile", "while",
+         "true", "false", "NULL", "nullptr"),
+        ("bool", "char", "double", "float", "int", "long", "short", "signed", "unsigned", "void", "size_t", "auto"),
+    ),
+    "java": c_like(
+        ("abstract", "break", "case", "catch", "class", "continue", "default", "do", "else", "enum", "extends", "final",
+         "finally", "for", "if", "implements", "import", "instanceof", "interface", "new", "package", "private",
+         "protected", "public", "return", "static", "super", "switch", "synchronized", "this", "throw", "throws", "try",
+         "var", "void", "while", "true", "false", "null"),
+        ("boolean", "byte", "char", "double", "float", "int", "long", "short", "String", "Object", "List", "Map"),
+    ),
+    "bash": Lexer([
+        ("com", r"(?<![\w$])#[^\n]*"),
+        ("str", DOUBLE_QUOTED + "|'[^']*'"),
+        ("kw", words("if", "then", "else", "elif", "fi", "for", "while", "until", "do", "done", "case", "esac", "in",
+                     "function", "return", "local", "export", "set", "unset", "echo", "cd", "exit")),
+        ("var", r"\$(?:\{[^}\n]*\}|\w+|[@#?$!*0-9])"),
+        ("num", NUMBER),
+    ]),
+    "json": Lexer([
+        ("key", DOUBLE_QUOTED + r"(?=\s*:)"),
+        ("str", DOUBLE_QUOTED),
+        ("kw", words("true", "false", "null")),
+        ("num", r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?"),
+    ]),
+    "css": Lexer([
+        ("com", BLOCK_COMMENT),
+        ("str", DOUBLE_QUOTED + "|" + SINGLE_QUOTED),
+        ("kw", r"@[\w-]+"),
+        ("key", r"[\w-]+(?=\s*:[^;{}]*[;}])"),
+        ("num", r"#[0-9a-fA-F]{3,8}\b|-?\d*\.?\d+(?:%|[a-z]+)?"),
+    ]),
+    "html": Lexer([
+        ("com", r"<!--[\s\S]*?-->"),
+        ("kw", r"</?[A-Za-z][\w-]*|/?>"),
+        ("key", r"\b[\w-]+(?==)"),
+        ("str", DOUBLE_QUOTED + "|" + SINGLE_QUOTED),
+    ]),
+    "sql": Lexer([
+        ("com", r"--[^\n]*"),
+        ("com", BLOCK_COMMENT),
+        ("str", SINGLE_QUOTED),
+        ("kw", "(?i:" + words("select", "from", "where", "and", "or", "not", "insert", "into", "values", "update", "set",
+                               "delete", "create", "table", "index", "drop", "alter", "join", "left", "right", "inner",
+                               "outer", "on", "group", "by", "order", "having", "limit", "as", "distinct", "null", "is",
+                               "in", "like", "primary", "key", "union", "all", "case", "when", "then", "else", "end") + ")"),
+        ("num", NUMBER),
+    ]),
+    "yaml": Lexer([
+        ("com", r"(?<!\S)#[^\n]*"),
+        ("key", r"^[ \t-]*[\w.-]+(?=:)"),
+        ("str", DOUBLE_QUOTED + "|" + SINGLE_QUOTED),
+        ("kw", words("true", "false", "null", "yes", "no")),
+        ("num", NUMBER),
+    ]),
+}
+ALIASES = {
+    "py": "python", "python3": "python", "js": "javascript", "jsx": "javascript", "ts": "javascript",
+    "typescript": "javascript", "tsx": "javascript", "golang": "go", "rs": "rust", "cpp": "c", "c++": "c",
+    "h": "c", "hpp": "c", "sh": "bash", "shell": "bash", "zsh": "bash", "console": "bash", "xml": "html",
+    "svg": "html", "yml": "yaml",
+}
+
+def find_lexer(language):
+    language = language.lower()
+    return LEXERS.get(ALIASES.get(language, language))
+
+class Highlighter:
+    #turns code into html spans for languages with a lexer; the spans are kept in a BlockCache keyed by
+    #(language, code), so with a path they stay on disk between builds the same way rendered blocks do
+    def __init__(self, path=None, enabled=True, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.cache = BlockCache(max_bytes, path, HIGHLIGHT_VERSION)
+        self.blocks = 0
+        self.hits = 0
+        self.seconds = 0.0
+
+    def settings(self):
+        return (self.path, self.enabled, self.max_bytes)
+
+    def highlight(self, code, language):
+        #returns None when highlighting is off or there is no lexer for the language
+        if not self.enabled:
+            return None
+        lexer = find_lexer(language)
+        if lexer is None:
+            return None
+        self.blocks += 1
+        language = language.lower()
+        cached = self.cache.get(language, code)
+        if cached is not None:
+            self.hits += 1
+            return cached[0]
+        start = time.perf_counter()
+        html = lexer.highlight(code)
+        self.seconds += time.perf_counter() - start
+        self.cache.put(language, code, html)
+        return html
+
+    def save(self):
+        if self.cache.new_entries or self.cache.disk_used:
+            self.cache.save()
+
+    def take_work(self):
+        #what a worker process did since the last call, for the parent to merge
+        work = ({"blocks": self.blocks, "hits": self.hits, "seconds": self.seconds}, self.cache.new_entries)
+        self.blocks = self.hits = 0
+        self.seconds = 0.0
+        self.cache.new_entries = {}
+        return work
+
+    def merge(self, counters, new_entries):
+        self.blocks += counters["blocks"]
+        self.hits += counters["hits"]
+        self.seconds += counters["seconds"]
+        if self.path is not None:
+            self.cache.new_entries.update(new_entries)
+
+    def report(self):
+        if self.blocks == 0:
+            return None
+        return f"Highlighting: {self.blocks} code blocks, {self.hits} from cache, {self.seconds * 1000:.1f} ms tokenizing"
+
+#the highlighter used while rendering; main and worker processes swap in one set up from the command line
+highlighter = Highlighter()
+
+def use_highlighter(new_highlighter):
+    global highlighter
+    highlighter = new_highlighter
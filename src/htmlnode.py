@@ -1,6 +1,12 @@
+import sys
+
 class HTMLNode:
+    #no per-instance __dict__: large sites keep hundreds of thousands of these alive at once
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag = None, value = None, children = None, props = None):
-        self.tag = tag
+        #every node with the same tag shares one string object
+        self.tag = sys.intern(tag) if tag is not None else None
         self.value = value
         self.children = children
         self.props = props
@@ -12,15 +18,14 @@ class HTMLNode:
         if self.props == None:
             return ""
         
-        result = ""
-        for key in self.props:
-            result += f' {key}="{self.props[key]}"'
-        return result
+        return "".join([f' {key}="{value}"' for key, value in self.props.items()])
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props = None):
         super().__init__(tag, value, props=props)
 
@@ -36,6 +41,8 @@ class LeafNode(HTMLNode):
             return f"<{self.tag}>{self.value}</{self.tag}>"
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, children=children, props=props)
 
@@ -44,8 +51,25 @@ class ParentNode(HTMLNode):
             raise ValueError("Invalid HTML: Parent has no tag")
         if self.children is None:
             raise ValueError("Invalid HTML: Parent has no children")
+        return "".join(iter_html(self))
+
+def iter_html(node):
+    #walks the tree with an explicit stack, so deep documents don't hit the recursion limit
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+        elif isinstance(item, ParentNode):
+            if item.tag is None:
+                raise ValueError("Invalid HTML: Parent has no tag")
+            if item.children is None:
+                raise ValueError("Invalid HTML: Parent has no children")
+            yield f"<{item.tag}{item.props_to_html()}>"
+            stack.append(f"</{item.tag}>")
+            stack.extend(reversed(item.children))
         else:
-            result = f"<{self.tag}{self.props_to_html()}>"
-            for child in self.children:
-                result += child.to_html()
-            return result + f"</{self.tag}>"
\ No newline at end of file
+            yield item.to_html()
+
+def write_html(node, fp):
+    fp.writelines(iter_html(node))
\ No newline at end of file
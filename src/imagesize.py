@@ -0,0 +1,136 @@
+import os
+import struct
+from manifest import StampCache
+
+IMAGE_CACHE_PATH = "./.ssg-cache/image-sizes.json"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+#start-of-frame markers carry the size, the others in C0-CF are huffman and arithmetic tables
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+#exif orientations 5-8 are rotated a quarter turn, browsers swap width and height for those
+JPEG_ROTATED = (5, 6, 7, 8)
+
+def png_size(f, header):
+    if len(header) < 24 or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+def gif_size(f, header):
+    if len(header) < 10:
+        return None
+    return struct.unpack("<HH", header[6:10])
+
+def webp_size(f, header):
+    if len(header) < 30:
+        return None
+    chunk = header[12:16]
+    if chunk == b"VP8 " and header[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and header[20:21] == b"\x2f":
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(header[24:27], "little") + 1, int.from_bytes(header[27:30], "little") + 1
+    return None
+
+def jpeg_size(f, header):
+    #walks the marker segments, seeking past each one, until the frame header
+    f.seek(2)
+    orientation = 1
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        while marker[1] == 0xFF:
+            #fill bytes, a file that ends in them has no frame header
+            byte = f.read(1)
+            if not byte:
+                return None
+            marker = marker[1:] + byte
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker[1] in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return (height, width) if orientation in JPEG_ROTATED else (width, height)
+        segment_start = f.tell()
+        if marker[1] == 0xE1:
+            orientation = exif_orientation(f.read(min(length - 2, 4096))) or orientation
+        f.seek(segment_start + length - 2)
+
+def exif_orientation(data):
+    #the orientation tag (0x0112) of the first IFD in an APP1 Exif segment
+    if data[:6] != b"Exif\x00\x00" or len(data) < 14:
+        return None
+    tiff = data[6:]
+    order = "<" if tiff[:2] == b"II" else ">"
+    offset = struct.unpack(order + "I", tiff[4:8])[0]
+    if offset + 2 > len(tiff):
+        return None
+    count = struct.unpack(order + "H", tiff[offset:offset + 2])[0]
+    for i in range(count):
+        entry = tiff[offset + 2 + i * 12:offset + 14 + i * 12]
+        if len(entry) < 12:
+            return None
+        if struct.unpack(order + "H", entry[:2])[0] == 0x0112:
+            return struct.unpack(order + "H", entry[8:10])[0]
+    return None
+
+def image_size(path):
+    #(width, height) read from the first bytes of a png, gif, webp or jpeg, None for anything else;
+    #nothing is decoded, jpegs are the only format that may need a few seeks; a truncated or corrupt
+    #header just means the size is unknown, the image is still linked without width and height
+    with open(path, "rb") as f:
+        header = f.read(32)
+        try:
+            if header[:8] == b"\x89PNG\r\n\x1a\n":
+                return png_size(f, header)
+            if header[:6] in (b"GIF87a", b"GIF89a"):
+                return gif_size(f, header)
+            if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+                return webp_size(f, header)
+            if header[:2] == b"\xff\xd8":
+                return jpeg_size(f, header)
+        except (struct.error, IndexError, ValueError):
+            return None
+    return None
+
+def probe_size(path):
+    #[width, height] as it is kept in the cache and the manifest, None when unknown
+    try:
+        size = image_size(path)
+    except OSError:
+        return None
+    return list(size) if size is not None else None
+
+class ImageProber:
+    #sizes of every image in the static files, probed from their headers and kept in cache_path
+    #by (size, mtime) so images that didn't change are never opened again
+    def __init__(self, cache_path=IMAGE_CACHE_PATH):
+        self.cache = StampCache(cache_path)
+
+    def probe(self, source_path):
+        return self.cache.get(source_path, probe_size)
+
+    def sizes(self, static_path, static_pairs):
+        #{"/images/a.png": [width, height], ...}, by the url the content links to the source with
+        sizes = {}
+        for source_path, target_path in static_pairs:
+            if not source_path.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            size = self.probe(source_path)
+            if size is not None:
+                sizes["/" + os.path.relpath(source_path, static_path).replace(os.sep, "/")] = size
+        return sizes
+
+    def save(self):
+        self.cache.save()
+
+    def report(self):
+        return f"Image sizes: {self.cache.computed} images probed, {self.cache.reused} unchanged"
@@ -0,0 +1,40 @@
+import os
+import re
+from template import load_template
+
+LAYOUT_DIRECTORY = "layouts"
+PARTIAL_DIRECTORY = "partials"
+LAYOUT_NAME_PATTERN = re.compile(r"[\w-]+(?:/[\w-]+)*")
+
+class Layouts:
+    #the templates pages are rendered with: template_path for pages that don't pick one, layouts/<name>.html
+    #next to it for pages with "layout: <name>" in their front matter; any of them can include
+    #partials/<name>.html from the same directory with {{> name }}
+    def __init__(self, template_path, basepath="/"):
+        root = os.path.dirname(template_path)
+        self.template_path = template_path
+        self.layout_path = os.path.join(root, LAYOUT_DIRECTORY)
+        self.partial_path = os.path.join(root, PARTIAL_DIRECTORY)
+        self.basepath = basepath
+        #compiled on first use, so one build renders every page with the same version of a layout
+        self.templates = {}
+
+    def path(self, name):
+        if name is None:
+            return self.template_path
+        if not isinstance(name, str) or not LAYOUT_NAME_PATTERN.fullmatch(name):
+            raise Exception(f'Error: Invalid layout "{name}" in front matter')
+        return os.path.join(self.layout_path, name + ".html")
+
+    def get(self, name=None):
+        template = self.templates.get(name)
+        if template is None:
+            path = self.path(name)
+            if name is not None and not os.path.isfile(path):
+                raise Exception(f'Error: Layout "{name}" not found, expected {path}')
+            template = load_template(path, self.basepath, self.partial_path)
+            self.templates[name] = template
+        return template
+
+    def for_page(self, meta):
+        return self.get(meta.get("layout") or None)
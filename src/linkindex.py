@@ -0,0 +1,68 @@
+import os
+import posixpath
+from urllib.parse import unquote
+
+#links with a scheme or that only move within the page can't be checked against ./docs
+EXTERNAL_PREFIXES = ("#", "//", "mailto:", "tel:", "data:", "javascript:")
+
+def output_url(output_path, dest_path):
+    return os.path.relpath(output_path, dest_path).replace(os.sep, "/")
+
+class LinkIndex:
+    #every generated page with the href/src urls it contains, plus every file written to dest_path
+    def __init__(self, dest_path, basepath="/"):
+        self.dest_path = dest_path
+        self.basepath = basepath
+        self.pages = {}
+        self.outputs = set()
+
+    def add_output(self, output_path):
+        self.outputs.add(output_url(output_path, self.dest_path))
+
+    def add_page(self, output_path, links):
+        self.add_output(output_path)
+        self.pages[output_url(output_path, self.dest_path)] = links
+
+    def target(self, page, url):
+        #returns the path below dest_path a link points at, None when it can't be checked
+        if not url or url.startswith(EXTERNAL_PREFIXES) or "://" in url:
+            return None
+        url = unquote(url.split("#", 1)[0].split("?", 1)[0])
+        if not url:
+            return None
+        if url.startswith(self.basepath):
+            path = url[len(self.basepath):]
+        elif url.startswith("/"):
+            #absolute but outside the basepath, so it can't be served from ./docs
+            return url
+        else:
+            path = posixpath.normpath(posixpath.join(posixpath.dirname(page), url))
+            if url.endswith("/"):
+                path += "/"
+        if path in ("", ".", "./"):
+            return "index.html"
+        if path.endswith("/"):
+            return path + "index.html"
+        return path
+
+    def exists(self, path):
+        #static hosts like GitHub Pages serve /post from post.html or post/index.html
+        outputs = self.outputs
+        return path in outputs or path + ".html" in outputs or path + "/index.html" in outputs
+
+    def check(self):
+        #one pass over every link, each one is a set lookup
+        broken = []
+        for page, links in self.pages.items():
+            for attribute, url in links:
+                path = self.target(page, url)
+                if path is not None and not self.exists(path):
+                    broken.append((page, attribute, url))
+        broken.sort()
+        return broken
+
+    def report(self, broken):
+        lines = [f"{len(broken)} broken links:"]
+        for page, attribute, url in broken:
+            lines.append(f"  {page}: {attribute}=\"{url}\"")
+        return "\n".join(lines)
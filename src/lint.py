@@ -0,0 +1,122 @@
+import os
+from blockmarkdown import iter_typed_blocks, iter_string_lines, BlockType
+from frontmatter import FRONT_MATTER_FENCE, KEY_PATTERN, split_front_matter, meta_timestamp
+from layout import Layouts
+from textnode import scan_inline
+from parallel import resolve_jobs
+
+def location(text, offset):
+    #1-based line and column of offset in text
+    line = text.count("\n", 0, offset) + 1
+    return line, offset - text.rfind("\n", 0, offset)
+
+def front_matter_end(text):
+    #offset just past the closing --- of the front matter, 0 when the page has none
+    lines = iter_string_lines(text)
+    first = next(lines, "")
+    if first.rstrip() != FRONT_MATTER_FENCE:
+        return 0
+    offset = len(first)
+    for line in lines:
+        offset += len(line)
+        if line.rstrip() == FRONT_MATTER_FENCE:
+            break
+    return offset
+
+def front_matter_line(text, key):
+    #line of key in the front matter, 1 when it isn't there
+    for number, line in enumerate(text[:front_matter_end(text)].splitlines(), 1):
+        match = KEY_PATTERN.match(line)
+        if match is not None and match.group(1) == key:
+            return number
+    return 1
+
+def lint_text(text, layouts=None):
+    #returns (line, column, message) for everything that would make rendering the page fail, not just the first;
+    #blocks are split the same way the renderer splits them and then found again in text to place them.
+    #with layouts, the layout the page picks and the partials it includes are checked too
+    try:
+        meta = split_front_matter(iter_string_lines(text))[0]
+        meta_timestamp(meta)
+    except Exception as e:
+        #the blocks can't be placed without knowing where the front matter ends
+        return [(1, 1, str(e).removeprefix("Error: "))]
+    problems = []
+    if layouts is not None:
+        try:
+            layouts.for_page(meta)
+        except Exception as e:
+            problems.append((front_matter_line(text, "layout"), 1, str(e).removeprefix("Error: ")))
+    title = meta.get("title")
+    start = front_matter_end(text)
+    cursor = start
+    for block, blocktype in iter_typed_blocks(iter_string_lines(text[start:])):
+        offset = text.find(block, cursor)
+        cursor = offset + len(block)
+        if title is None and block.startswith("# "):
+            title = block[2:]
+        if blocktype == BlockType.CODE:
+            continue
+        #the renderer joins and strips lines before parsing them, neither of which adds or removes a marker,
+        #so the raw block pairs its delimiters the same way and its offsets map straight back to the file
+        unclosed = []
+        scan_inline(block, problems=unclosed)
+        for i, delimiter in unclosed:
+            line, column = location(text, offset + i)
+            problems.append((line, column, f'Invalid Markdown syntax, no closing "{delimiter}" found.'))
+    if title is None:
+        problems.append((1, 1, "No h1 header found"))
+    return problems
+
+def lint_page(source_path, layouts=None):
+    try:
+        with open(source_path) as f:
+            text = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return [(1, 1, f"{type(e).__name__}: {e}")]
+    return lint_text(text, layouts)
+
+def list_sources(content_path):
+    sources = []
+    for root, directories, files in os.walk(content_path):
+        for name in files:
+            if name.lower().endswith(".md"):
+                sources.append(os.path.join(root, name))
+    sources.sort()
+    return sources
+
+#set once per worker process, so the layouts aren't shipped with every page and each is compiled once per process
+_worker_state = {}
+
+def _init_worker(template_path):
+    _worker_state["layouts"] = Layouts(template_path) if template_path is not None else None
+
+def _lint_job(source_path):
+    return lint_page(source_path, _worker_state["layouts"])
+
+def lint_site(content_path, jobs=1, template_path=None):
+    #checks every page without writing anything and prints each problem as path:line:column: message,
+    #returns how many problems were found; with template_path, layouts are looked up next to it like the build does
+    sources = list_sources(content_path)
+    jobs = resolve_jobs(jobs)
+    if jobs == 1 or len(sources) < 2:
+        _init_worker(template_path)
+        return report_problems(sources, map(_lint_job, sources))
+    from concurrent.futures import ProcessPoolExecutor
+    chunksize = max(1, len(sources) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(template_path,)) as executor:
+        return report_problems(sources, executor.map(_lint_job, sources, chunksize=chunksize))
+
+def report_problems(sources, results):
+    count = 0
+    failed = 0
+    for source_path, problems in zip(sources, results):
+        for line, column, message in problems:
+            print(f"{source_path}:{line}:{column}: {message}")
+        count += len(problems)
+        failed += bool(problems)
+    if count:
+        print(f"{count} problems in {failed} of {len(sources)} pages")
+    else:
+        print(f"Checked {len(sources)} pages, no problems found")
+    return count
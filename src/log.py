@@ -0,0 +1,7 @@
+#per-file progress lines are only printed while verbose is set; call sites check it before
+#formatting anything, so --quiet takes the logging out of the hot loops entirely
+verbose = True
+
+def set_verbose(value):
+    global verbose
+    verbose = value
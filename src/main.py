@@ -1,68 +1,560 @@
 import os
+import log
 import sys
+import json
 import shutil
-from blockmarkdown import markdown_to_html_node, extract_title
+import argparse
 from htmlnode import HTMLNode, LeafNode, ParentNode
+from render import scan_page
+from layout import Layouts
+from template import use_assets, current_assets, use_image_sizes, current_image_sizes, apply_basepath
+from parallel import render_pages
+from blockcache import BlockCache, BLOCK_CACHE_PATH
+import highlight
+from highlight import Highlighter, HIGHLIGHT_CACHE_PATH
+from sitefiles import SiteFiles, SITE_FILES
+from shard import SHARD_DIR, parse_shard, shard_root, partition_pages
+from fingerprint import Fingerprinter, ASSET_MANIFEST
+from staticsync import LINK_MODES, COMPARE_MODES, sync_static, list_static, prune_outputs
+from manifest import hash_file, new_manifest, load_manifest, save_manifest, entry_is_current, remove_output, changed_templates, record_templates, uses_any
+#modules only some options need and that take long to import (asyncio for --pipeline, urllib for --check-links,
+#gzip and threads for --minify and --compress, the profiler, lint, image probing, serve) are imported where they
+#are used, so every run, and most of all the daemon's clients, start faster; the ones above are cheap or needed
+#to parse the command line
 
-def copy_static_to_docs(source_directory, target_directory, first_call=False):
-    if first_call == True:
-        if os.path.exists(target_directory):
-            shutil.rmtree(target_directory)
-        os.makedirs(target_directory, exist_ok=True)
+MANIFEST_PATH = "./.ssg-cache/manifest.json"
+
+def list_files(source_directory, target_directory):
+    #yields (source, target) pairs for every file below source_directory
     for item in os.listdir(source_directory):
         source_path = os.path.join(source_directory, item)
         target_path = os.path.join(target_directory, item)
-        
         if os.path.isfile(source_path):
-            #logs the copied file to the terminal before copying it
-            print(f"Copying {source_path} to {target_path}")
-            shutil.copy(source_path, target_path)
+            yield source_path, target_path
         elif os.path.isdir(source_path):
-            #log directory creation
-            print(f"Creating {target_path}")
-            os.makedirs(target_path, exist_ok=True)
-            copy_static_to_docs(source_path, target_path)
-
-def generate_pages_recursive(basepath, from_path, template_path, dest_path):
-    for item in os.listdir(from_path):
-        item_path = os.path.join(from_path, item)
-        item_dest = os.path.join(dest_path, item)
-
-        if os.path.isfile(item_path) and item.lower().endswith(".md"):
-            item_dest = item_dest[:-3] + ".html"
-            #logs the copy info into the terminal
-            print(f"Generating page from {item_path} to {item_dest} using {template_path}")
-            with open(item_path) as f:
-                markdown = f.read()
-            with open(template_path) as f2:
-                template = f2.read()
-
-            node = markdown_to_html_node(markdown)
-            html_string = node.to_html()
-            title = extract_title(markdown)
-
-            template = template.replace("{{ Title }}", title)
-            template = template.replace("{{ Content }}", html_string)
-            template = template.replace('href="/', f'href="{basepath}')
-            template = template.replace('src="/', f'src="{basepath}')
-
-            os.makedirs(os.path.dirname(item_dest), exist_ok=True)
-            with open(item_dest, "w") as f3:
-                f3.write(template)
-
-        elif os.path.isdir(item_path):
-            os.makedirs(item_dest, exist_ok=True)
-            generate_pages_recursive(basepath, item_path, template_path, item_dest)
+            yield from list_files(source_path, target_path)
+
+def list_pages(from_path, dest_path):
+    for source_path, target_path in list_files(from_path, dest_path):
+        if source_path.lower().endswith(".md"):
+            yield source_path, target_path[:-3] + ".html"
+
+def scan_site(content_path, dest_path="./docs"):
+    #prints one JSON object per page with its front matter and title, without rendering anything
+    failures = []
+    for source_path, target_path in list_pages(content_path, dest_path):
+        try:
+            meta = scan_page(source_path)
+        except Exception as e:
+            print(f"Error scanning {source_path}: {e}", file=sys.stderr)
+            failures.append((source_path, str(e)))
+            continue
+        print(json.dumps({"source": source_path, "output": target_path, **meta}, ensure_ascii=False))
+    return failures
+
+def report_failures(failures, template_path="./template.html"):
+    if not failures:
+        return
+    print(f"{len(failures)} pages failed to generate:")
+    for source_path, error in failures:
+        #the renderer stops at a page's first error, lint finds all of them and where they are
+        from lint import lint_page
+        problems = lint_page(source_path, Layouts(template_path))
+        if not problems:
+            print(f"  {source_path}: {error}")
+        for line, column, message in problems:
+            print(f"  {source_path}:{line}:{column}: {message}")
+    sys.exit(1)
+
+def build_directory(dest_path):
+    return dest_path.rstrip("/") + ".building"
+
+def swap_in(build_path, dest_path, content_path, failures):
+    #replaces dest_path with a finished build; pages that failed keep their last good output
+    #instead of disappearing from the site
+    for source_path, error in failures:
+        output = os.path.relpath(source_path, content_path)[:-3] + ".html"
+        old_output = os.path.join(dest_path, output)
+        if os.path.exists(old_output):
+            new_output = os.path.join(build_path, output)
+            os.makedirs(os.path.dirname(new_output), exist_ok=True)
+            shutil.copy2(old_output, new_output)
+    #two renames, so dest_path is only missing for an instant and never half written
+    old_path = dest_path.rstrip("/") + ".old"
+    if os.path.exists(old_path):
+        shutil.rmtree(old_path)
+    if os.path.exists(dest_path):
+        os.rename(dest_path, old_path)
+    os.rename(build_path, dest_path)
+    if os.path.exists(old_path):
+        shutil.rmtree(old_path)
+
+def report_broken_links(link_index):
+    if link_index is None:
+        return
+    broken = link_index.check()
+    if not broken:
+        print(f"Checked links in {len(link_index.pages)} pages, none are broken")
+        return
+    print(link_index.report(broken))
+    sys.exit(1)
+
+def site_outputs(site_files):
+    return site_files.outputs() if site_files is not None else []
+
+def asset_outputs(fingerprinter, dest_path):
+    return fingerprinter.outputs(dest_path) if fingerprinter is not None else []
+
+def use_static_files(static_path, static_pairs, dest_path, fingerprinter=None, prober=None):
+    #pages are rendered with the asset map and image sizes of the static files just synced; the map
+    #is empty without --fingerprint and images get no extra attributes without --image-sizes
+    use_assets(fingerprinter.assets if fingerprinter is not None else {})
+    use_image_sizes(prober.sizes(static_path, static_pairs) if prober is not None else None)
+    if fingerprinter is not None and dest_path is not None:
+        fingerprinter.write(dest_path)
+
+def record_static_files(manifest):
+    manifest["assets"] = current_assets()
+    manifest["images"] = current_image_sizes()
+
+def record_post_processor(manifest, post_processor):
+    #whether pages were minified, and where the hashes of compressed outputs are kept, so a later
+    #incremental build can undo post-processing it isn't asked for
+    manifest["minify"] = post_processor is not None and post_processor.minify
+    manifest["postprocess"] = post_processor.state_path if post_processor is not None else None
+
+def changed_static_urls(old_manifest, manifest, basepath):
+    #the urls pages rendered with the old asset map hold for every asset that is linked
+    #under a different url now, or whose image size changed
+    old_assets = old_manifest.get("assets", {})
+    old_sizes = old_manifest.get("images") or {}
+    sizes = manifest["images"] or {}
+    changed = set()
+    for url in old_assets.keys() | manifest["assets"].keys() | old_sizes.keys() | sizes.keys():
+        if old_assets.get(url) != manifest["assets"].get(url) or old_sizes.get(url) != sizes.get(url):
+            changed.add(apply_basepath(old_assets.get(url, url), basepath))
+    return changed
+
+def links_any(entry, urls):
+    return any(url in urls for attribute, url in entry.get("links", ()))
+
+def index_outputs(static_outputs, pages, link_index=None, site_files=None):
+    #pages is a list of (output, what render_page returned for it)
+    if site_files is not None:
+        for output_path, page in pages:
+            site_files.add(output_path, page)
+        site_files.write()
+    if link_index is not None:
+        for output_path in static_outputs:
+            link_index.add_output(output_path)
+        if site_files is not None:
+            for output_path in site_files.outputs():
+                link_index.add_output(output_path)
+        for output_path, page in pages:
+            link_index.add_page(output_path, page["links"])
+
+def build_incremental(basepath, static_path, content_path, template_path, dest_path, manifest_path=MANIFEST_PATH, jobs=1, cache=None, link_mode="copy", sync_compare="mtime", sync_jobs=8, link_index=None, site_files=None, post_processor=None, fingerprinter=None, prober=None):
+    template_hash = hash_file(template_path)
+    old_manifest = load_manifest(manifest_path)
+    if old_manifest is None:
+        #without a manifest we can't tell which outputs are stale, so start clean
+        print("No build manifest found, doing a full build")
+        if os.path.exists(dest_path):
+            shutil.rmtree(dest_path)
+        old_manifest = new_manifest(None, None)
+    os.makedirs(dest_path, exist_ok=True)
+
+    manifest = new_manifest(template_hash, basepath)
+    rerender_all = old_manifest["basepath"] != basepath
+    #a page is only rendered again for a template change when its layout or one of the partials it includes changed
+    stale_templates, template_hashes = changed_templates(old_manifest["templates"])
+
+    #static files are compared against their outputs directly, see staticsync
+    copied, skipped, static_pairs, static_directories = sync_static(static_path, dest_path, link_mode, sync_compare, sync_jobs, fingerprinter)
+    for source_path, target_path in static_pairs:
+        manifest["static"][source_path] = {"output": target_path}
+    copied = len(copied)
+    use_static_files(static_path, static_pairs, dest_path, fingerprinter, prober)
+    record_static_files(manifest)
+    #only pages that link to an asset whose fingerprint or size changed have to be rendered again for it,
+    #turning image sizes on or off changes every page with an image
+    changed_static = changed_static_urls(old_manifest, manifest, basepath)
+    if (old_manifest.get("images") is None) != (manifest["images"] is None):
+        rerender_all = True
+    #so does turning minifying on or off, pages are only minified as they are written
+    record_post_processor(manifest, post_processor)
+    if old_manifest.get("minify", False) != manifest["minify"]:
+        rerender_all = True
+    if fingerprinter is None and old_manifest.get("assets"):
+        remove_output(os.path.join(dest_path, ASSET_MANIFEST), dest_path)
+    manifest["site_files"] = site_files is not None
+    if site_files is None and old_manifest.get("site_files"):
+        for name in SITE_FILES:
+            remove_output(os.path.join(dest_path, name), dest_path)
+
+    stale_pages = []
+    for source_path, target_path in list_pages(content_path, dest_path):
+        source_hash = hash_file(source_path)
+        old_entry = old_manifest["pages"].get(source_path)
+        #pages rendered without a summary, e.g. by serve, are rendered again when one is needed
+        summarized = site_files is None or (old_entry is not None and "terms" in old_entry)
+        if not rerender_all and summarized and entry_is_current(old_entry, source_hash, target_path) and not links_any(old_entry, changed_static) and not uses_any(old_entry, stale_templates):
+            #the links and summary of an unchanged page are the ones recorded when it was last rendered
+            manifest["pages"][source_path] = old_entry
+            continue
+        manifest["pages"][source_path] = {"hash": source_hash, "output": target_path}
+        stale_pages.append((source_path, target_path))
+    rendered = {}
+    failures = render_pages(basepath, stale_pages, template_path, jobs, cache, rendered, site_files is not None)
+    for source_path, page in rendered.items():
+        manifest["pages"][source_path].update(page)
+    #failed pages stay out of the manifest so the next build retries them,
+    #their last good output is kept like a full build keeps it
+    kept_outputs = []
+    for source_path, error in failures:
+        del manifest["pages"][source_path]
+        old_entry = old_manifest["pages"].get(source_path)
+        if old_entry is not None and os.path.exists(old_entry["output"]):
+            kept_outputs.append(old_entry["output"])
+    generated = len(stale_pages) - len(failures)
+
+    #outputs whose sources are gone get deleted, unless another source now owns them
+    current_outputs = set(kept_outputs)
+    for section in ("static", "pages"):
+        for entry in manifest[section].values():
+            current_outputs.add(entry["output"])
+    removed = 0
+    for section in ("static", "pages"):
+        for source_path, entry in old_manifest[section].items():
+            #a source that is still there may have a new output, e.g. a fingerprinted asset that changed
+            if entry["output"] in current_outputs:
+                continue
+            if log.verbose:
+                print(f"Removing {entry['output']}")
+            remove_output(entry["output"], dest_path)
+            removed += 1
+
+    record_templates(manifest, template_hashes)
+    save_manifest(manifest, manifest_path)
+    static_outputs = [entry["output"] for entry in manifest["static"].values()]
+    pages = [(entry["output"], entry) for entry in manifest["pages"].values()]
+    index_outputs(static_outputs, pages, link_index, site_files)
+    if post_processor is None and old_manifest.get("postprocess"):
+        #the .gz/.br siblings an earlier build wrote are removed by a processor that does nothing else
+        from postprocess import PostProcessor
+        post_processor = PostProcessor(state_path=old_manifest["postprocess"])
+    if post_processor is not None:
+        #pages that weren't rendered again were post-processed by an earlier build
+        fresh = set(target_path for source_path, target_path in stale_pages if source_path in manifest["pages"])
+        current = [output_path for output_path, entry in pages if output_path not in fresh] + kept_outputs
+        post_processor.run(sorted(fresh), static_outputs + site_outputs(site_files) + asset_outputs(fingerprinter, dest_path), current)
+    print(f"Incremental build: {generated} pages generated, {copied} files copied, {removed} outputs removed")
+    return failures
+
+def build_full(basepath, static_path, content_path, template_path, dest_path, jobs=1, cache=None, link_mode="copy", sync_compare="mtime", sync_jobs=8, link_index=None, pipeline=False, io_workers=16, queue_size=64, site_files=None, post_processor=None, fingerprinter=None, prober=None):
+    #unchanged static files are left alone instead of wiping dest_path, then anything that
+    #isn't a static file or a page output is pruned so the result matches a clean build
+    copied, skipped, static_pairs, static_directories = sync_static(static_path, dest_path, link_mode, sync_compare, sync_jobs, fingerprinter)
+    use_static_files(static_path, static_pairs, dest_path, fingerprinter, prober)
+    summarize = site_files is not None
+    rendered = {} if link_index is not None or summarize else None
+    page_directories = list_static(content_path, dest_path)[1]
+    if pipeline:
+        #pages are found, read, rendered and written concurrently, see pipeline
+        from pipeline import run_pipeline
+        pages, failures = run_pipeline(basepath, content_path, template_path, dest_path, io_workers, queue_size, jobs, cache, rendered, summarize)
+    else:
+        #serial builds go through render_pages too, so one bad page doesn't stop the rest;
+        #every content directory gets a target directory, empty ones included, as in the pipeline
+        for directory in page_directories:
+            os.makedirs(directory, exist_ok=True)
+        pages = list(list_pages(content_path, dest_path))
+        failures = render_pages(basepath, pages, template_path, jobs, cache, rendered, summarize)
+    keep_files = [target_path for source_path, target_path in static_pairs + pages] + site_outputs(site_files) + asset_outputs(fingerprinter, dest_path)
+    if post_processor is not None:
+        keep_files += post_processor.siblings(keep_files)
+    keep_directories = static_directories + page_directories
+    prune_outputs(dest_path, keep_files, keep_directories)
+    if rendered is not None:
+        static_outputs = [target_path for source_path, target_path in static_pairs]
+        rendered_pages = [(target_path, rendered[source_path]) for source_path, target_path in pages if source_path in rendered]
+        index_outputs(static_outputs, rendered_pages, link_index, site_files)
+    if post_processor is not None:
+        post_processor.run([target_path for source_path, target_path in pages], [target_path for source_path, target_path in static_pairs] + site_outputs(site_files) + asset_outputs(fingerprinter, dest_path))
+    return failures
+
+def build_shard(basepath, content_path, template_path, dest_path, shard_dir, index, count, jobs=1, cache=None, summarize=False, static_path=None, fingerprinter=None, prober=None):
+    #renders this shard's share of the pages into its own root, next to a manifest for merge_shards;
+    #static files are left to the merge so they are copied once
+    root = shard_root(shard_dir, index, count)
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    shard_dest = os.path.join(root, "docs")
+    pages = list(list_pages(content_path, dest_path))
+    pages = partition_pages(pages, content_path, count)[index - 1]
+    shard_pages = [(source_path, os.path.join(shard_dest, os.path.relpath(target_path, dest_path))) for source_path, target_path in pages]
+    #the static files are only hashed and probed here, the merge copies them under the same names
+    static_pairs = list_static(static_path, dest_path)[0] if static_path is not None else []
+    if fingerprinter is not None:
+        static_pairs = fingerprinter.rename(static_pairs, dest_path)
+    use_static_files(static_path, static_pairs, None, fingerprinter, prober)
+    rendered = {}
+    failures = render_pages(basepath, shard_pages, template_path, jobs, cache, rendered, summarize)
+
+    manifest = new_manifest(hash_file(template_path), basepath)
+    manifest["shard"] = [index, count]
+    record_static_files(manifest)
+    for source_path, target_path in pages:
+        if source_path in rendered:
+            #outputs are recorded where they end up after the merge
+            manifest["pages"][source_path] = {"hash": hash_file(source_path), "output": target_path, **rendered[source_path]}
+    record_templates(manifest)
+    save_manifest(manifest, os.path.join(root, "manifest.json"))
+    print(f"Shard {index}/{count}: {len(rendered)} of {len(pages)} pages generated into {shard_dest}")
+    return failures
+
+def merge_shards(basepath, static_path, content_path, template_path, dest_path, shard_dir, count, manifest_path=MANIFEST_PATH, link_mode="copy", sync_compare="mtime", sync_jobs=8, link_index=None, site_files=None, post_processor=None, fingerprinter=None, prober=None):
+    #moves the pages of every shard into dest_path, copies the static files and writes the build manifest,
+    #so the result is the same as a full build and later --incremental builds can start from it
+    template_hash = hash_file(template_path)
+    manifest = new_manifest(template_hash, basepath)
+    shard_manifests = []
+    for index in range(1, count + 1):
+        root = shard_root(shard_dir, index, count)
+        shard_manifest = load_manifest(os.path.join(root, "manifest.json"))
+        if shard_manifest is None or shard_manifest.get("shard") != [index, count]:
+            raise Exception(f"Error: No build of shard {index}/{count} found in {root}")
+        #only the layouts and partials the shard's own pages use have to be the same
+        if changed_templates(shard_manifest["templates"])[0] or shard_manifest["basepath"] != basepath:
+            raise Exception(f"Error: Shard {index}/{count} was built with a different template or basepath")
+        if site_files is not None and any("terms" not in entry for entry in shard_manifest["pages"].values()):
+            raise Exception(f"Error: Shard {index}/{count} has no page summaries, build the shards with --site-url too")
+        shard_manifests.append((root, shard_manifest))
+
+    copied, skipped, static_pairs, static_directories = sync_static(static_path, dest_path, link_mode, sync_compare, sync_jobs, fingerprinter)
+    for source_path, target_path in static_pairs:
+        manifest["static"][source_path] = {"output": target_path}
+    use_static_files(static_path, static_pairs, dest_path, fingerprinter, prober)
+    record_static_files(manifest)
+    record_post_processor(manifest, post_processor)
+    manifest["site_files"] = site_files is not None
+    for index, (root, shard_manifest) in enumerate(shard_manifests, 1):
+        if shard_manifest.get("assets", {}) != manifest["assets"] or shard_manifest.get("images") != manifest["images"]:
+            raise Exception(f"Error: Shard {index}/{count} was built with different static files or without the same --fingerprint and --image-sizes")
+    for root, shard_manifest in shard_manifests:
+        for source_path, entry in shard_manifest["pages"].items():
+            shard_output = os.path.join(root, "docs", os.path.relpath(entry["output"], dest_path))
+            os.makedirs(os.path.dirname(entry["output"]), exist_ok=True)
+            shutil.move(shard_output, entry["output"])
+            manifest["pages"][source_path] = entry
+        shutil.rmtree(root)
+
+    #pages no shard rendered, e.g. because they failed there, fail the merge too
+    pages = list(list_pages(content_path, dest_path))
+    failures = [(source_path, "not rendered by any shard") for source_path, target_path in pages if source_path not in manifest["pages"]]
+    static_outputs = [target_path for source_path, target_path in static_pairs]
+    page_outputs = [entry["output"] for entry in manifest["pages"].values()]
+    keep_files = static_outputs + page_outputs + site_outputs(site_files) + asset_outputs(fingerprinter, dest_path)
+    if post_processor is not None:
+        keep_files += post_processor.siblings(keep_files)
+    prune_outputs(dest_path, keep_files, static_directories + list_static(content_path, dest_path)[1])
+    record_templates(manifest)
+    save_manifest(manifest, manifest_path)
+
+    index_outputs(static_outputs, [(entry["output"], entry) for entry in manifest["pages"].values()], link_index, site_files)
+    if post_processor is not None:
+        post_processor.run(page_outputs, static_outputs + site_outputs(site_files) + asset_outputs(fingerprinter, dest_path))
+    print(f"Merged {len(manifest['pages'])} pages from {count} shards, {len(copied)} files copied")
+    return failures
+
+def build_profiled(basepath, static_path, content_path, template_path, dest_path, top=10, json_path=None):
+    #a serial full build, timed through hooks on the functions it calls so the profile can't drift from it, see profiler
+    from profiler import BuildProfiler
+    profiler = BuildProfiler()
+    profiler.hook(sys.modules[__name__], "sync_static", "static copy")
+    profiler.hook_render_path()
+    try:
+        failures = build_full(basepath, static_path, content_path, template_path, dest_path)
+    finally:
+        profiler.unhook()
+    print(profiler.report(top))
+    if json_path is not None:
+        profiler.dump(json_path)
+        print(f"Wrote profile to {json_path}")
+    return failures
+
+def add_static_arguments(parser):
+    parser.add_argument("--link-mode", choices=LINK_MODES, default="copy", help="how static files get into ./docs, auto tries a reflink and falls back to copying")
+    parser.add_argument("--sync-compare", choices=COMPARE_MODES, default="mtime", help="how unchanged static files are detected")
+    parser.add_argument("--sync-jobs", type=int, default=8, help="threads used to copy static files")
+
+def static_options(args):
+    return {"link_mode": args.link_mode, "sync_compare": args.sync_compare, "sync_jobs": args.sync_jobs}
+
+def add_pipeline_arguments(parser):
+    parser.add_argument("--pipeline", action="store_true", help="overlap page reads, rendering and writes, for slow or network filesystems")
+    parser.add_argument("--io-workers", type=int, default=16, help="reads and writes the pipeline keeps in flight, each")
+    parser.add_argument("--queue-size", type=int, default=64, help="pages each pipeline stage can queue before the one feeding it waits")
+
+def pipeline_options(args):
+    return {"pipeline": args.pipeline, "io_workers": args.io_workers, "queue_size": args.queue_size}
+
+def add_site_arguments(parser):
+    parser.add_argument("--site-url", help="also write sitemap.xml, feed.xml and search-index.json, with absolute links on this url, e.g. https://example.github.io")
+    parser.add_argument("--feed-section", default="blog", help="pages below this content directory go in feed.xml")
+
+def make_site_files(args, basepath, dest_path="./docs"):
+    if getattr(args, "site_url", None) is None:
+        return None
+    return SiteFiles(dest_path, basepath, args.site_url, args.feed_section)
+
+def add_postprocess_arguments(parser):
+    parser.add_argument("--minify", action="store_true", help="strip whitespace that doesn't render from generated pages, <pre> and <code> are left alone")
+    parser.add_argument("--compress", action="store_true", help="write .gz siblings, and .br when brotli is installed, next to html, css and other text outputs")
+    parser.add_argument("--compress-jobs", type=int, default=8, help="threads used to minify and compress outputs")
+
+def make_post_processor(args):
+    if not getattr(args, "minify", False) and not getattr(args, "compress", False):
+        return None
+    from postprocess import PostProcessor
+    return PostProcessor(args.minify, args.compress, args.compress_jobs)
+
+def add_cache_arguments(parser):
+    parser.add_argument("--no-block-cache", action="store_true", help="render every block even if an identical one was already rendered")
+    parser.add_argument("--block-cache-size", type=int, default=64, help="block cache size limit in MB")
+    parser.add_argument("--persist-block-cache", action="store_true", help=f"keep rendered blocks in {BLOCK_CACHE_PATH} between builds")
+    parser.add_argument("--no-highlight", action="store_true", help="leave code blocks with a language as plain text instead of highlighting them")
+    parser.add_argument("--quiet", "-q", action="store_true", help="don't log every copied file and generated page")
+
+def make_block_cache(args):
+    if args.no_block_cache:
+        return None
+    path = BLOCK_CACHE_PATH if args.persist_block_cache else None
+    return BlockCache(args.block_cache_size * 1024 * 1024, path)
+
+def finish_block_cache(cache):
+    if cache is None:
+        return
+    cache.save()
+    print(cache.report())
+
+def make_fingerprinter(args):
+    if not getattr(args, "fingerprint", False):
+        return None
+    return Fingerprinter()
+
+def finish_fingerprints(fingerprinter):
+    if fingerprinter is None:
+        return
+    fingerprinter.save()
+    print(fingerprinter.report())
+
+def make_prober(args):
+    if not getattr(args, "image_sizes", False):
+        return None
+    from imagesize import ImageProber
+    return ImageProber()
+
+def finish_prober(prober):
+    if prober is None:
+        return
+    prober.save()
+    print(prober.report())
+
+def make_highlighter(args):
+    #highlighted code only depends on the code and its language, so it is always kept between builds
+    return Highlighter(HIGHLIGHT_CACHE_PATH, not args.no_highlight)
+
+def finish_highlighter():
+    highlight.highlighter.save()
+    report = highlight.highlighter.report()
+    if report is not None:
+        print(report)
+
+def parse_args(argv):
+    if argv[:1] == ["scan"]:
+        parser = argparse.ArgumentParser(prog="main.py scan", description="Print the front matter and title of every page as JSON lines, without rendering")
+        parser.add_argument("content", nargs="?", default="./content")
+        args = parser.parse_args(argv[1:])
+        args.command = "scan"
+        return args
+    if argv[:1] == ["lint"]:
+        parser = argparse.ArgumentParser(prog="main.py lint", description="Check every page for errors that would fail the build, without writing anything")
+        parser.add_argument("content", nargs="?", default="./content")
+        parser.add_argument("--template", default="./template.html", help="template the layouts and partials pages use are looked up next to")
+        parser.add_argument("--jobs", "-j", type=int, default=0, help="check pages across N worker processes (0 uses every core)")
+        args = parser.parse_args(argv[1:])
+        args.command = "lint"
+        return args
+    if argv[:1] == ["daemon"]:
+        parser = argparse.ArgumentParser(prog="main.py daemon", description="Render markdown documents sent as line-delimited JSON, see daemon")
+        parser.add_argument("basepath", nargs="?", default="/")
+        parser.add_argument("--socket", help="listen on this unix socket instead of reading stdin")
+        parser.add_argument("--template", default="./template.html")
+        add_cache_arguments(parser)
+        args = parser.parse_args(argv[1:])
+        args.command = "daemon"
+        return args
+    if argv[:1] == ["serve"]:
+        parser = argparse.ArgumentParser(prog="main.py serve", description="Build ./docs incrementally and serve it")
+        parser.add_argument("basepath", nargs="?", default="/")
+        parser.add_argument("--watch", action="store_true", help="rebuild changed pages and assets while serving")
+        parser.add_argument("--port", type=int, default=8888)
+        parser.add_argument("--interval", type=float, default=0.05, help="seconds between polls of the watched files")
+        parser.add_argument("--jobs", "-j", type=int, default=1, help="render pages across N worker processes (0 uses every core)")
+        add_cache_arguments(parser)
+        add_static_arguments(parser)
+        args = parser.parse_args(argv[1:])
+        args.command = "serve"
+        return args
+    parser = argparse.ArgumentParser(description="Build the static site from ./content and ./static into ./docs")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--incremental", action="store_true", help="only rebuild outputs whose inputs changed since the last build")
+    parser.add_argument("--shard", help="only render shard i of N into its own directory, e.g. --shard 2/4; run --merge N afterwards")
+    parser.add_argument("--merge", type=int, metavar="N", help="combine the output of shards 1/N to N/N into ./docs and copy the static files")
+    parser.add_argument("--shard-dir", default=SHARD_DIR, help="where shards write their output and the merge reads it")
+    parser.add_argument("--check-links", action="store_true", help="fail the build if a page links to a page or asset that wasn't generated")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="render pages across N worker processes (0 uses every core)")
+    parser.add_argument("--fingerprint", action="store_true", help=f"write css, js, images and fonts as name.<hash>.ext, rewrite links to them and list them in ./docs/{ASSET_MANIFEST}")
+    parser.add_argument("--image-sizes", action="store_true", help="give images from ./static their width and height, and loading=lazy, read from the image headers")
+    parser.add_argument("--atomic", action="store_true", help="build into a new directory and swap it in for ./docs when done, pages that fail keep their last output")
+    add_cache_arguments(parser)
+    add_static_arguments(parser)
+    add_pipeline_arguments(parser)
+    add_site_arguments(parser)
+    add_postprocess_arguments(parser)
+    parser.add_argument("--profile", action="store_true", help="do a full serial build and report time and allocations per stage")
+    parser.add_argument("--profile-top", type=int, default=10, help="how many of the slowest pages to list")
+    parser.add_argument("--profile-json", help="also write the profile to this file as JSON")
+    args = parser.parse_args(argv)
+    args.command = "build"
+    return args
 
 def main():
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+    args = parse_args(sys.argv[1:])
+    if args.command == "scan":
+        failures = scan_site(args.content)
+        if failures:
+            sys.exit(1)
+        return
+    if args.command == "lint":
+        from lint import lint_site
+        if lint_site(args.content, args.jobs, args.template):
+            sys.exit(1)
+        return
+    basepath = args.basepath
     if not basepath.startswith("/"):
         basepath = "/" + basepath
     if not basepath.endswith("/"):
         basepath = basepath + "/"
 
+    if args.command == "daemon":
+        from daemon import RenderDaemon, serve_daemon
+        #highlighted code is cached in memory only, the daemon never writes anything
+        highlight.use_highlighter(Highlighter(None, not args.no_highlight))
+        serve_daemon(RenderDaemon(basepath, args.template, make_block_cache(args)), args.socket)
+        return
+
     os.makedirs("./docs", exist_ok=True)
 
     if not os.path.exists("./static"):
@@ -71,8 +563,81 @@ def main():
     if not os.path.exists("./content"):
         raise Exception("Error: No content directory found in this directory")
 
-    copy_static_to_docs("./static", "./docs", first_call=True)
-    generate_pages_recursive(basepath, "./content", "./template.html", "./docs")
+    log.set_verbose(not args.quiet)
+    cache = make_block_cache(args)
+    highlight.use_highlighter(make_highlighter(args))
+    atomic = getattr(args, "atomic", False)
+    if atomic and (args.incremental or args.shard is not None or args.merge is not None or args.profile):
+        raise Exception("Error: --atomic only works with full builds")
+    dest_path = build_directory("./docs") if atomic else "./docs"
+    if atomic and os.path.exists(dest_path):
+        shutil.rmtree(dest_path)
+    link_index = None
+    if getattr(args, "check_links", False):
+        from linkindex import LinkIndex
+        link_index = LinkIndex(dest_path, basepath)
+    site_files = make_site_files(args, basepath, dest_path)
+    post_processor = make_post_processor(args)
+    fingerprinter = make_fingerprinter(args)
+    prober = make_prober(args)
+    if args.command == "serve":
+        from serve import serve_site
+        build_incremental(basepath, "./static", "./content", "./template.html", "./docs", jobs=args.jobs, cache=cache, **static_options(args))
+        finish_block_cache(cache)
+        finish_highlighter()
+        serve_site(basepath, "./static", "./content", "./template.html", "./docs", MANIFEST_PATH, args.port, args.watch, args.interval, cache, args.link_mode)
+        return
+
+    if args.shard is not None:
+        index, count = parse_shard(args.shard)
+        failures = build_shard(basepath, "./content", "./template.html", "./docs", args.shard_dir, index, count, args.jobs, cache, site_files is not None, "./static", fingerprinter, prober)
+        finish_block_cache(cache)
+        finish_highlighter()
+        finish_fingerprints(fingerprinter)
+        finish_prober(prober)
+        report_failures(failures)
+        return
+
+    if args.merge is not None:
+        failures = merge_shards(basepath, "./static", "./content", "./template.html", "./docs", args.shard_dir, args.merge, link_index=link_index, site_files=site_files, post_processor=post_processor, fingerprinter=fingerprinter, prober=prober, **static_options(args))
+        finish_fingerprints(fingerprinter)
+        finish_prober(prober)
+        report_failures(failures)
+        report_broken_links(link_index)
+        return
+
+    if args.incremental:
+        failures = build_incremental(basepath, "./static", "./content", "./template.html", "./docs", jobs=args.jobs, cache=cache, link_index=link_index, site_files=site_files, post_processor=post_processor, fingerprinter=fingerprinter, prober=prober, **static_options(args))
+        finish_block_cache(cache)
+        finish_highlighter()
+        finish_fingerprints(fingerprinter)
+        finish_prober(prober)
+        report_failures(failures)
+        report_broken_links(link_index)
+        return
+
+    if args.profile:
+        #per-file logging would show up in the timings, and the cache would hide the work being measured
+        log.set_verbose(False)
+        highlight.use_highlighter(Highlighter(None, not args.no_highlight))
+        if os.path.exists(MANIFEST_PATH):
+            os.remove(MANIFEST_PATH)
+        failures = build_profiled(basepath, "./static", "./content", "./template.html", "./docs", args.profile_top, args.profile_json)
+        report_failures(failures)
+        return
+
+    #a full build doesn't track hashes, so any older manifest no longer describes ./docs
+    if os.path.exists(MANIFEST_PATH):
+        os.remove(MANIFEST_PATH)
+    failures = build_full(basepath, "./static", "./content", "./template.html", dest_path, args.jobs, cache, link_index=link_index, site_files=site_files, post_processor=post_processor, fingerprinter=fingerprinter, prober=prober, **static_options(args), **pipeline_options(args))
+    if atomic:
+        swap_in(dest_path, "./docs", "./content", failures)
+    finish_block_cache(cache)
+    finish_highlighter()
+    finish_fingerprints(fingerprinter)
+    finish_prober(prober)
+    report_failures(failures)
+    report_broken_links(link_index)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,156 @@
+import os
+import json
+import hashlib
+
+MANIFEST_VERSION = 3
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_json(path):
+    #None when there is no file at path or it isn't JSON
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_atomic(path, chunks, mode="w"):
+    #through a temp file of its own, so builds sharing a directory, e.g. shards running at once,
+    #never write into each other's temp file, and readers never see a half written file
+    #tempfile takes longer to import than most builds spend saving, so it is only imported here
+    import tempfile
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else "utf-8") as f:
+            f.writelines(chunks)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def write_json(path, data, **options):
+    write_atomic(path, [json.dumps(data, **options)])
+
+class StampCache:
+    #a value computed from each file, e.g. its hash, kept in a JSON file at path and reused
+    #for as long as the file keeps its size and mtime
+    def __init__(self, path):
+        self.path = path
+        self.entries = None
+        self.changed = False
+        self.computed = 0
+        self.reused = 0
+
+    def read_disk(self):
+        data = read_json(self.path)
+        return data if isinstance(data, dict) else {}
+
+    def load(self):
+        if self.entries is None:
+            self.entries = self.read_disk()
+        return self.entries
+
+    def get(self, source_path, compute):
+        stat = os.stat(source_path)
+        cached = self.load().get(source_path)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            self.reused += 1
+            return cached[2]
+        value = compute(source_path)
+        self.entries[source_path] = [stat.st_size, stat.st_mtime_ns, value]
+        self.changed = True
+        self.computed += 1
+        return value
+
+    def save(self):
+        #entries for files that are gone are dropped, so the cache doesn't grow forever
+        if self.path is None or self.entries is None:
+            return
+        live = {path: entry for path, entry in self.entries.items() if os.path.exists(path)}
+        if not self.changed and len(live) == len(self.entries):
+            return
+        #other builds sharing the cache, e.g. shards running at once, may have saved since it was loaded
+        for path, entry in self.read_disk().items():
+            if path not in live and os.path.exists(path):
+                live[path] = entry
+        write_json(self.path, live, indent=1, sort_keys=True)
+        self.entries = live
+        self.changed = False
+
+def new_manifest(template_hash, basepath):
+    return {
+        "version": MANIFEST_VERSION,
+        "template": template_hash,
+        "basepath": basepath,
+        "pages": {},
+        "static": {},
+        #hash of every layout and partial a page was rendered with, pages list theirs under "templates"
+        "templates": {},
+    }
+
+def load_manifest(path):
+    #a missing or unreadable manifest just means the next build is a full one
+    manifest = read_json(path)
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def save_manifest(manifest, path):
+    write_json(path, manifest, indent=1, sort_keys=True)
+
+def entry_is_current(old_entry, source_hash, output_path):
+    if old_entry is None:
+        return False
+    if old_entry.get("hash") != source_hash or old_entry.get("output") != output_path:
+        return False
+    return os.path.exists(output_path)
+
+def changed_templates(old_templates):
+    #(the layouts and partials that changed or are gone since old_templates was recorded, hashes of the others)
+    changed = set()
+    hashes = {}
+    for path, old_hash in old_templates.items():
+        new_hash = hash_file(path) if os.path.isfile(path) else None
+        if new_hash != old_hash:
+            changed.add(path)
+        if new_hash is not None:
+            hashes[path] = new_hash
+    return changed, hashes
+
+def record_templates(manifest, hashes=None):
+    #keeps the hashes of the layouts and partials the manifest's pages still use, hashing new ones
+    hashes = hashes or {}
+    templates = {}
+    for entry in manifest["pages"].values():
+        for path in entry.get("templates", ()):
+            if path not in templates:
+                templates[path] = hashes[path] if path in hashes else hash_file(path)
+    manifest["templates"] = templates
+
+def uses_any(entry, paths):
+    return any(path in paths for path in entry.get("templates", ()))
+
+def remove_output(output_path, stop_directory):
+    if os.path.isfile(output_path):
+        os.remove(output_path)
+    #clean up directories that only existed for the removed output
+    directory = os.path.dirname(output_path)
+    stop_directory = os.path.normpath(stop_directory)
+    while os.path.normpath(directory) != stop_directory and os.path.isdir(directory):
+        if os.listdir(directory):
+            break
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
@@ -0,0 +1,110 @@
+import os
+import log
+from render import render_page, render_html
+from layout import Layouts
+from template import use_assets, current_assets, use_image_sizes, current_image_sizes
+from blockcache import BlockCache
+import highlight
+
+#set once per worker process so the template isn't shipped with every page
+_worker_state = {}
+
+def _init_worker(basepath, template, cache=None, cache_settings=None, summarize=False, highlight_settings=None, assets=None, image_sizes=None):
+    _worker_state["basepath"] = basepath
+    _worker_state["template"] = template
+    _worker_state["summarize"] = summarize
+    #worker processes get their own cache built from the parent's settings
+    if cache is None and cache_settings is not None:
+        cache = BlockCache(*cache_settings)
+    _worker_state["cache"] = cache
+    #pools always pass the highlight settings, a build in this process passes none and uses the parent's highlighter
+    _worker_state["worker"] = highlight_settings is not None
+    if highlight_settings is not None:
+        highlight.use_highlighter(highlight.Highlighter(*highlight_settings))
+    #pools pass the parent's asset map and image sizes, a build in this process already has them
+    if assets is not None:
+        use_assets(assets)
+        use_image_sizes(image_sizes)
+
+def _cache_work(cache, before):
+    #the cache work for one page, sent back so the parent can report it and persist new fragments
+    if cache is None or not _worker_state["worker"]:
+        return None
+    after = cache.counters()
+    counters = {key: after[key] - before[key] for key in after}
+    new_entries = cache.new_entries
+    cache.new_entries = {}
+    return counters, new_entries
+
+def _highlight_work():
+    return highlight.highlighter.take_work() if _worker_state["worker"] else None
+
+def _render_job(job):
+    source_path, target_path = job
+    cache = _worker_state["cache"]
+    error = None
+    page = None
+    before = cache.counters() if cache is not None else None
+    try:
+        page = render_page(_worker_state["basepath"], source_path, _worker_state["template"], target_path, cache, _worker_state["summarize"])
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return source_path, target_path, error, page, _cache_work(cache, before), _highlight_work()
+
+def _render_text_job(job):
+    #renders markdown that was already read, the caller writes the html
+    source_path, markdown = job
+    cache = _worker_state["cache"]
+    error = None
+    html = page = None
+    before = cache.counters() if cache is not None else None
+    try:
+        html, page = render_html(_worker_state["basepath"], source_path, markdown, _worker_state["template"], cache, _worker_state["summarize"])
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return html, page, error, _cache_work(cache, before), _highlight_work()
+
+def resolve_jobs(jobs):
+    if jobs is None or jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+def render_pages(basepath, pages, template_path, jobs, cache=None, rendered=None, summarize=False):
+    #renders every (source, target) pair and returns the failures instead of stopping at the first one,
+    #rendered maps each rendered source to what render_page returned for it when given
+    #the default template is compiled up front, layouts pages pick are compiled by whichever process renders them first
+    layouts = Layouts(template_path, basepath)
+    layouts.get()
+    jobs = resolve_jobs(jobs)
+    failures = []
+
+    if jobs == 1 or len(pages) < 2:
+        _init_worker(basepath, layouts, cache, None, summarize)
+        results = map(_render_job, pages)
+        _report(results, template_path, failures, cache, rendered)
+        return failures
+
+    #a few batches per worker keeps the pool busy without paying pickling costs per page;
+    #the pool is only imported here so serial builds and the daemon don't pay for it
+    from concurrent.futures import ProcessPoolExecutor
+    chunksize = max(1, len(pages) // (jobs * 4))
+    cache_settings = (cache.max_bytes, cache.path) if cache is not None else None
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(basepath, layouts, None, cache_settings, summarize, highlight.highlighter.settings(), current_assets(), current_image_sizes())) as executor:
+        results = executor.map(_render_job, pages, chunksize=chunksize)
+        _report(results, template_path, failures, cache, rendered)
+    return failures
+
+def _report(results, template_path, failures, cache, rendered=None):
+    for source_path, target_path, error, page, cache_work, highlight_work in results:
+        if cache_work is not None:
+            cache.merge(*cache_work)
+        if highlight_work is not None:
+            highlight.highlighter.merge(*highlight_work)
+        if error is None:
+            if rendered is not None:
+                rendered[source_path] = page
+            if log.verbose:
+                print(f"Generating page from {source_path} to {target_path} using {template_path}")
+        else:
+            print(f"Error generating page from {source_path}: {error}")
+            failures.append((source_path, error))
@@ -0,0 +1,160 @@
+import os
+import log
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from layout import Layouts
+from template import current_assets, current_image_sizes
+import highlight
+from parallel import _init_worker, _render_text_job, resolve_jobs
+
+#walker -> readers -> renderers -> writers, connected by bounded queues: a slow stage makes the
+#ones before it wait on a full queue, so pages in flight never grow past a few queues' worth
+DONE = None
+
+def scan_directory(path):
+    with os.scandir(path) as entries:
+        return [(entry.name, entry.path, entry.is_dir()) for entry in entries]
+
+def make_directory(path):
+    os.makedirs(path, exist_ok=True)
+
+def read_text(path):
+    with open(path) as f:
+        return f.read()
+
+def write_text(path, text):
+    make_directory(os.path.dirname(path))
+    with open(path, "w") as f:
+        f.write(text)
+
+class PagePipeline:
+    def __init__(self, basepath, template_path, io_workers=16, queue_size=64, jobs=1, cache=None, rendered=None, summarize=False):
+        self.basepath = basepath
+        self.template_path = template_path
+        self.io_workers = max(1, io_workers)
+        self.queue_size = max(1, queue_size)
+        self.jobs = resolve_jobs(jobs)
+        self.cache = cache
+        self.rendered = rendered
+        self.summarize = summarize
+        self.pages = []
+        self.failures = []
+
+    async def io(self, function, *args):
+        return await self.loop.run_in_executor(self.io_executor, function, *args)
+
+    async def walk(self, source_directory, target_directory):
+        #target directories are created for every content directory, like a serial build keeps them
+        await self.io(make_directory, target_directory)
+        for name, source_path, is_dir in await self.io(scan_directory, source_directory):
+            target_path = os.path.join(target_directory, name)
+            if is_dir:
+                await self.walk(source_path, target_path)
+            elif name.lower().endswith(".md"):
+                page = (source_path, target_path[:-3] + ".html")
+                self.pages.append(page)
+                await self.read_queue.put(page)
+
+    async def read(self):
+        while True:
+            page = await self.read_queue.get()
+            if page is DONE:
+                break
+            try:
+                markdown = await self.io(read_text, page[0])
+            except (OSError, UnicodeDecodeError) as e:
+                self.fail(page[0], f"{type(e).__name__}: {e}")
+                continue
+            await self.render_queue.put((page, markdown))
+
+    async def render(self):
+        while True:
+            item = await self.render_queue.get()
+            if item is DONE:
+                break
+            page, markdown = item
+            job = (page[0], markdown)
+            if self.render_executor is None:
+                html, rendered, error, cache_work, highlight_work = _render_text_job(job)
+            else:
+                html, rendered, error, cache_work, highlight_work = await self.loop.run_in_executor(self.render_executor, _render_text_job, job)
+            if cache_work is not None:
+                self.cache.merge(*cache_work)
+            if highlight_work is not None:
+                highlight.highlighter.merge(*highlight_work)
+            if error is not None:
+                self.fail(page[0], error)
+                continue
+            if self.rendered is not None:
+                self.rendered[page[0]] = rendered
+            await self.write_queue.put((page, html))
+
+    async def write(self):
+        while True:
+            item = await self.write_queue.get()
+            if item is DONE:
+                break
+            (source_path, target_path), html = item
+            try:
+                await self.io(write_text, target_path, html)
+            except OSError as e:
+                self.fail(source_path, f"{type(e).__name__}: {e}")
+                continue
+            if log.verbose:
+                print(f"Generating page from {source_path} to {target_path} using {self.template_path}")
+
+    def fail(self, source_path, error):
+        print(f"Error generating page from {source_path}: {error}")
+        self.failures.append((source_path, error))
+
+    async def finish(self, tasks, queue, count):
+        #each worker stops at the first DONE it takes off its queue
+        for _ in range(count):
+            await queue.put(DONE)
+        await asyncio.gather(*tasks)
+
+    async def feed(self, content_path, dest_path, readers, rendering, writers):
+        await self.walk(content_path, dest_path)
+        await self.finish(readers, self.read_queue, len(readers))
+        await self.finish(rendering, self.render_queue, len(rendering))
+        await self.finish(writers, self.write_queue, len(writers))
+
+    async def run(self, content_path, dest_path):
+        self.loop = asyncio.get_running_loop()
+        self.read_queue = asyncio.Queue(self.queue_size)
+        self.render_queue = asyncio.Queue(self.queue_size)
+        self.write_queue = asyncio.Queue(self.queue_size)
+        layouts = Layouts(self.template_path, self.basepath)
+        layouts.get()
+        renderers = self.jobs
+        if self.jobs == 1:
+            #rendering is CPU bound, so a single renderer runs on the loop while the threads do the I/O
+            _init_worker(self.basepath, layouts, self.cache, None, self.summarize)
+            self.render_executor = None
+        else:
+            cache_settings = (self.cache.max_bytes, self.cache.path) if self.cache is not None else None
+            self.render_executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker, initargs=(self.basepath, layouts, None, cache_settings, self.summarize, highlight.highlighter.settings(), current_assets(), current_image_sizes()))
+        self.io_executor = ThreadPoolExecutor(max_workers=self.io_workers * 2)
+        try:
+            readers = [asyncio.create_task(self.read()) for _ in range(self.io_workers)]
+            rendering = [asyncio.create_task(self.render()) for _ in range(renderers)]
+            writers = [asyncio.create_task(self.write()) for _ in range(self.io_workers)]
+            tasks = [asyncio.create_task(self.feed(content_path, dest_path, readers, rendering, writers))] + readers + rendering + writers
+            #a stage that dies on something unexpected would leave the others waiting on its queues forever,
+            #so the first exception cancels every stage and is raised from here
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in done:
+                task.result()
+        finally:
+            self.io_executor.shutdown()
+            if self.render_executor is not None:
+                self.render_executor.shutdown()
+        return self.pages, self.failures
+
+def run_pipeline(basepath, content_path, template_path, dest_path, io_workers=16, queue_size=64, jobs=1, cache=None, rendered=None, summarize=False):
+    #returns every (source, target) page found and the ones that failed
+    pipeline = PagePipeline(basepath, template_path, io_workers, queue_size, jobs, cache, rendered, summarize)
+    return asyncio.run(pipeline.run(content_path, dest_path))
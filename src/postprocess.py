@@ -0,0 +1,163 @@
+import os
+import re
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from manifest import hash_bytes, read_json, write_json, write_atomic
+
+#brotli is optional, without it only .gz siblings are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+POSTPROCESS_PATH = "./.ssg-cache/postprocess.json"
+POSTPROCESS_VERSION = 2
+COMPRESS_EXTENSIONS = (".html", ".css", ".js", ".svg", ".xml", ".json")
+
+#contents of these are copied as they are, whitespace inside them matters
+PROTECTED_PATTERN = re.compile(r"<(pre|code|textarea|script|style)\b.*?</\1\s*>", re.S | re.I)
+TOKEN_PATTERN = re.compile(r"(<!--.*?-->|</?[a-zA-Z!][^>]*>)", re.S)
+WHITESPACE_PATTERN = re.compile(r"[ \t\r\n\f]+")
+#whitespace next to these never renders, so it can go entirely
+BLOCK_TAG_PATTERN = re.compile(r"</?(!doctype|html|head|body|title|meta|link|base|article|aside|header|footer|nav|main|section|div|p|ul|ol|li|h[1-6]|blockquote|pre|hr|br|table|thead|tbody|tr|td|th|script|style)\b", re.I)
+
+def minify_html(html):
+    parts = []
+    position = 0
+    for match in PROTECTED_PATTERN.finditer(html):
+        parts.append(minify_fragment(html[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(minify_fragment(html[position:]))
+    return "".join(parts)
+
+def minify_fragment(html):
+    #split gives text, tag, text, ..., text; tags are kept as written, except comments
+    tokens = TOKEN_PATTERN.split(html)
+    for i in range(1, len(tokens), 2):
+        if tokens[i].startswith("<!--") and not tokens[i].startswith("<!--["):
+            tokens[i] = ""
+    for i in range(0, len(tokens), 2):
+        text = WHITESPACE_PATTERN.sub(" ", tokens[i])
+        if i > 0 and BLOCK_TAG_PATTERN.match(tokens[i - 1]):
+            text = text.lstrip(" ")
+        if i + 1 < len(tokens) and BLOCK_TAG_PATTERN.match(tokens[i + 1]):
+            text = text.rstrip(" ")
+        tokens[i] = text
+    return "".join(tokens)
+
+def compressed_siblings(path):
+    siblings = [path + ".gz"]
+    if brotli is not None:
+        siblings.append(path + ".br")
+    return siblings
+
+def process_output(path, minify, compress, old_hash):
+    #returns (path, hash of the final content, whether the file was minified, whether it was compressed)
+    with open(path, "rb") as f:
+        data = f.read()
+    minified = False
+    if minify:
+        text = data.decode("utf-8")
+        smaller = minify_html(text)
+        if smaller != text:
+            data = smaller.encode("utf-8")
+            write_atomic(path, [data], "wb")
+            minified = True
+    digest = hash_bytes(data)
+    if not compress:
+        return path, digest, minified, False
+    siblings = compressed_siblings(path)
+    if digest == old_hash and all(os.path.exists(sibling) for sibling in siblings):
+        return path, digest, minified, False
+    #mtime=0 keeps the .gz bytes the same from one build to the next
+    write_atomic(path + ".gz", [gzip.compress(data, compresslevel=9, mtime=0)], "wb")
+    if brotli is not None:
+        write_atomic(path + ".br", [brotli.compress(data)], "wb")
+    return path, digest, minified, True
+
+def output_stamp(path, digest):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns, digest]
+
+def stamp_is_current(path, stamp):
+    #an output with the size and mtime it had when it was processed still has the recorded hash
+    if stamp is None or not os.path.exists(path):
+        return False
+    return output_stamp(path, stamp[2]) == stamp
+
+class PostProcessor:
+    #minifies generated pages and writes .gz/.br siblings next to text outputs after a build;
+    #the hash of every processed output is kept in state_path so unchanged ones aren't compressed again
+    def __init__(self, minify=False, compress=False, jobs=8, state_path=POSTPROCESS_PATH):
+        self.minify = minify
+        self.compress = compress
+        self.jobs = max(1, jobs)
+        self.state_path = state_path
+
+    def compressible(self, path):
+        return self.compress and path.lower().endswith(COMPRESS_EXTENSIONS)
+
+    def siblings(self, paths):
+        #the siblings a build keeps for these outputs, so pruning leaves them alone
+        siblings = []
+        for path in paths:
+            if self.compressible(path):
+                siblings.extend(compressed_siblings(path))
+        return siblings
+
+    def load_state(self):
+        #{"outputs": {path: [size, mtime_ns, hash] of every compressed output}}
+        state = read_json(self.state_path)
+        if not isinstance(state, dict) or state.get("version") != POSTPROCESS_VERSION:
+            return {"version": POSTPROCESS_VERSION, "outputs": {}}
+        return state
+
+    def save_state(self, state):
+        write_json(self.state_path, state, indent=1, sort_keys=True)
+
+    def run(self, pages, other_outputs, current_pages=()):
+        #pages are minified when asked for, static files never are since they may be links to the sources;
+        #current_pages weren't rendered again since the last run, so they keep their recorded hash
+        #unless they changed on disk since, e.g. by serve, or a sibling is missing;
+        #with neither minify nor compress, only the siblings earlier runs wrote are removed
+        old_stamps = self.load_state()["outputs"]
+        state = {}
+        unchanged = 0
+        pages = list(pages)
+        for path in current_pages:
+            if not self.compressible(path):
+                continue
+            elif stamp_is_current(path, old_stamps.get(path)) and all(os.path.exists(sibling) for sibling in compressed_siblings(path)):
+                state[path] = old_stamps[path]
+                unchanged += 1
+            else:
+                pages.append(path)
+        jobs = []
+        for path in pages:
+            if self.minify or self.compressible(path):
+                jobs.append((path, self.minify, self.compressible(path)))
+        for path in other_outputs:
+            if self.compressible(path):
+                jobs.append((path, False, True))
+        minified = compressed = 0
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            #zlib and brotli release the GIL while compressing, so threads are enough
+            results = executor.map(lambda job: process_output(*job, old_stamps.get(job[0], [None])[-1]), jobs)
+            for path, digest, was_minified, was_compressed in results:
+                state[path] = output_stamp(path, digest)
+                minified += was_minified
+                compressed += was_compressed
+                unchanged += self.compressible(path) and not was_compressed
+        #outputs that are gone, or no longer compressed, leave their siblings behind otherwise
+        for path in old_stamps:
+            if path not in state or not self.compressible(path):
+                for sibling in (path + ".gz", path + ".br"):
+                    if os.path.exists(sibling):
+                        os.remove(sibling)
+        if not self.minify and not self.compress:
+            if os.path.exists(self.state_path):
+                os.remove(self.state_path)
+            return
+        self.save_state({"version": POSTPROCESS_VERSION, "outputs": {path: stamp for path, stamp in state.items() if self.compressible(path)}})
+        print(f"Post-processing: {minified} pages minified, {compressed} files compressed, {unchanged} compressed files unchanged")
@@ -0,0 +1,133 @@
+import sys
+import json
+import time
+
+#the steps of the real render path, timed through hooks on the functions it calls, see hook_render_path;
+#blocks are classified while they are split, and write is what render_page does itself: opening, flushing
+#and closing the output, the front matter and the values the template is filled with
+PAGE_STAGES = ["read", "block split", "inline parse", "highlight", "tree build", "template", "serialize", "write"]
+STAGES = PAGE_STAGES + ["static copy"]
+
+class BuildProfiler:
+    #wall time and net allocated memory blocks (sys.getallocatedblocks) per stage, per page and in total
+    def __init__(self):
+        self.totals = {stage: [0.0, 0] for stage in STAGES}
+        self.pages = []
+        self.current = None
+        #[seconds, blocks] spent in timed calls nested in each running one, which count for their own stage
+        self.nested = []
+        self.hooks = []
+
+    def start_page(self, path):
+        self.current = {"path": path, "stages": {stage: [0.0, 0] for stage in PAGE_STAGES}}
+        self.pages.append(self.current)
+
+    def record(self, stage, seconds, blocks):
+        self.totals[stage][0] += seconds
+        self.totals[stage][1] += blocks
+        if self.current is not None and stage in self.current["stages"]:
+            self.current["stages"][stage][0] += seconds
+            self.current["stages"][stage][1] += blocks
+
+    def timed(self, stage, function, *args):
+        self.nested.append([0.0, 0])
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            seconds = time.perf_counter() - start
+            blocks = sys.getallocatedblocks() - blocks
+            nested_seconds, nested_blocks = self.nested.pop()
+            self.record(stage, seconds - nested_seconds, blocks - nested_blocks)
+            if self.nested:
+                self.nested[-1][0] += seconds
+                self.nested[-1][1] += blocks
+
+    def timed_items(self, stage, items):
+        #the work of a lazy iterator happens as it is iterated, so each item is timed on its own
+        items = iter(items)
+        while True:
+            try:
+                item = self.timed(stage, next, items)
+            except StopIteration:
+                return
+            yield item
+
+    def hook(self, owner, name, stage, lazy=False):
+        #owner.name is timed under stage until unhook, owner is the module or class the callers look it up on
+        original = getattr(owner, name)
+        if lazy:
+            def timed(*args):
+                return self.timed_items(stage, original(*args))
+        else:
+            def timed(*args):
+                return self.timed(stage, original, *args)
+        self.hooks.append((owner, name, original))
+        setattr(owner, name, timed)
+
+    def hook_page(self, owner, name):
+        #owner.name renders one page from its second argument, every stage timed while it runs counts for that page
+        original = getattr(owner, name)
+        def timed(basepath, from_path, *args):
+            self.start_page(from_path)
+            try:
+                return self.timed("write", original, basepath, from_path, *args)
+            finally:
+                self.current = None
+        self.hooks.append((owner, name, original))
+        setattr(owner, name, timed)
+
+    def hook_render_path(self):
+        import blockmarkdown
+        import template
+        import parallel
+        self.hook_page(parallel, "render_page")
+        self.hook(blockmarkdown, "markdown_lines", "read", lazy=True)
+        self.hook(blockmarkdown, "iter_typed_blocks", "block split", lazy=True)
+        self.hook(blockmarkdown, "block_to_html_node", "tree build")
+        self.hook(blockmarkdown, "text_to_textnodes", "inline parse")
+        self.hook(blockmarkdown, "code_node", "highlight")
+        self.hook(template.Template, "write", "template")
+        self.hook(template, "write_html", "serialize")
+
+    def unhook(self):
+        while self.hooks:
+            owner, name, original = self.hooks.pop()
+            setattr(owner, name, original)
+
+    def page_time(self, page):
+        return sum(seconds for seconds, blocks in page["stages"].values())
+
+    def report(self, top=10):
+        total = sum(seconds for seconds, blocks in self.totals.values())
+        lines = [f"{'stage':<16} {'ms':>10} {'share':>7} {'net blocks':>12}"]
+        for stage in STAGES:
+            seconds, blocks = self.totals[stage]
+            share = seconds / total if total else 0
+            lines.append(f"{stage:<16} {seconds * 1000:>10.2f} {share:>7.1%} {blocks:>12}")
+        lines.append(f"{'total':<16} {total * 1000:>10.2f}")
+        slowest = sorted(self.pages, key=self.page_time, reverse=True)[:top]
+        if slowest:
+            lines.append(f"Slowest {len(slowest)} of {len(self.pages)} pages:")
+            for page in slowest:
+                stage = max(page["stages"], key=lambda name: page["stages"][name][0])
+                lines.append(f"  {self.page_time(page) * 1000:>9.2f} ms  {page['path']} (mostly {stage})")
+        return "\n".join(lines)
+
+    def to_json(self):
+        return {
+            "stages": {stage: {"ms": seconds * 1000, "net_blocks": blocks} for stage, (seconds, blocks) in self.totals.items()},
+            "pages": [
+                {
+                    "path": page["path"],
+                    "ms": self.page_time(page) * 1000,
+                    "stages": {stage: {"ms": seconds * 1000, "net_blocks": blocks} for stage, (seconds, blocks) in page["stages"].items()},
+                }
+                for page in self.pages
+            ],
+        }
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f, indent=1)
@@ -0,0 +1,58 @@
+import os
+from blockmarkdown import markdown_to_page, scan_metadata, blocks_to_html_node, markdown_lines
+from frontmatter import split_front_matter
+from sitefiles import summarize_page
+
+def page_links(template, links):
+    #what render_page returns for a page, less the summary; templates are the layout and partials
+    #the page was rendered with, for rebuilding only the pages that include one that changed
+    return {"links": template.links + links, "templates": list(template.dependencies)}
+
+def page_values(meta, title, node):
+    #front matter fields can be used as template slots too, e.g. {{ date }}
+    values = {key: value for key, value in meta.items() if isinstance(value, str)}
+    values["Title"] = title
+    values["Content"] = node
+    return values
+
+def render_page(basepath, from_path, template, dest_path, cache=None, summarize=False):
+    #template is a compiled Template or the Layouts a page picks one from, links in the content are resolved against
+    #basepath while the tree is built; the markdown is read line by line straight from the file, never as one string,
+    #and only once: the title comes from the front matter or the first h1 found while parsing
+    #returns {"links": every (attribute, url) in the written page, "templates": [...]}, plus the sitefiles summary when summarize is set
+    links = []
+    with open(from_path) as f:
+        meta, title, node = markdown_to_page(f, basepath, cache, links)
+    template = template.for_page(meta)
+    page = page_links(template, links)
+    if summarize:
+        page.update(summarize_page(from_path, title, node, meta))
+
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    with open(dest_path, "w") as f:
+        template.write(f, page_values(meta, title, node))
+    return page
+
+def render_html(basepath, from_path, markdown, template, cache=None, summarize=False):
+    #same output as render_page for markdown that is already in memory, returns (html, page)
+    links = []
+    meta, title, node = markdown_to_page(markdown, basepath, cache, links)
+    template = template.for_page(meta)
+    page = page_links(template, links)
+    if summarize:
+        page.update(summarize_page(from_path, title, node, meta))
+    return template.render(page_values(meta, title, node)), page
+
+def render_markdown(text, basepath="/", template=None, cache=None):
+    #html for one document that is already in memory, without touching the filesystem: just the content,
+    #or the whole page when a compiled Template or Layouts is given (which, unlike the content alone, needs a title)
+    if template is None:
+        meta, lines = split_front_matter(markdown_lines(text))
+        return blocks_to_html_node(lines, basepath, cache)[1].to_html()
+    meta, title, node = markdown_to_page(text, basepath, cache)
+    return template.for_page(meta).render(page_values(meta, title, node))
+
+def scan_page(from_path):
+    #front matter and title only, see scan_metadata; cheap enough to run over every page for nav, tags or archives
+    with open(from_path) as f:
+        return scan_metadata(f)
@@ -0,0 +1,207 @@
+import os
+import log
+import time
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from render import render_page
+from staticsync import copy_file
+from layout import Layouts
+from manifest import hash_file, new_manifest, load_manifest, save_manifest, remove_output, record_templates, uses_any
+
+class TreeState:
+    #remembers (mtime, size) for every file below root and the mtime of every directory;
+    #a poll stats the known paths and only lists a directory again when its own mtime moved,
+    #which is what happens when entries are added, removed or renamed inside it
+    def __init__(self, root):
+        self.root = root
+        self.files = {}
+        self.dirs = {}
+        self.scan(root, [])
+
+    def scan(self, directory, found):
+        self.dirs[directory] = os.stat(directory).st_mtime_ns
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if entry.path not in self.dirs:
+                        self.scan(entry.path, found)
+                elif entry.is_file() and entry.path not in self.files:
+                    stat = entry.stat()
+                    self.files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                    found.append(entry.path)
+
+    def poll(self):
+        changed = []
+        for directory, stamp in list(self.dirs.items()):
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                del self.dirs[directory]
+                continue
+            if mtime != stamp:
+                self.scan(directory, changed)
+        new_files = set(changed)
+
+        removed = []
+        for path, stamp in list(self.files.items()):
+            if path in new_files:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                del self.files[path]
+                removed.append(path)
+                continue
+            if (stat.st_mtime_ns, stat.st_size) != stamp:
+                self.files[path] = (stat.st_mtime_ns, stat.st_size)
+                changed.append(path)
+        return changed, removed
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def stamp_or_none(path):
+    try:
+        return file_stamp(path)
+    except FileNotFoundError:
+        return None
+
+def output_path(source_path, source_root, dest_root):
+    return os.path.join(dest_root, os.path.relpath(source_path, source_root))
+
+def page_output_path(source_path, content_root, dest_root):
+    return output_path(source_path, content_root, dest_root)[:-3] + ".html"
+
+def is_page(path):
+    return path.lower().endswith(".md")
+
+class SiteWatcher:
+    #polls the inputs of an already built site and rewrites only the outputs that depend on what changed
+    def __init__(self, basepath, static_path, content_path, template_path, dest_path, manifest_path, cache=None, link_mode="copy"):
+        self.basepath = basepath
+        self.cache = cache
+        self.link_mode = link_mode
+        self.static_path = static_path
+        self.content_path = content_path
+        self.template_path = template_path
+        self.dest_path = dest_path
+        self.manifest_path = manifest_path
+        self.manifest = load_manifest(manifest_path)
+        if self.manifest is None:
+            self.manifest = new_manifest(hash_file(template_path), basepath)
+        self.static = TreeState(static_path)
+        self.content = TreeState(content_path)
+        #stamps of the layouts and partials pages were rendered with, plus the default template
+        self.template_stamps = {path: stamp_or_none(path) for path in [template_path, *self.manifest["templates"]]}
+        self.dirty = False
+
+    def poll(self):
+        updated = 0
+        changed, removed = self.static.poll()
+        for source_path in changed:
+            target_path = output_path(source_path, self.static_path, self.dest_path)
+            if log.verbose:
+                print(f"Copying {source_path} to {target_path}")
+            copy_file(source_path, target_path, self.link_mode)
+            self.manifest["static"][source_path] = {"output": target_path}
+            updated += 1
+        for source_path in removed:
+            updated += self.remove("static", source_path)
+
+        changed, removed = self.content.poll()
+        stale_templates = self.poll_templates()
+        if stale_templates:
+            #only the pages whose layout or partials changed are stale
+            changed = changed + [source_path for source_path, entry in self.manifest["pages"].items() if uses_any(entry, stale_templates) and source_path not in changed]
+        layouts = Layouts(self.template_path, self.basepath)
+        for source_path in changed:
+            if is_page(source_path):
+                updated += self.render(source_path, layouts)
+        for source_path in removed:
+            if is_page(source_path):
+                updated += self.remove("pages", source_path)
+
+        #the manifest is written on the first quiet poll, so saving it never delays a rebuild
+        if updated:
+            self.dirty = True
+        elif self.dirty:
+            self.save()
+        return updated
+
+    def poll_templates(self):
+        changed = set()
+        for path, stamp in self.template_stamps.items():
+            current = stamp_or_none(path)
+            if current != stamp:
+                self.template_stamps[path] = current
+                changed.add(path)
+        return changed
+
+    def save(self):
+        self.manifest["template"] = hash_file(self.template_path)
+        record_templates(self.manifest)
+        save_manifest(self.manifest, self.manifest_path)
+        if self.cache is not None:
+            self.cache.save()
+        self.dirty = False
+
+    def render(self, source_path, template):
+        target_path = page_output_path(source_path, self.content_path, self.dest_path)
+        if log.verbose:
+            print(f"Generating page from {source_path} to {target_path} using {self.template_path}")
+        try:
+            page = render_page(self.basepath, source_path, template, target_path, self.cache)
+        except Exception as e:
+            #keep watching, the next save will retry this page
+            print(f"Error generating page from {source_path}: {e}")
+            self.manifest["pages"].pop(source_path, None)
+            return 0
+        self.manifest["pages"][source_path] = {"hash": hash_file(source_path), "output": target_path, **page}
+        for path in page["templates"]:
+            if path not in self.template_stamps:
+                self.template_stamps[path] = stamp_or_none(path)
+        return 1
+
+    def remove(self, section, source_path):
+        entry = self.manifest[section].pop(source_path, None)
+        if entry is None:
+            return 0
+        if log.verbose:
+            print(f"Removing {entry['output']}")
+        remove_output(entry["output"], self.dest_path)
+        return 1
+
+def serve_site(basepath, static_path, content_path, template_path, dest_path, manifest_path, port=8888, watch=False, interval=0.05, cache=None, link_mode="copy"):
+    handler = partial(SimpleHTTPRequestHandler, directory=dest_path)
+    server = ThreadingHTTPServer(("", port), handler)
+    print(f"Serving {dest_path} on http://localhost:{port}/")
+    if not watch:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    #the server runs on its own thread so polling never waits on a slow request
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    watcher = SiteWatcher(basepath, static_path, content_path, template_path, dest_path, manifest_path, cache, link_mode)
+    print(f"Watching {content_path}, {static_path} and {template_path} for changes")
+    try:
+        while True:
+            time.sleep(interval)
+            start = time.perf_counter()
+            updated = watcher.poll()
+            if updated:
+                print(f"Rebuilt {updated} outputs in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if watcher.dirty:
+            watcher.save()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,42 @@
+import os
+import hashlib
+
+SHARD_DIR = "./.ssg-shards"
+#rough cost of a page beyond its size (open, template, write), in bytes of markdown
+PAGE_OVERHEAD = 2048
+
+def parse_shard(text):
+    #"2/4" -> (2, 4), shards are numbered from 1
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise Exception(f'Error: Invalid shard "{text}", use i/N, e.g. 2/4')
+    if count < 1 or index < 1 or index > count:
+        raise Exception(f'Error: Invalid shard "{text}", i has to be between 1 and N')
+    return index, count
+
+def shard_root(shard_dir, index, count):
+    return os.path.join(shard_dir, f"shard-{index}-of-{count}")
+
+def page_key(source_path, content_path):
+    #hashed relative to content_path, so every machine orders the pages the same way
+    relative = os.path.relpath(source_path, content_path).replace(os.sep, "/")
+    return hashlib.sha1(relative.encode("utf-8")).hexdigest()
+
+def partition_pages(pages, content_path, count):
+    #pages are ordered by hash and cut into count runs of about the same estimated cost, so
+    #shards stay balanced and adding or removing a page only moves pages near the cuts
+    weighted = []
+    for source_path, target_path in pages:
+        cost = os.path.getsize(source_path) + PAGE_OVERHEAD
+        weighted.append((page_key(source_path, content_path), cost, source_path, target_path))
+    weighted.sort()
+    total = sum(cost for key, cost, source_path, target_path in weighted)
+    shards = [[] for _ in range(count)]
+    position = 0
+    for key, cost, source_path, target_path in weighted:
+        #a page belongs to the run its middle falls in
+        index = min(count - 1, int((position + cost / 2) * count / total))
+        shards[index].append((source_path, target_path))
+        position += cost
+    return shards
@@ -0,0 +1,136 @@
+import os
+import re
+import json
+import time
+from html import escape as html_escape
+from frontmatter import meta_timestamp
+from manifest import write_atomic
+
+TAG_PATTERN = re.compile(r"</?([a-zA-Z][a-zA-Z0-9]*)[^>]*>")
+INLINE_TAGS = {"a", "b", "i", "code", "img"}
+WORD_PATTERN = re.compile(r"\w\w+")
+SUMMARY_LENGTH = 200
+#shorter paragraphs are usually navigation like [< Back Home](/), not the start of the text
+SUMMARY_MIN_WORDS = 8
+SITE_FILES = ("sitemap.xml", "feed.xml", "search-index.json")
+
+def node_text(node):
+    #text of every leaf below node; cached blocks and list items hold html, so tags are dropped
+    parts = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.children is None:
+            parts.append(node.value)
+        else:
+            stack.extend(reversed(node.children))
+    return TAG_PATTERN.sub(drop_tag, "".join(parts))
+
+def drop_tag(match):
+    #inline tags sit inside words and punctuation, block tags separate text
+    return "" if match.group(1) in INLINE_TAGS else " "
+
+def is_paragraph(node):
+    return node.tag == "p" or (node.tag is None and node.value.startswith("<p>"))
+
+def summarize_page(source_path, title, node, meta=None):
+    #what the sitemap, feed and search index need from a page, so the html never has to be kept or re-read
+    summary = None
+    first_paragraph = ""
+    terms = set(WORD_PATTERN.findall(title.lower()))
+    for child in node.children:
+        text = node_text(child)
+        if summary is None and is_paragraph(child):
+            words = text.split()
+            if len(words) >= SUMMARY_MIN_WORDS:
+                summary = " ".join(words)
+            elif not first_paragraph:
+                first_paragraph = " ".join(words)
+        terms.update(WORD_PATTERN.findall(text.lower()))
+    summary = summary or first_paragraph
+    if len(summary) > SUMMARY_LENGTH:
+        summary = summary[:SUMMARY_LENGTH].rsplit(" ", 1)[0] + "..."
+    #the front matter date when there is one, otherwise when the source was last changed
+    date = meta_timestamp(meta) if meta else None
+    if date is None:
+        date = os.stat(source_path).st_mtime
+    return {"title": title, "summary": summary, "terms": sorted(terms), "date": date}
+
+def escape(text):
+    #what xml.sax.saxutils.escape does, without importing urllib along with it
+    return html_escape(text, quote=False)
+
+class SiteFiles:
+    #collects one small record per page during the build and streams sitemap.xml, feed.xml
+    #and search-index.json into dest_path at the end; pages under feed_section go in the feed
+    def __init__(self, dest_path, basepath, site_url, feed_section="blog", feed_items=20):
+        self.dest_path = dest_path
+        self.basepath = basepath
+        self.site_url = site_url.rstrip("/")
+        self.feed_section = feed_section.strip("/") + "/"
+        self.feed_items = feed_items
+        self.pages = []
+
+    def page_url(self, output_path):
+        path = os.path.relpath(output_path, self.dest_path).replace(os.sep, "/")
+        if path == "index.html":
+            path = ""
+        elif path.endswith("/index.html"):
+            path = path[:-len("index.html")]
+        return self.basepath + path
+
+    def add(self, output_path, page):
+        self.pages.append((self.page_url(output_path), page))
+
+    def outputs(self):
+        return [os.path.join(self.dest_path, name) for name in SITE_FILES]
+
+    def write(self):
+        self.pages.sort(key=lambda item: item[0])
+        write_atomic(os.path.join(self.dest_path, "sitemap.xml"), self.sitemap())
+        write_atomic(os.path.join(self.dest_path, "feed.xml"), self.feed())
+        write_atomic(os.path.join(self.dest_path, "search-index.json"), self.search_index())
+        print(f"Wrote sitemap, feed and search index for {len(self.pages)} pages")
+
+    def sitemap(self):
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        for url, page in self.pages:
+            lastmod = time.strftime("%Y-%m-%d", time.gmtime(page["date"]))
+            yield f"<url><loc>{escape(self.site_url + url)}</loc><lastmod>{lastmod}</lastmod></url>\n"
+        yield "</urlset>\n"
+
+    def feed(self):
+        #email pulls in a lot, and only the feed needs it
+        from email.utils import formatdate
+        home = self.basepath
+        section = self.basepath + self.feed_section
+        title = self.site_url
+        posts = []
+        for url, page in self.pages:
+            if url == home:
+                title = page["title"]
+            elif url.startswith(section) and url != section:
+                posts.append((url, page))
+        posts.sort(key=lambda item: item[1]["date"], reverse=True)
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<rss version="2.0"><channel>\n'
+        yield f"<title>{escape(title)}</title><link>{escape(self.site_url + home)}</link><description>{escape(title)}</description>\n"
+        for url, page in posts[:self.feed_items]:
+            link = escape(self.site_url + url)
+            yield (f"<item><title>{escape(page['title'])}</title><link>{link}</link><guid>{link}</guid>"
+                   f"<pubDate>{formatdate(page['date'], usegmt=True)}</pubDate><description>{escape(page['summary'])}</description></item>\n")
+        yield "</channel></rss>\n"
+
+    def search_index(self):
+        #{"pages": [[url, title, summary], ...], "terms": {term: [page number, ...]}}
+        postings = {}
+        yield '{"pages":['
+        for number, (url, page) in enumerate(self.pages):
+            yield ("," if number else "") + json.dumps([url, page["title"], page["summary"]], ensure_ascii=False, separators=(",", ":"))
+            for term in page["terms"]:
+                postings.setdefault(term, []).append(number)
+        yield '],"terms":{'
+        for number, term in enumerate(sorted(postings)):
+            yield ("," if number else "") + json.dumps(term, ensure_ascii=False) + ":" + json.dumps(postings[term], separators=(",", ":"))
+        yield "}}\n"
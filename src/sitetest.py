@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+class SiteTestCase(unittest.TestCase):
+    #a site in a temporary directory per test; files are named by their path relative to root,
+    #e.g. self.write("content/index.md", "# Home")
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.static = self.path("static")
+        self.content = self.path("content")
+        self.docs = self.path("docs")
+        self.template = self.path("template.html")
+        self.manifest = self.path("cache/manifest.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, relative_path):
+        return os.path.join(self.root, relative_path)
+
+    def write(self, relative_path, text, mtime=None):
+        path = self.path(relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        mode = "wb" if isinstance(text, bytes) else "w"
+        with open(path, mode) as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+        return path
+
+    def read(self, relative_path):
+        with open(self.path(relative_path)) as f:
+            return f.read()
+
+    def tree(self, directory):
+        #relative path -> text of every file below directory, and -> None for every directory
+        files = {}
+        for root, dirs, names in os.walk(directory):
+            files[os.path.relpath(root, directory)] = None
+            for name in names:
+                with open(os.path.join(root, name)) as f:
+                    files[os.path.relpath(os.path.join(root, name), directory)] = f.read()
+        return files
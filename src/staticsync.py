@@ -0,0 +1,137 @@
+import os
+import shutil
+import log
+from manifest import hash_file
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LINK_MODES = ("copy", "hardlink", "reflink", "auto")
+COMPARE_MODES = ("mtime", "hash")
+#ioctl number for FICLONE on Linux (btrfs, xfs, bcachefs...)
+FICLONE = 0x40049409
+
+#flips to False the first time the filesystem refuses a reflink, so later files go straight to copying
+_reflink_supported = fcntl is not None
+
+def files_match(source_path, target_path, compare="mtime"):
+    try:
+        target_stat = os.stat(target_path)
+    except FileNotFoundError:
+        return False
+    source_stat = os.stat(source_path)
+    if source_stat.st_size != target_stat.st_size:
+        return False
+    #a hardlink left by an earlier --link-mode hardlink build is replaced by a real copy
+    if (source_stat.st_ino, source_stat.st_dev) == (target_stat.st_ino, target_stat.st_dev):
+        return False
+    if compare == "hash":
+        return hash_file(source_path) == hash_file(target_path)
+    #copies carry the source mtime, so equal size and mtime means nothing changed since the last sync
+    return source_stat.st_mtime_ns == target_stat.st_mtime_ns
+
+def reflink(source_path, target_path):
+    with open(source_path, "rb") as source, open(target_path, "wb") as target:
+        fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+
+def copy_file(source_path, target_path, mode="copy"):
+    #writes next to the target and renames over it, so readers never see a half-written file
+    global _reflink_supported
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    tmp_path = target_path + ".sync-tmp"
+    if mode == "hardlink":
+        try:
+            os.link(source_path, tmp_path)
+            os.replace(tmp_path, target_path)
+            return "hardlink"
+        except OSError:
+            #e.g. static/ and docs/ on different filesystems
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    method = "copy"
+    if mode in ("reflink", "auto") and _reflink_supported:
+        try:
+            reflink(source_path, tmp_path)
+            method = "reflink"
+        except OSError:
+            _reflink_supported = False
+    if method == "copy":
+        shutil.copyfile(source_path, tmp_path)
+    shutil.copymode(source_path, tmp_path)
+    stat = os.stat(source_path)
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp_path, target_path)
+    return method
+
+def list_static(source_directory, target_directory):
+    #(source, target) for every file plus every target directory, empty ones included
+    pairs = []
+    directories = [target_directory]
+    for root, dirnames, filenames in os.walk(source_directory):
+        target_root = target_directory
+        if root != source_directory:
+            target_root = os.path.join(target_directory, os.path.relpath(root, source_directory))
+        for dirname in sorted(dirnames):
+            directories.append(os.path.join(target_root, dirname))
+        for filename in sorted(filenames):
+            pairs.append((os.path.join(root, filename), os.path.join(target_root, filename)))
+    return pairs, directories
+
+def sync_static(source_directory, target_directory, mode="copy", compare="mtime", jobs=8, fingerprinter=None):
+    #returns (copied pairs, skipped count, every (source, target) pair, every target directory);
+    #with a fingerprinter, assets are written under their fingerprinted names, see fingerprint
+    pairs, directories = list_static(source_directory, target_directory)
+    if fingerprinter is not None:
+        pairs = fingerprinter.rename(pairs, target_directory)
+    for directory in directories:
+        os.makedirs(directory, exist_ok=True)
+
+    def sync_one(pair):
+        source_path, target_path = pair
+        if fingerprinter is not None and target_path in fingerprinter.stylesheets:
+            #a rewritten stylesheet is named after its rewritten text, so one that exists is current
+            if os.path.exists(target_path):
+                return False
+            fingerprinter.write_stylesheet(target_path)
+            return True
+        if mode != "hardlink" and files_match(source_path, target_path, compare):
+            return False
+        if mode == "hardlink" and os.path.exists(target_path) and os.path.samefile(source_path, target_path):
+            return False
+        copy_file(source_path, target_path, mode)
+        return True
+
+    copied = []
+    if jobs > 1 and len(pairs) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(sync_one, pairs))
+    else:
+        results = [sync_one(pair) for pair in pairs]
+    for pair, did_copy in zip(pairs, results):
+        if did_copy:
+            copied.append(pair)
+            if log.verbose:
+                print(f"Copying {pair[0]} to {pair[1]}")
+    return copied, len(pairs) - len(copied), pairs, directories
+
+def prune_outputs(target_directory, keep_files, keep_directories):
+    #deletes every file under target_directory that isn't in keep_files, then the directories left empty
+    keep_files = {os.path.normpath(path) for path in keep_files}
+    keep_directories = {os.path.normpath(path) for path in keep_directories}
+    keep_directories.add(os.path.normpath(target_directory))
+    removed = []
+    for root, dirnames, filenames in os.walk(target_directory, topdown=False):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            if os.path.normpath(path) not in keep_files:
+                os.remove(path)
+                removed.append(path)
+        if os.path.normpath(root) not in keep_directories and not os.listdir(root):
+            os.rmdir(root)
+    if log.verbose:
+        for path in removed:
+            print(f"Removing {path}")
+    return removed
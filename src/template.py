@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import hashlib
+from htmlnode import HTMLNode, write_html
+
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+LINK_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)="([^"]*)"')
+#{{> header }} includes partials/header.html, see expand_partials
+PARTIAL_PATTERN = re.compile(r"\{\{>\s*([\w-]+(?:/[\w-]+)*)\s*\}\}")
+
+#asset urls of a fingerprinted build, "/index.css" -> "/index.<hash>.css", see fingerprint
+_assets = {}
+_assets_key = ""
+#"/images/a.png" -> [width, height] when images get their size and lazy-loading attributes, see imagesize
+_image_sizes = None
+_image_sizes_key = ""
+
+def settings_key(settings):
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+def use_assets(assets):
+    global _assets, _assets_key
+    _assets = assets
+    _assets_key = settings_key(assets) if assets else ""
+
+def current_assets():
+    return _assets
+
+def use_image_sizes(image_sizes):
+    global _image_sizes, _image_sizes_key
+    _image_sizes = image_sizes
+    _image_sizes_key = settings_key(image_sizes) if image_sizes is not None else ""
+
+def current_image_sizes():
+    return _image_sizes
+
+def image_attributes(url):
+    #extra (name, value, ...) for an <img> of url, None when image sizes are off
+    if _image_sizes is None:
+        return None
+    size = _image_sizes.get(url)
+    if size is None:
+        return ("loading", "lazy", "decoding", "async")
+    return ("width", str(size[0]), "height", str(size[1]), "loading", "lazy", "decoding", "async")
+
+def url_context(basepath):
+    #everything a rendered link or image depends on besides its markdown, for caches of rendered html
+    if not _assets_key and not _image_sizes_key:
+        return basepath
+    return f"{basepath}\0{_assets_key}\0{_image_sizes_key}"
+
+def rewrite_basepath(html, basepath):
+    if (basepath is None or basepath == "/") and not _assets:
+        return html
+    return LINK_ATTRIBUTE_PATTERN.sub(lambda match: f'{match.group(1)}="{resolve_url(match.group(2), basepath)}"', html)
+
+def apply_basepath(url, basepath):
+    if basepath is None or basepath == "/" or not url.startswith("/"):
+        return url
+    return basepath + url[1:]
+
+def resolve_url(url, basepath):
+    #same rule the template rewrite uses: a fingerprinted asset gets its new name, then a leading "/" becomes the basepath
+    return apply_basepath(_assets.get(url, url), basepath)
+
+def expand_partials(text, partial_path, dependencies, including=()):
+    #text with every {{> name }} replaced by partial_path/name.html, which may include partials of its own;
+    #the path of every partial read is appended to dependencies
+    def include(match):
+        name = match.group(1)
+        path = os.path.join(partial_path, name + ".html")
+        if path in including:
+            raise Exception(f'Error: Partial "{name}" includes itself')
+        if not os.path.isfile(path):
+            raise Exception(f'Error: Partial "{name}" not found, expected {path}')
+        if path not in dependencies:
+            dependencies.append(path)
+        with open(path) as f:
+            return expand_partials(f.read(), partial_path, dependencies, including + (path,))
+    return PARTIAL_PATTERN.sub(include, text)
+
+class Template:
+    def __init__(self, text, basepath="/"):
+        #even indexes hold literal text, odd indexes hold slot names
+        self.segments = []
+        self.placeholders = {}
+        position = 0
+        for match in SLOT_PATTERN.finditer(text):
+            self.segments.append(rewrite_basepath(text[position:match.start()], basepath))
+            self.segments.append(match.group(1))
+            self.placeholders.setdefault(match.group(1), match.group(0))
+            position = match.end()
+        self.segments.append(rewrite_basepath(text[position:], basepath))
+        self.slots = set(self.segments[1::2])
+        #the files the template was compiled from, set by load_template
+        self.dependencies = []
+        #links written in the template itself end up in every page
+        self.links = []
+        for segment in self.segments[::2]:
+            self.links.extend(LINK_ATTRIBUTE_PATTERN.findall(segment))
+
+    def for_page(self, meta):
+        #a single template renders every page, see layout.Layouts for one picked by the page
+        return self
+
+    def value_for(self, name, values):
+        #unknown slots are left in the page as written, like the old str.replace did
+        if name in values:
+            return values[name]
+        return self.placeholders[name]
+
+    def render(self, values):
+        parts = self.segments[:]
+        for i in range(1, len(parts), 2):
+            value = self.value_for(parts[i], values)
+            parts[i] = value.to_html() if isinstance(value, HTMLNode) else value
+        return "".join(parts)
+
+    def write(self, fp, values):
+        #like render, but HTMLNode values are streamed into fp instead of built up as one string
+        for i, segment in enumerate(self.segments):
+            if i % 2 == 0:
+                fp.write(segment)
+                continue
+            value = self.value_for(segment, values)
+            if isinstance(value, HTMLNode):
+                write_html(value, fp)
+            else:
+                fp.write(value)
+
+    def __repr__(self):
+        return f"Template({self.segments})"
+
+_template_cache = {}
+
+def file_stamps(paths):
+    stamps = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamps.append((stat.st_mtime_ns, stat.st_size))
+    return stamps
+
+def load_template(template_path, basepath="/", partial_path=None):
+    #compiled once and reused until the template or one of the partials it includes changes
+    key = (template_path, partial_path, url_context(basepath))
+    cached = _template_cache.get(key)
+    if cached is not None and file_stamps(cached[1].dependencies) == cached[0]:
+        return cached[1]
+    with open(template_path) as f:
+        text = f.read()
+    dependencies = [template_path]
+    if partial_path is not None:
+        text = expand_partials(text, partial_path, dependencies)
+    template = Template(text, basepath)
+    template.dependencies = dependencies
+    _template_cache[key] = (file_stamps(dependencies), template)
+    return template
@@ -0,0 +1,39 @@
+import os
+import re
+import tempfile
+import unittest
+
+from corpus import make_page, generate_corpus, parse_mix, DEFAULT_MIX
+from benchmark import compare
+from blockmarkdown import markdown_to_html_node, extract_title
+
+class TestBenchmark(unittest.TestCase):
+    def test_pages_are_deterministic(self):
+        self.assertEqual(make_page(3, 10, DEFAULT_MIX, 20, 0), make_page(3, 10, DEFAULT_MIX, 20, 0))
+        self.assertNotEqual(make_page(3, 10, DEFAULT_MIX, 20, 0), make_page(3, 10, DEFAULT_MIX, 20, 1))
+        #only the link targets depend on the corpus size
+        strip_links = lambda page: re.sub(r"\]\([^)]*\)", "]()", page)
+        self.assertEqual(strip_links(make_page(3, 10, DEFAULT_MIX, 20, 0)), strip_links(make_page(3, 1000, DEFAULT_MIX, 20, 0)))
+
+    def test_generated_pages_render(self):
+        with tempfile.TemporaryDirectory() as root:
+            paths = generate_corpus(root, 12, parse_mix("links=3,code=1,lists=1"), blocks=10)
+            self.assertEqual(len(paths), 12)
+            self.assertTrue(os.path.exists(os.path.join(root, "section0", "page11", "index.md")))
+            for path in paths:
+                with open(path) as f:
+                    markdown = f.read()
+                self.assertTrue(extract_title(markdown).startswith("Page "))
+                markdown_to_html_node(markdown).to_html()
+
+    def test_parse_mix_rejects_unknown_kinds(self):
+        with self.assertRaises(Exception):
+            parse_mix("tables=2")
+
+    def test_compare_flags_regressions(self):
+        baseline = {"results": {"10": {"build": 1.0, "to_html": 1.0}}}
+        results = {"results": {"10": {"build": 1.05, "to_html": 1.5}, "100": {"build": 9.0}}}
+        self.assertEqual(compare(results, baseline, 0.10), [("10", "to_html", 1.0, 1.5)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
+import io
 import unittest
-from blockmarkdown import markdown_to_blocks, BlockType, block_to_block_type, markdown_to_html_node, extract_title
+from blockmarkdown import markdown_to_blocks, BlockType, block_to_block_type, markdown_to_html_node, extract_title, iter_typed_blocks, text_to_children
 
 class TestBlock(unittest.TestCase):
     def test_block_code_true(self):
@@ -165,5 +166,49 @@ the **same** even with inline stuff
         header = extract_title(text)
         self.assertEqual(header, "Heading 1")
 
+    def test_codeblock_with_blank_lines(self):
+        md = """
+```
+first line
+
+third line
+```
+
+After the code
+"""
+        node = markdown_to_html_node(md)
+        self.assertEqual(
+            node.to_html(),
+            "<div><pre><code>first line\n\nthird line\n</code></pre><p>After the code</p></div>",
+        )
+
+    def test_typed_blocks_from_file(self):
+        lines = io.StringIO("# Title\n\n- one\n- two\n\n1. a\n3. b\n\n> quoted  \n")
+        self.assertEqual(
+            list(iter_typed_blocks(lines)),
+            [
+                ("# Title", BlockType.HEADING),
+                ("- one\n- two", BlockType.UNORDERED_LIST),
+                ("1. a\n3. b", BlockType.PARAGRAPH),
+                ("> quoted", BlockType.QUOTE),
+            ],
+        )
+
+    def test_markdown_to_html_node_from_file(self):
+        md = "# Title\n\nSome **text**\n"
+        self.assertEqual(markdown_to_html_node(io.StringIO(md)).to_html(), markdown_to_html_node(md).to_html())
+
+    def test_extract_title_stops_at_first_h1(self):
+        lines = iter(["# Title\n", "\n", "Body\n"])
+        self.assertEqual(extract_title(lines), "Title")
+        self.assertEqual(next(lines), "Body\n")
+
+    def test_plain_text_is_one_leaf(self):
+        children = text_to_children("no markup here, just text.")
+        self.assertEqual(len(children), 1)
+        self.assertEqual(children[0].to_html(), "no markup here, just text.")
+        children = text_to_children("one _marker_ here")
+        self.assertEqual([child.to_html() for child in children], ["one ", "<i>marker</i>", " here"])
+
 if __name__ == "__main__":
     unittest.main()
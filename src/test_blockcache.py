@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from blockcache import BlockCache
+from blockmarkdown import markdown_to_html_node
+
+class TestBlockCache(unittest.TestCase):
+    def test_cached_render_matches_uncached(self):
+        md = "# Title\n\nShared **disclaimer** with [a link](/about)\n\n- one\n- two\n\nShared **disclaimer** with [a link](/about)"
+        cache = BlockCache()
+        self.assertEqual(markdown_to_html_node(md, "/site/", cache).to_html(), markdown_to_html_node(md, "/site/").to_html())
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+    def test_basepath_is_part_of_the_key(self):
+        cache = BlockCache()
+        markdown_to_html_node("[home](/)", "/a/", cache)
+        html = markdown_to_html_node("[home](/)", "/b/", cache).to_html()
+        self.assertEqual(html, '<div><p><a href="/b/">home</a></p></div>')
+        self.assertEqual(cache.hits, 0)
+
+    def test_lru_eviction(self):
+        cache = BlockCache(max_bytes=40)
+        cache.put("/", "aaaa", "<p>aaaa</p>")
+        cache.put("/", "bbbb", "<p>bbbb</p>")
+        self.assertEqual(cache.get("/", "aaaa"), ("<p>aaaa</p>", []))
+        cache.put("/", "cccc", "<p>cccc</p>")
+        self.assertIsNone(cache.get("/", "bbbb"))
+        self.assertEqual(cache.get("/", "aaaa"), ("<p>aaaa</p>", []))
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.size, 40)
+
+    def test_persistent_tier(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "blocks.json")
+            cache = BlockCache(path=path)
+            markdown_to_html_node("Some _text_", "/", cache)
+            cache.save()
+
+            next_build = BlockCache(path=path)
+            html = markdown_to_html_node("Some _text_", "/", next_build).to_html()
+            self.assertEqual(html, "<div><p>Some <i>text</i></p></div>")
+            self.assertEqual((next_build.hits, next_build.disk_hits, next_build.misses), (1, 1, 0))
+            self.assertIn("1/1 hits", next_build.report())
+            self.assertEqual(next_build.bytes_saved, len("<p>Some <i>text</i></p>"))
+
+    def test_links_survive_cache_hits(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "blocks.json")
+            cache = BlockCache(path=path)
+            first = []
+            markdown_to_html_node("See [home](/) and ![pic](/a.png)", "/site/", cache, first)
+            cache.save()
+            second = []
+            markdown_to_html_node("See [home](/) and ![pic](/a.png)", "/site/", BlockCache(path=path), second)
+            self.assertEqual(first, [("href", "/site/"), ("src", "/site/a.png")])
+            self.assertEqual(second, first)
+
+    def test_builds_sharing_a_cache_keep_each_others_entries(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "cache", "blocks.json")
+            first, second = BlockCache(path=path), BlockCache(path=path)
+            self.assertIsNone(first.get("/", "a"))
+            self.assertIsNone(second.get("/", "b"))
+            first.put("/", "a", "<p>a</p>")
+            second.put("/", "b", "<p>b</p>")
+            first.save()
+            second.save()
+            self.assertEqual(os.listdir(os.path.dirname(path)), ["blocks.json"])
+            next_build = BlockCache(path=path)
+            self.assertIsNotNone(next_build.get("/", "a"))
+            self.assertIsNotNone(next_build.get("/", "b"))
+
+    def test_corrupt_disk_tier_is_ignored(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "blocks.json")
+            with open(path, "w") as f:
+                f.write("[]")
+            cache = BlockCache(path=path)
+            self.assertIsNone(cache.get("/", "block"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import io
+import json
+import unittest
+
+from sitetest import SiteTestCase
+from daemon import RenderDaemon
+from render import render_markdown
+from template import Template
+from blockcache import BlockCache
+
+class TestRenderDaemon(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template_path = self.write("template.html", '<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+        self.daemon = RenderDaemon("/site/", self.template_path)
+
+    def request(self, **request):
+        return self.daemon.handle(json.dumps(request))
+
+    def test_ping(self):
+        self.assertEqual(self.request(id=7, op="ping"), {"id": 7, "ok": True})
+
+    def test_page(self):
+        response = self.request(id=1, markdown="# Hi\n\n[up](/up)")
+        self.assertEqual(response["html"], '<title>Hi</title><a href="/site/">home</a><div><h1>Hi</h1><p><a href="/site/up">up</a></p></div>')
+        self.assertIn("ms", response)
+
+    def test_content_only(self):
+        response = self.request(id=2, markdown="plain _text_", page=False)
+        self.assertEqual(response["html"], "<div><p>plain <i>text</i></p></div>")
+
+    def test_errors_come_with_problems(self):
+        response = self.request(id=3, markdown="# T\n\nbad **bold")
+        self.assertEqual(response["id"], 3)
+        self.assertTrue(response["error"].startswith("Error: "))
+        self.assertEqual(response["problems"], [[3, 5, 'Invalid Markdown syntax, no closing "**" found.']])
+        self.assertEqual(self.daemon.handle("not json")["id"], None)
+        self.assertIn("error", self.request(id=4, markdown=None))
+
+    def test_serve_stream(self):
+        reader = io.StringIO('{"id": 1, "op": "ping"}\n\n{"id": 2, "markdown": "_a_", "page": false}\n')
+        writer = io.StringIO()
+        self.daemon.serve_stream(reader, writer)
+        responses = [json.loads(line) for line in writer.getvalue().splitlines()]
+        self.assertEqual([response["id"] for response in responses], [1, 2])
+        self.assertEqual(responses[1]["html"], "<div><p><i>a</i></p></div>")
+
+class TestRenderMarkdown(unittest.TestCase):
+    def test_without_template(self):
+        self.assertEqual(render_markdown("## a [b](/c)", "/site/"), '<div><h2>a <a href="/site/c">b</a></h2></div>')
+
+    def test_with_template_and_cache(self):
+        template = Template("{{ Title }}|{{ Content }}", "/")
+        cache = BlockCache()
+        first = render_markdown("# T\n\ntext", "/", template, cache)
+        self.assertEqual(first, "T|<div><h1>T</h1><p>text</p></div>")
+        self.assertEqual(render_markdown("# T\n\ntext", "/", template, cache), first)
+
+if __name__ == "__main__":
+    unittest.main()
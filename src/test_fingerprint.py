@@ -0,0 +1,110 @@
+import os
+import io
+import json
+import posixpath
+import unittest
+from contextlib import redirect_stdout
+
+from sitetest import SiteTestCase
+from fingerprint import Fingerprinter, fingerprinted_name
+from template import Template, use_assets, resolve_url
+from main import build_full, build_incremental
+from manifest import hash_bytes
+from staticsync import sync_static
+
+class TestFingerprinter(SiteTestCase):
+    def tearDown(self):
+        use_assets({})
+        super().tearDown()
+
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name("index.css", "abc"), "index.abc.css")
+        self.assertEqual(fingerprinted_name("app.min.js", "abc"), "app.min.abc.js")
+
+    def test_hashes_are_cached_by_size_and_mtime(self):
+        self.write("static/a.css", "a {}")
+        cache_path = self.path("cache/fingerprints.json")
+        first = Fingerprinter(cache_path)
+        digest = first.hash(self.path("static/a.css"))
+        first.save()
+
+        second = Fingerprinter(cache_path)
+        self.assertEqual(second.hash(self.path("static/a.css")), digest)
+        self.assertEqual((second.cache.computed, second.cache.reused), (0, 1))
+        self.write("static/a.css", "b {}")
+        os.utime(self.path("static/a.css"), ns=(0, 10 ** 9))
+        self.assertNotEqual(second.hash(self.path("static/a.css")), digest)
+        self.assertEqual(second.cache.computed, 1)
+
+    def test_urls_go_through_the_assets_before_the_basepath(self):
+        use_assets({"/index.css": "/index.abc.css"})
+        self.assertEqual(resolve_url("/index.css", "/site/"), "/site/index.abc.css")
+        self.assertEqual(resolve_url("/other.css", "/site/"), "/site/other.css")
+        template = Template('<link href="/index.css"><a href="/">home</a>{{ Content }}', "/")
+        self.assertEqual(template.render({"Content": ""}), '<link href="/index.abc.css"><a href="/">home</a>')
+
+    def build_site(self, build, **options):
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "png a")
+        self.write("static/robots.txt", "User-agent: *")
+        self.write("template.html", '<link href="/index.css" rel="stylesheet">{{ Content }}')
+        self.write("content/index.md", "# Home\n\n![a](/images/a.png)")
+        self.write("content/other.md", "# Other\n\nNo images here")
+        with redirect_stdout(io.StringIO()):
+            return build("/base/", self.path("static"), self.path("content"), self.path("template.html"), self.path("docs"),
+                         fingerprinter=Fingerprinter(self.path("fingerprints.json")), **options)
+
+    def test_full_build(self):
+        self.assertEqual(self.build_site(build_full), [])
+        with open(self.path("docs/asset-manifest.json")) as f:
+            assets = json.load(f)
+        self.assertEqual(sorted(assets), ["images/a.png", "index.css"])
+        self.assertTrue(os.path.exists(self.path("docs/" + assets["images/a.png"])))
+        self.assertTrue(os.path.exists(self.path("docs/robots.txt")))
+        self.assertFalse(os.path.exists(self.path("docs/index.css")))
+        with open(self.path("docs/index.html")) as f:
+            html = f.read()
+        self.assertIn(f'href="/base/{assets["index.css"]}"', html)
+        self.assertIn(f'src="/base/{assets["images/a.png"]}"', html)
+
+    def test_incremental_build_only_renders_pages_using_a_changed_asset(self):
+        self.build_site(build_incremental, manifest_path=self.path("manifest.json"))
+        os.utime(self.path("docs/other.html"), ns=(0, 0))
+        self.write("static/images/a.png", "new png a")
+        with redirect_stdout(io.StringIO()) as output:
+            build_incremental("/base/", self.path("static"), self.path("content"), self.path("template.html"), self.path("docs"),
+                              manifest_path=self.path("manifest.json"), fingerprinter=Fingerprinter(self.path("fingerprints.json")))
+        self.assertIn("1 pages generated", output.getvalue())
+        self.assertEqual(os.stat(self.path("docs/other.html")).st_mtime_ns, 0)
+        self.assertEqual(len(os.listdir(self.path("docs/images"))), 1)
+
+    def test_stylesheet_urls_are_rewritten_before_hashing(self):
+        self.write("static/fonts/a.woff2", "font")
+        self.write("static/images/bg.png", "png")
+        self.write("static/css/base.css", "p {}")
+        self.write("static/css/site.css", "@import url(base.css);\n"
+                   "@font-face { src: url('../fonts/a.woff2?#iefix') }\n"
+                   'body { background: url("/images/bg.png") } a { background: url(data:image/png;base64,xx) } b { background: url(https://example.com/x.png) }')
+        fingerprinter = Fingerprinter(self.path("fingerprints.json"))
+        docs = self.path("docs")
+        with redirect_stdout(io.StringIO()):
+            pairs = sync_static(self.path("static"), docs, fingerprinter=fingerprinter)[2]
+        assets = fingerprinter.assets
+        with open(os.path.join(docs, assets["/css/site.css"][1:])) as f:
+            css = f.read()
+        base, font, background = (posixpath.basename(assets[url]) for url in ("/css/base.css", "/fonts/a.woff2", "/images/bg.png"))
+        self.assertEqual(css, f"@import url({base});\n"
+                         f"@font-face {{ src: url('../fonts/{font}?#iefix') }}\n"
+                         f'body {{ background: url("{assets["/images/bg.png"]}") }} a {{ background: url(data:image/png;base64,xx) }} b {{ background: url(https://example.com/x.png) }}')
+        self.assertIn(fingerprinted_name("site.css", hash_bytes(css.encode())[:10]), assets["/css/site.css"])
+        self.assertEqual(len(pairs), 4)
+
+        #a changed font changes the name of the stylesheet that uses it
+        self.write("static/fonts/a.woff2", "new font")
+        with redirect_stdout(io.StringIO()):
+            sync_static(self.path("static"), docs, fingerprinter=fingerprinter)
+        self.assertNotEqual(fingerprinter.assets["/css/site.css"], assets["/css/site.css"])
+        self.assertEqual(fingerprinter.assets["/css/base.css"], assets["/css/base.css"])
+
+if __name__ == "__main__":
+    unittest.main()
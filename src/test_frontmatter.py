@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from frontmatter import parse_front_matter, split_front_matter, meta_timestamp
+from blockmarkdown import markdown_to_page, scan_metadata, extract_title
+from render import render_page
+from template import Template
+
+PAGE = """---
+title: "Hello: World"
+date: 2024-05-01
+tags: [elves, history]
+authors:
+  - Frodo
+  - Sam
+draft: false
+---
+# Heading
+
+Body text
+"""
+
+class TestFrontMatter(unittest.TestCase):
+    def test_parse(self):
+        meta, lines = split_front_matter(PAGE.splitlines(True))
+        self.assertEqual(meta, {
+            "title": "Hello: World",
+            "date": "2024-05-01",
+            "tags": ["elves", "history"],
+            "authors": ["Frodo", "Sam"],
+            "draft": False,
+        })
+        self.assertEqual(next(lines), "# Heading\n")
+        self.assertEqual(meta_timestamp(meta), 1714521600)
+
+    def test_no_front_matter(self):
+        meta, lines = split_front_matter(["# Title\n", "\n", "text"])
+        self.assertEqual(meta, {})
+        self.assertEqual(list(lines), ["# Title\n", "\n", "text"])
+
+    def test_errors(self):
+        with self.assertRaises(Exception):
+            split_front_matter(["---\n", "title: x\n"])
+        with self.assertRaises(Exception):
+            parse_front_matter(["not a pair"])
+        with self.assertRaises(Exception):
+            meta_timestamp({"date": "May 1st"})
+
+    def test_page_title(self):
+        meta, title, node = markdown_to_page(PAGE)
+        self.assertEqual(title, "Hello: World")
+        self.assertEqual(node.to_html(), "<div><h1>Heading</h1><p>Body text</p></div>")
+        meta, title, node = markdown_to_page("# Only a heading\n\ntext")
+        self.assertEqual((meta, title), ({}, "Only a heading"))
+        with self.assertRaises(Exception):
+            markdown_to_page("no title")
+
+    def test_scan_stops_at_the_title(self):
+        def lines(text):
+            yield from text.splitlines(True)
+            raise AssertionError("read past the title")
+        self.assertEqual(scan_metadata(lines(PAGE))["title"], "Hello: World")
+        self.assertEqual(scan_metadata(lines("intro\n\n# Title\n\n"))["title"], "Title")
+        self.assertEqual(extract_title(PAGE), "Hello: World")
+
+    def test_render_page(self):
+        with tempfile.TemporaryDirectory() as root:
+            source = os.path.join(root, "page.md")
+            with open(source, "w") as f:
+                f.write(PAGE)
+            target = os.path.join(root, "out", "page.html")
+            render_page("/", source, Template("<title>{{ Title }}</title><time>{{ date }}</time>{{ Content }}{{ tags }}"), target)
+            with open(target) as f:
+                self.assertEqual(f.read(), "<title>Hello: World</title><time>2024-05-01</time><div><h1>Heading</h1><p>Body text</p></div>{{ tags }}")
+
+if __name__ == "__main__":
+    unittest.main()
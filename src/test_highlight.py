@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+import highlight
+from highlight import Highlighter, find_lexer
+from blockcache import BlockCache
+from blockmarkdown import markdown_to_html_node
+
+class TestHighlight(unittest.TestCase):
+    def setUp(self):
+        self.previous = highlight.highlighter
+        highlight.use_highlighter(Highlighter())
+
+    def tearDown(self):
+        highlight.use_highlighter(self.previous)
+
+    def test_python_tokens(self):
+        html = find_lexer("py").highlight('def f(x):\n    return "a<b" # done')
+        self.assertEqual(
+            html,
+            '<span class="tok-kw">def</span> <span class="tok-fn">f</span>(x):\n    '
+            '<span class="tok-kw">return</span> <span class="tok-str">"a&lt;b"</span> <span class="tok-com"># done</span>',
+        )
+
+    def test_keywords_inside_strings_and_comments(self):
+        html = find_lexer("javascript").highlight('// if\nlet s = "return";')
+        self.assertEqual(html.count("tok-kw"), 1)
+
+    def test_fenced_block_with_language(self):
+        html = markdown_to_html_node("```python\nx = 1\n```").to_html()
+        self.assertEqual(html, '<div><pre><code class="language-python">x = <span class="tok-num">1</span>\n</code></pre></div>')
+
+    def test_fence_without_language_is_unchanged(self):
+        html = markdown_to_html_node("```\nx = 1\n```").to_html()
+        self.assertEqual(html, "<div><pre><code>x = 1\n</code></pre></div>")
+
+    def test_unknown_language_and_disabled(self):
+        html = markdown_to_html_node("```brainfuck\n+<>\n```").to_html()
+        self.assertEqual(html, '<div><pre><code class="language-brainfuck">+<>\n</code></pre></div>')
+        highlight.use_highlighter(Highlighter(enabled=False))
+        html = markdown_to_html_node("```python\nx = 1\n```").to_html()
+        self.assertEqual(html, '<div><pre><code class="language-python">x = 1\n</code></pre></div>')
+
+    def test_block_cache_leaves_code_to_the_highlighter(self):
+        cache = BlockCache()
+        md = "```python\nx = 1\n```\n\n```python\nx = 1\n```"
+        markdown_to_html_node(md, "/", cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+        self.assertEqual((highlight.highlighter.blocks, highlight.highlighter.hits), (2, 1))
+
+    def test_persisted_between_builds(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "highlight.json")
+            first = Highlighter(path)
+            html = first.highlight("let x = 1", "rust")
+            first.save()
+
+            second = Highlighter(path)
+            self.assertEqual(second.highlight("let x = 1", "rust"), html)
+            self.assertEqual(second.hits, 1)
+            self.assertEqual(second.highlight("let x = 1", "go"), find_lexer("go").highlight("let x = 1"))
+            self.assertEqual(second.hits, 1)
+
+    def test_worker_work_is_merged(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "highlight.json")
+            worker = Highlighter(path)
+            worker.highlight("SELECT 1", "sql")
+            parent = Highlighter(path)
+            parent.merge(*worker.take_work())
+            self.assertEqual((parent.blocks, len(parent.cache.new_entries)), (1, 1))
+            self.assertEqual((worker.blocks, worker.cache.new_entries), (0, {}))
+            parent.save()
+            self.assertIsNotNone(Highlighter(path).cache.get("sql", "SELECT 1"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import *
@@ -51,6 +52,34 @@ class TestHTMLNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             node.to_html()
 
+    def test_to_html_deep_tree(self):
+        node = LeafNode("b", "deep")
+        for i in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(html.count("</span>"), 5000)
+
+    def test_write_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, "one")]), ParentNode("li", [LeafNode("a", "two", {"href": "/2"})])], {"class": "nav"})
+        out = io.StringIO()
+        write_html(node, out)
+        self.assertEqual(out.getvalue(), node.to_html())
+        self.assertEqual(out.getvalue(), '<ul class="nav"><li>one</li><li><a href="/2">two</a></li></ul>')
+
+    def test_iter_html_nested_missing_children(self):
+        node = ParentNode("div", [ParentNode("p", None)])
+        with self.assertRaises(ValueError):
+            list(iter_html(node))
+
+    def test_nodes_have_no_instance_dict(self):
+        self.assertFalse(hasattr(LeafNode("b", "x"), "__dict__"))
+        self.assertFalse(hasattr(ParentNode("p", []), "__dict__"))
+
+    def test_tags_are_interned(self):
+        tag = "".join(["sp", "an"])
+        self.assertIs(LeafNode(tag, "x").tag, ParentNode("span", []).tag)
+
     def test_markdown_to_blocks(self):
         md = """
 This is **bolded** paragraph
@@ -0,0 +1,85 @@
+import struct
+import unittest
+
+from sitetest import SiteTestCase
+from imagesize import image_size, ImageProber
+from template import use_image_sizes
+from blockmarkdown import markdown_to_html_node
+
+def jpeg(width, height, orientation=None):
+    data = b"\xff\xd8" + b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    if orientation is not None:
+        tiff = b"MM\x00\x2a" + struct.pack(">I", 8) + struct.pack(">H", 1) + struct.pack(">HHI", 0x0112, 3, 1) + struct.pack(">HH", orientation, 0) + struct.pack(">I", 0)
+        exif = b"Exif\x00\x00" + tiff
+        data += b"\xff\xe1" + struct.pack(">H", len(exif) + 2) + exif
+    return data + b"\xff\xc0" + struct.pack(">HBHH", 17, 8, height, width) + b"\x03" + b"\x00" * 9 + b"\xff\xd9"
+
+IMAGES = {
+    "a.png": b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 3, 2) + b"\x08\x06\x00\x00\x00",
+    "a.gif": b"GIF89a" + struct.pack("<HH", 5, 7) + b"\x00" * 10,
+    "lossy.webp": b"RIFF\x00\x00\x00\x00WEBPVP8 \x00\x00\x00\x00\x00\x00\x00\x9d\x01\x2a" + struct.pack("<HH", 640, 480) + b"\x00" * 4,
+    "lossless.webp": b"RIFF\x00\x00\x00\x00WEBPVP8L\x00\x00\x00\x00\x2f" + (99 | (49 << 14)).to_bytes(4, "little") + b"\x00" * 8,
+    "extended.webp": b"RIFF\x00\x00\x00\x00WEBPVP8X\x00\x00\x00\x00" + b"\x00" * 4 + (1919).to_bytes(3, "little") + (1079).to_bytes(3, "little") + b"\x00" * 4,
+    "a.jpg": jpeg(20, 10),
+    "rotated.jpg": jpeg(20, 10, orientation=6),
+    "not-an-image.png": b"<svg></svg>",
+    "short.png": b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0dIHDR\x00\x00",
+    "short.gif": b"GIF89a\x05",
+    "short.webp": b"RIFF\x00\x00\x00\x00WEBPVP8X",
+    "fill.jpg": b"\xff\xd8\xff\xff",
+    "short.jpg": jpeg(20, 10)[:24],
+}
+
+class TestImageSize(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for name, data in IMAGES.items():
+            self.write(f"static/images/{name}", data)
+
+    def tearDown(self):
+        use_image_sizes(None)
+        super().tearDown()
+
+    def test_headers(self):
+        sizes = {name: image_size(self.path(f"static/images/{name}")) for name in IMAGES}
+        self.assertEqual(sizes, {
+            "a.png": (3, 2),
+            "a.gif": (5, 7),
+            "lossy.webp": (640, 480),
+            "lossless.webp": (100, 50),
+            "extended.webp": (1920, 1080),
+            "a.jpg": (20, 10),
+            "rotated.jpg": (10, 20),
+            "not-an-image.png": None,
+            "short.png": None,
+            "short.gif": None,
+            "short.webp": None,
+            "fill.jpg": None,
+            "short.jpg": None,
+        })
+
+    def test_prober_cache(self):
+        cache_path = self.path("image-sizes.json")
+        pairs = [(self.path(f"static/images/{name}"), None) for name in IMAGES]
+        first = ImageProber(cache_path)
+        sizes = first.sizes(self.static, pairs)
+        self.assertEqual(sizes["/images/a.png"], [3, 2])
+        self.assertNotIn("/images/not-an-image.png", sizes)
+        first.save()
+
+        second = ImageProber(cache_path)
+        self.assertEqual(second.sizes(self.static, pairs), sizes)
+        self.assertEqual((second.cache.computed, second.cache.reused), (0, len(IMAGES)))
+
+    def test_image_attributes(self):
+        md = "![a](/images/a.png) and ![remote](https://example.com/b.png)"
+        self.assertEqual(markdown_to_html_node(md).to_html(), '<div><p><img src="/images/a.png" alt="a"></img> and <img src="https://example.com/b.png" alt="remote"></img></p></div>')
+        use_image_sizes({"/images/a.png": [3, 2]})
+        self.assertEqual(
+            markdown_to_html_node(md, "/site/").to_html(),
+            '<div><p><img src="/site/images/a.png" alt="a" width="3" height="2" loading="lazy" decoding="async"></img> and '
+            '<img src="https://example.com/b.png" alt="remote" loading="lazy" decoding="async"></img></p></div>',
+        )
+
+if __name__ == "__main__":
+    unittest.main()
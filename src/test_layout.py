@@ -0,0 +1,79 @@
+import os
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from sitetest import SiteTestCase
+from layout import Layouts
+from template import load_template
+from main import build_incremental
+from serve import SiteWatcher
+
+class TestLayouts(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "{{> header }}{{ Content }}")
+        self.write("layouts/post.html", "{{> header }}<article>{{ Content }}</article>{{> footer }}")
+        self.write("partials/header.html", '<h1><a href="/">{{ Title }}</a></h1>')
+        self.write("partials/footer.html", "<footer>{{> nested/copyright }}</footer>")
+        self.write("partials/nested/copyright.html", "(c) {{ author }}")
+        self.write("content/index.md", "# Home\n\nHello")
+        self.write("content/post.md", "---\nlayout: post\nauthor: Tom\n---\n# Post\n\nA post")
+        os.makedirs(self.static)
+
+    def build(self):
+        with redirect_stdout(io.StringIO()) as output:
+            build_incremental("/", self.static, self.content, self.template, self.docs, self.manifest)
+        return output.getvalue()
+
+    def test_partials_are_expanded_before_compiling(self):
+        template = Layouts(self.template).get("post")
+        self.assertEqual(template.render({"Title": "T", "Content": "c", "author": "A"}), '<h1><a href="/">T</a></h1><article>c</article><footer>(c) A</footer>')
+        self.assertEqual(template.links, [("href", "/")])
+        self.assertEqual(template.dependencies, [self.path("layouts/post.html"), self.path("partials/header.html"), self.path("partials/footer.html"), self.path("partials/nested/copyright.html")])
+
+    def test_compiled_layout_is_cached_until_a_partial_changes(self):
+        first = load_template(self.template, "/", self.path("partials"))
+        self.assertIs(load_template(self.template, "/", self.path("partials")), first)
+        self.write("partials/header.html", "<h2>{{ Title }}</h2>", mtime=0)
+        self.assertEqual(load_template(self.template, "/", self.path("partials")).render({"Title": "x", "Content": ""}), "<h2>x</h2>")
+
+    def test_bad_layouts_and_partials(self):
+        self.write("partials/loop.html", "{{> loop }}")
+        self.write("layouts/loop.html", "{{> loop }}")
+        layouts = Layouts(self.template)
+        with self.assertRaisesRegex(Exception, 'Partial "loop" includes itself'):
+            layouts.get("loop")
+        with self.assertRaisesRegex(Exception, 'Layout "missing" not found'):
+            layouts.for_page({"layout": "missing"})
+        with self.assertRaisesRegex(Exception, 'Invalid layout "../template"'):
+            layouts.for_page({"layout": "../template"})
+
+    def test_pages_render_with_their_layout(self):
+        self.assertIn("2 pages generated", self.build())
+        self.assertEqual(self.read("docs/index.html"), '<h1><a href="/">Home</a></h1><div><h1>Home</h1><p>Hello</p></div>')
+        self.assertEqual(self.read("docs/post.html"), '<h1><a href="/">Post</a></h1><article><div><h1>Post</h1><p>A post</p></div></article><footer>(c) Tom</footer>')
+
+    def test_only_pages_including_a_changed_file_are_rendered(self):
+        self.build()
+        self.write("partials/nested/copyright.html", "by {{ author }}")
+        output = self.build()
+        self.assertIn("1 pages generated", output)
+        self.assertTrue(self.read("docs/post.html").endswith("<footer>by Tom</footer>"))
+        self.write("partials/header.html", "<h2>{{ Title }}</h2>")
+        self.assertIn("2 pages generated", self.build())
+        self.write("template.html", "<b>{{ Title }}</b>{{ Content }}")
+        self.assertIn("1 pages generated", self.build())
+        self.assertIn("0 pages generated", self.build())
+
+    def test_watcher_renders_pages_including_a_changed_partial(self):
+        self.build()
+        with redirect_stdout(io.StringIO()):
+            watcher = SiteWatcher("/", self.static, self.content, self.template, self.docs, self.manifest)
+            self.write("partials/footer.html", "<footer>new</footer>", mtime=1)
+            self.assertEqual(watcher.poll(), 1)
+            self.assertEqual(watcher.poll(), 0)
+        self.assertTrue(self.read("docs/post.html").endswith("<footer>new</footer>"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from sitetest import SiteTestCase
+from linkindex import LinkIndex
+from main import build_full, build_incremental
+
+TEMPLATE = '<link href="/index.css"><title>{{ Title }}</title><body>{{ Content }}</body>'
+
+class TestLinkIndex(unittest.TestCase):
+    def index(self, basepath="/"):
+        index = LinkIndex("docs", basepath)
+        index.add_output("docs/index.css")
+        index.add_output("docs/images/cat.png")
+        index.add_page("docs/index.html", [])
+        index.add_page("docs/blog/post/index.html", [])
+        return index
+
+    def test_absolute_links(self):
+        index = self.index()
+        index.add_page("docs/index.html", [("href", "/blog/post"), ("href", "/blog/post/"), ("src", "/images/cat.png"), ("href", "/"), ("href", "/missing")])
+        self.assertEqual(index.check(), [("index.html", "href", "/missing")])
+
+    def test_basepath_is_stripped(self):
+        index = self.index("/site/")
+        index.add_page("docs/index.html", [("href", "/site/index.css"), ("href", "/index.css")])
+        self.assertEqual(index.check(), [("index.html", "href", "/index.css")])
+
+    def test_relative_links_resolve_against_the_page(self):
+        index = self.index()
+        index.add_page("docs/blog/post/index.html", [("src", "../../images/cat.png"), ("href", "../other"), ("href", "../../../index.css")])
+        broken = [url for page, attribute, url in index.check()]
+        self.assertEqual(broken, ["../../../index.css", "../other"])
+
+    def test_unchecked_links(self):
+        index = self.index()
+        index.add_page("docs/index.html", [("href", "https://example.com/x"), ("href", "#top"), ("href", "mailto:a@b.c"), ("href", "/index.css?v=2#x")])
+        self.assertEqual(index.check(), [])
+
+class TestBuildLinkCheck(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n\n[post](/blog/post) and [gone](/blog/gone)")
+        self.write("content/blog/post/index.md", "# Post\n\n![cat](/images/cat.png)")
+        self.write("template.html", TEMPLATE)
+
+    def broken(self, build, *args):
+        index = LinkIndex(self.docs, "/site/")
+        with redirect_stdout(io.StringIO()):
+            build("/site/", self.static, self.content, self.template, self.docs, *args, link_index=index)
+        return index.check()
+
+    def test_full_build(self):
+        self.assertEqual(self.broken(build_full), [
+            ("blog/post/index.html", "src", "/site/images/cat.png"),
+            ("index.html", "href", "/site/blog/gone"),
+        ])
+
+    def test_incremental_build_keeps_links_of_unchanged_pages(self):
+        self.broken(build_incremental, self.manifest)
+        self.write("content/blog/gone.md", "# Gone")
+        broken = self.broken(build_incremental, self.manifest)
+        self.assertEqual(broken, [("blog/post/index.html", "src", "/site/images/cat.png")])
+        self.write("static/images/cat.png", "png")
+        self.assertEqual(self.broken(build_incremental, self.manifest), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from sitetest import SiteTestCase
+from lint import lint_text, lint_site
+from main import build_full, swap_in
+
+class TestLint(unittest.TestCase):
+    def test_clean_page(self):
+        self.assertEqual(lint_text("# Title\n\nSome **bold** and _italic_ text"), [])
+
+    def test_every_unclosed_delimiter_is_located(self):
+        text = "# Title\n\nfirst **bold\nline\n\n- item with `code\n- and _more"
+        self.assertEqual(lint_text(text), [
+            (3, 7, 'Invalid Markdown syntax, no closing "**" found.'),
+            (6, 13, 'Invalid Markdown syntax, no closing "`" found.'),
+            (7, 7, 'Invalid Markdown syntax, no closing "_" found.'),
+        ])
+
+    def test_code_blocks_and_links_are_skipped(self):
+        text = "# Title\n\n```\nx = a_b\n```\n\nsee [snake_case](/a_b)"
+        self.assertEqual(lint_text(text), [])
+
+    def test_front_matter_offsets_and_title(self):
+        self.assertEqual(lint_text("---\ntitle: Hi\n---\nsome _text"), [(4, 6, 'Invalid Markdown syntax, no closing "_" found.')])
+        self.assertEqual(lint_text("## Not a title\n\ntext"), [(1, 1, "No h1 header found")])
+        self.assertEqual(lint_text("---\ndate: soon\n---\n# Title"), [(1, 1, 'Invalid front matter date "soon", use YYYY-MM-DD')])
+
+class TestKeepGoing(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("static/style.css", "body {}")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/broken.md", "# Broken\n\nan **unclosed tag")
+        self.write("content/blog/post.md", "no title here")
+
+    def test_lint_site(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(lint_site(self.path("content"), 2), 2)
+        self.assertIn("broken.md:3:4: Invalid Markdown syntax", output.getvalue())
+        self.assertIn("post.md:1:1: No h1 header found", output.getvalue())
+        self.assertFalse(os.path.exists(self.path("docs")))
+
+    def test_layouts_and_partials_are_checked(self):
+        self.write("layouts/post.html", "{{> missing }}{{ Content }}")
+        self.write("partials/loop.html", "{{> loop }}")
+        self.write("layouts/loop.html", "{{> loop }}{{ Content }}")
+        self.write("content/a.md", "---\ntitle: A\nlayout: nope\n---\ntext")
+        self.write("content/b.md", "---\nlayout: post\n---\n# B")
+        self.write("content/c.md", "---\nlayout: loop\n---\n# C")
+        for jobs in (1, 2):
+            output = io.StringIO()
+            with redirect_stdout(output):
+                lint_site(self.path("content"), jobs, self.path("template.html"))
+            self.assertIn(f'a.md:3:1: Layout "nope" not found, expected {self.path("layouts/nope.html")}', output.getvalue())
+            self.assertIn('b.md:2:1: Partial "missing" not found', output.getvalue())
+            self.assertIn('c.md:2:1: Partial "loop" includes itself', output.getvalue())
+            self.assertNotIn("index.md", output.getvalue())
+
+    def test_serial_build_keeps_going_and_swaps_in(self):
+        self.write("docs/broken.html", "last good version")
+        build_path = self.path("docs.building")
+        with redirect_stdout(io.StringIO()):
+            failures = build_full("/", self.path("static"), self.path("content"), self.path("template.html"), build_path)
+        self.assertEqual(sorted(os.path.basename(source) for source, error in failures), ["broken.md", "post.md"])
+        self.assertTrue(os.path.exists(os.path.join(build_path, "index.html")))
+
+        swap_in(build_path, self.path("docs"), self.path("content"), failures)
+        self.assertFalse(os.path.exists(build_path))
+        self.assertFalse(os.path.exists(self.path("docs.old")))
+        self.assertTrue(os.path.exists(self.path("docs/index.html")))
+        self.assertTrue(os.path.exists(self.path("docs/style.css")))
+        with open(self.path("docs/broken.html")) as f:
+            self.assertEqual(f.read(), "last good version")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from sitetest import SiteTestCase
+from manifest import hash_file, load_manifest, save_manifest, new_manifest
+from main import build_incremental
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+class TestIncrementalBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n\nHello")
+        self.write("content/blog/post/index.md", "# Post\n\nA **post**")
+        self.write("template.html", TEMPLATE)
+
+    def build(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            build_incremental("/", self.static, self.content, self.template, self.docs, self.manifest)
+        return out.getvalue()
+
+    def test_first_build_writes_everything(self):
+        log = self.build()
+        self.assertIn("2 pages generated, 1 files copied", log)
+        with open(os.path.join(self.docs, "blog", "post", "index.html")) as f:
+            self.assertEqual(f.read(), "<title>Post</title><body><div><h1>Post</h1><p>A <b>post</b></p></div></body>")
+
+    def test_unchanged_rebuild_does_nothing(self):
+        self.build()
+        log = self.build()
+        self.assertIn("0 pages generated, 0 files copied, 0 outputs removed", log)
+
+    def test_only_changed_page_is_rendered(self):
+        self.build()
+        self.write("content/index.md", "# Home\n\nChanged")
+        log = self.build()
+        self.assertIn("1 pages generated, 0 files copied", log)
+        self.assertIn("content/index.md", log)
+
+    def test_template_change_rerenders_all_pages(self):
+        self.build()
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        log = self.build()
+        self.assertIn("2 pages generated, 0 files copied", log)
+
+    def test_removed_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        log = self.build()
+        self.assertIn("1 outputs removed", log)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_missing_output_is_regenerated(self):
+        self.build()
+        os.remove(os.path.join(self.docs, "index.css"))
+        log = self.build()
+        self.assertIn("0 pages generated, 1 files copied", log)
+
+    def test_failed_page_keeps_its_last_output(self):
+        self.build()
+        self.write("content/blog/post/index.md", "# Post\n\nBad **unclosed")
+        log = self.build()
+        self.assertIn("0 pages generated, 0 files copied, 0 outputs removed", log)
+        self.assertIn("<b>post</b>", self.read("docs/blog/post/index.html"))
+        self.assertNotIn(os.path.join(self.content, "blog", "post", "index.md"), load_manifest(self.manifest)["pages"])
+        self.write("content/blog/post/index.md", "# Post\n\nFixed")
+        self.assertIn("1 pages generated", self.build())
+
+    def test_manifest_round_trip(self):
+        manifest = new_manifest(hash_file(self.template), "/")
+        save_manifest(manifest, self.manifest)
+        self.assertEqual(load_manifest(self.manifest), manifest)
+
+    def test_corrupt_manifest_is_ignored(self):
+        self.write("cache/manifest.json", "{not json")
+        self.assertIsNone(load_manifest(self.manifest))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from sitetest import SiteTestCase
+from parallel import render_pages, resolve_jobs
+
+class TestParallelRender(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", '<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+        self.pages = []
+        for i in range(6):
+            source = self.write(f"content/page{i}.md", f"# Page {i}\n\nSee [the index](/index.html) and **item {i}**")
+            self.pages.append((source, self.path(f"docs/page{i}.html")))
+
+    def render(self, pages, jobs):
+        with redirect_stdout(io.StringIO()):
+            return render_pages("/base/", pages, self.template, jobs)
+
+    def read_outputs(self):
+        outputs = []
+        for source, target in self.pages:
+            with open(target) as f:
+                outputs.append(f.read())
+        return outputs
+
+    def test_parallel_matches_serial(self):
+        self.assertEqual(self.render(self.pages, 1), [])
+        serial = self.read_outputs()
+        self.assertEqual(self.render(self.pages, 3), [])
+        self.assertEqual(self.read_outputs(), serial)
+        self.assertIn('<a href="/base/index.html">the index</a>', serial[0])
+
+    def test_failures_do_not_stop_other_pages(self):
+        bad_source = os.path.join(self.root, "content", "bad.md")
+        with open(bad_source, "w") as f:
+            f.write("No title here")
+        pages = self.pages + [(bad_source, os.path.join(self.root, "docs", "bad.html"))]
+        failures = self.render(pages, 2)
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0][0], bad_source)
+        self.assertIn("No h1 header found", failures[0][1])
+        self.assertEqual(len(self.read_outputs()), 6)
+
+    def test_resolve_jobs(self):
+        self.assertEqual(resolve_jobs(4), 4)
+        self.assertEqual(resolve_jobs(0), os.cpu_count() or 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from sitetest import SiteTestCase
+from main import build_full
+from pipeline import run_pipeline
+from blockcache import BlockCache
+
+class TestPagePipeline(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", '<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+        for i in range(12):
+            self.write(f"content/section{i % 3}/page{i}/index.md", f"# Page {i}\n\nSee [the index](/index.html) and **item {i}**\n\nShared paragraph.")
+        self.write("content/index.md", "# Home\n\n![logo](/logo.png)")
+        self.write("content/notes.txt", "not a page")
+        os.makedirs(os.path.join(self.content, "empty"))
+        os.makedirs(self.static)
+
+    def pipeline(self, dest, **options):
+        with redirect_stdout(io.StringIO()):
+            return run_pipeline("/base/", self.content, self.template, os.path.join(self.root, dest), **options)
+
+    def test_matches_serial_build(self):
+        expected = os.path.join(self.root, "expected")
+        with redirect_stdout(io.StringIO()):
+            build_full("/base/", self.static, self.content, self.template, expected)
+        pages, failures = self.pipeline("docs", io_workers=1, queue_size=1)
+        self.assertEqual(failures, [])
+        self.assertEqual(len(pages), 13)
+        self.assertEqual(self.tree(os.path.join(self.root, "docs")), self.tree(expected))
+        pages, failures = self.pipeline("docs2", io_workers=8, queue_size=4, jobs=2, cache=BlockCache())
+        self.assertEqual(self.tree(os.path.join(self.root, "docs2")), self.tree(expected))
+
+    def test_links_are_collected(self):
+        rendered = {}
+        self.pipeline("docs", rendered=rendered)
+        self.assertEqual(rendered[os.path.join(self.content, "index.md")]["links"], [("href", "/base/"), ("src", "/base/logo.png")])
+
+    def test_failures_do_not_stop_other_pages(self):
+        self.write("content/bad.md", "No title here")
+        pages, failures = self.pipeline("docs", queue_size=2)
+        self.assertEqual(len(pages), 14)
+        self.assertEqual([source for source, error in failures], [os.path.join(self.content, "bad.md")])
+        self.assertIn("No h1 header found", failures[0][1])
+        self.assertFalse(os.path.exists(os.path.join(self.root, "docs", "bad.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.root, "docs", "index.html")))
+
+    def test_unreadable_pages_fail_like_any_other(self):
+        for i in range(4):
+            with open(os.path.join(self.content, f"latin{i}.md"), "wb") as f:
+                f.write(b"# Caf\xe9\n")
+        pages, failures = self.pipeline("docs", io_workers=1, queue_size=1)
+        self.assertEqual(len(pages), 17)
+        self.assertEqual(len(failures), 4)
+        self.assertIn("UnicodeDecodeError", failures[0][1])
+
+    def test_unexpected_errors_stop_every_stage(self):
+        def broken(path, text):
+            raise RuntimeError("disk on fire")
+        with patch("pipeline.write_text", broken):
+            with self.assertRaisesRegex(RuntimeError, "disk on fire"):
+                self.pipeline("docs", io_workers=1, queue_size=1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import io
+import gzip
+import unittest
+from contextlib import redirect_stdout
+
+from sitetest import SiteTestCase
+from postprocess import PostProcessor, minify_html
+from main import build_full, build_incremental
+
+class TestMinify(unittest.TestCase):
+    def test_whitespace_around_blocks_is_removed(self):
+        html = "<html>\n  <head>\n    <title>A  title</title>\n  </head>\n  <body>\n    <p>Some   <b>bold</b> text</p>\n  </body>\n</html>\n"
+        self.assertEqual(minify_html(html), "<html><head><title>A title</title></head><body><p>Some <b>bold</b> text</p></body></html>")
+
+    def test_pre_and_code_are_left_alone(self):
+        html = "<div>\n<pre><code>a  =  1\n    b</code></pre>\n<p>use <code>x  y</code> here</p>\n</div>"
+        self.assertEqual(minify_html(html), "<div><pre><code>a  =  1\n    b</code></pre><p>use <code>x  y</code> here</p></div>")
+
+    def test_comments_and_text_brackets(self):
+        html = "<p><!-- note -->< Back  Home</p><!--[if IE]><p>ie</p><![endif]-->"
+        self.assertEqual(minify_html(html), "<p>< Back Home</p><!--[if IE]><p>ie</p><![endif]-->")
+
+class TestPostProcessor(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.state = os.path.join(self.root, "cache", "postprocess.json")
+
+    def run_processor(self, pages, others, minify=True):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            PostProcessor(minify, True, 2, self.state).run(pages, others)
+        return out.getvalue()
+
+    def test_compress_then_skip_unchanged(self):
+        self.write("docs/index.html", "<p>\n  hi\n</p>\n")
+        self.write("docs/index.css", "body {}")
+        self.write("docs/cat.png", "png")
+        pages = [self.path("docs/index.html")]
+        others = [self.path("docs/index.css"), self.path("docs/cat.png")]
+        log = self.run_processor(pages, others)
+        self.assertIn("1 pages minified, 2 files compressed", log)
+        with gzip.open(self.path("docs/index.html.gz")) as f:
+            self.assertEqual(f.read(), b"<p>hi</p>")
+        self.assertFalse(os.path.exists(self.path("docs/cat.png.gz")))
+        log = self.run_processor(pages, others)
+        self.assertIn("0 pages minified, 0 files compressed, 2 compressed files unchanged", log)
+        self.write("docs/index.css", "body { color: red }")
+        self.assertIn("1 files compressed", self.run_processor(pages, others))
+
+    def test_siblings_of_removed_outputs_are_deleted(self):
+        self.write("docs/old.html", "<p>old</p>")
+        self.run_processor([self.path("docs/old.html")], [])
+        os.remove(self.path("docs/old.html"))
+        self.run_processor([], [])
+        self.assertFalse(os.path.exists(self.path("docs/old.html.gz")))
+
+    def test_full_build_keeps_siblings(self):
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n\nHello")
+        self.write("template.html", "<html>\n<body>{{ Content }}</body>\n</html>")
+        for _ in range(2):
+            with redirect_stdout(io.StringIO()) as out:
+                build_full("/", self.path("static"), self.path("content"), self.path("template.html"), self.path("docs"), post_processor=PostProcessor(True, True, 2, self.state))
+        self.assertIn("0 files compressed, 2 compressed files unchanged", out.getvalue())
+        self.assertTrue(os.path.exists(self.path("docs/index.html.gz")))
+        with open(self.path("docs/index.html")) as f:
+            self.assertEqual(f.read(), "<html><body><div><h1>Home</h1><p>Hello</p></div></body></html>")
+
+    def test_incremental_build_only_processes_rendered_pages(self):
+        self.write("content/index.md", "# Home\n\nHello")
+        self.write("content/about.md", "# About\n\nUs")
+        self.write("template.html", "<html>\n<body>{{ Content }}</body>\n</html>")
+        os.makedirs(self.static)
+        def build(minify=True):
+            with redirect_stdout(io.StringIO()) as out:
+                build_incremental("/", self.static, self.content, self.template, self.docs, self.manifest, post_processor=PostProcessor(minify, True, 2, self.state))
+            return out.getvalue()
+        self.assertIn("0 pages minified, 2 files compressed", build(minify=False))
+        self.assertIn("2 pages minified, 2 files compressed", build())
+        self.write("content/about.md", "# About\n\nThem")
+        self.assertIn("1 pages minified, 1 files compressed, 1 compressed files unchanged", build())
+        os.remove(self.path("docs/index.html.gz"))
+        self.assertIn("0 pages minified, 1 files compressed, 1 compressed files unchanged", build())
+        self.assertIn("0 pages minified, 0 files compressed, 2 compressed files unchanged", build())
+        self.assertEqual(self.read("docs/index.html"), "<html><body><div><h1>Home</h1><p>Hello</p></div></body></html>")
+        #a page written again outside the build, e.g. by serve, is compressed again
+        self.write("docs/index.html", "<p>Served</p>")
+        self.assertIn("0 pages minified, 1 files compressed, 1 compressed files unchanged", build())
+        with gzip.open(self.path("docs/index.html.gz")) as f:
+            self.assertEqual(f.read(), b"<p>Served</p>")
+
+    def test_incremental_build_undoes_post_processing_it_is_not_asked_for(self):
+        self.write("content/index.md", "# Home\n\nHello")
+        self.write("template.html", "<html>\n<body>{{ Content }}</body>\n</html>")
+        self.write("static/index.css", "body {}")
+        def build(post_processor):
+            with redirect_stdout(io.StringIO()) as out:
+                build_incremental("/", self.static, self.content, self.template, self.docs, self.manifest, post_processor=post_processor)
+            return out.getvalue()
+        build(PostProcessor(True, True, 2, self.state))
+        self.assertTrue(os.path.exists(self.path("docs/index.css.gz")))
+        self.assertIn("1 pages generated", build(PostProcessor(False, True, 2, self.state)))
+        self.assertEqual(self.read("docs/index.html"), "<html>\n<body><div><h1>Home</h1><p>Hello</p></div></body>\n</html>")
+        self.assertTrue(os.path.exists(self.path("docs/index.css.gz")))
+        self.assertNotIn("Post-processing", build(None))
+        self.assertEqual(sorted(os.listdir(self.docs)), ["index.css", "index.html"])
+        self.assertFalse(os.path.exists(self.state))
+
+if __name__ == "__main__":
+    unittest.main()
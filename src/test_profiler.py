@@ -0,0 +1,52 @@
+import os
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from sitetest import SiteTestCase
+import log
+from main import build_full, build_profiled
+from profiler import STAGES
+
+class TestProfiler(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n\nHello **there**\n\n```\ncode\n```")
+        self.write("content/blog/index.md", "# Blog\n\n- [post](/post)")
+        self.write("template.html", '<link href="/index.css">{{ Title }}{{ Content }}')
+
+    def tearDown(self):
+        log.set_verbose(True)
+        super().tearDown()
+
+    def test_profiled_build_matches_normal_build(self):
+        log.set_verbose(False)
+        build_full("/site/", self.static, self.content, self.template, self.path("expected"))
+        with redirect_stdout(io.StringIO()) as out:
+            build_profiled("/site/", self.path("static"), self.path("content"), self.path("template.html"), self.path("docs"), 1, self.path("profile.json"))
+        for page in ("index.html", os.path.join("blog", "index.html")):
+            self.assertEqual(self.read(os.path.join("docs", page)), self.read(os.path.join("expected", page)))
+        for stage in STAGES:
+            self.assertIn(stage, out.getvalue())
+        self.assertIn("Slowest 1 of 2 pages", out.getvalue())
+        #like the other builds, a profiled one leaves unchanged static files alone instead of wiping docs
+        inode = os.stat(self.path("docs/index.css")).st_ino
+        with redirect_stdout(io.StringIO()):
+            build_profiled("/site/", self.static, self.content, self.template, self.docs)
+        self.assertEqual(os.stat(self.path("docs/index.css")).st_ino, inode)
+
+        with open(self.path("profile.json")) as f:
+            profile = json.load(f)
+        self.assertEqual(set(profile["stages"]), set(STAGES))
+        self.assertEqual(len(profile["pages"]), 2)
+
+    def test_quiet_skips_per_file_logging(self):
+        log.set_verbose(False)
+        with redirect_stdout(io.StringIO()) as out:
+            build_full("/", self.static, self.content, self.template, self.docs)
+        self.assertEqual(out.getvalue(), "")
+
+if __name__ == "__main__":
+    unittest.main()
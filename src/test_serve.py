@@ -0,0 +1,72 @@
+import os
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from sitetest import SiteTestCase
+from main import build_incremental
+from serve import SiteWatcher, TreeState
+
+class TestSiteWatcher(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n\nHello")
+        self.write("content/blog/post/index.md", "# Post\n\nA post")
+        self.write("template.html", "{{ Title }}|{{ Content }}")
+        with redirect_stdout(io.StringIO()):
+            build_incremental("/", self.static, self.content, self.template, self.docs, self.manifest)
+        self.watcher = SiteWatcher("/", self.static, self.content, self.template, self.docs, self.manifest)
+
+    def poll(self):
+        with redirect_stdout(io.StringIO()):
+            return self.watcher.poll()
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.poll(), 0)
+
+    def test_page_edit_renders_only_that_page(self):
+        self.write("content/index.md", "# Home\n\nEdited", mtime=1)
+        self.assertEqual(self.poll(), 1)
+        self.assertEqual(self.read("docs/index.html"), "Home|<div><h1>Home</h1><p>Edited</p></div>")
+
+    def test_template_edit_renders_every_page(self):
+        self.write("template.html", "<b>{{ Title }}</b>{{ Content }}", mtime=1)
+        self.assertEqual(self.poll(), 2)
+        self.assertTrue(self.read("docs/blog/post/index.html").startswith("<b>Post</b>"))
+
+    def test_new_and_removed_files(self):
+        self.write("static/images/a.png", "png")
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.assertEqual(self.poll(), 2)
+        self.assertEqual(self.read("docs/images/a.png"), "png")
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_broken_page_keeps_watching(self):
+        self.write("content/index.md", "no title", mtime=1)
+        self.assertEqual(self.poll(), 0)
+        self.write("content/index.md", "# Fixed", mtime=2)
+        self.assertEqual(self.poll(), 1)
+
+    def test_manifest_saved_on_quiet_poll(self):
+        self.write("content/index.md", "# Home\n\nEdited", mtime=1)
+        self.poll()
+        self.assertTrue(self.watcher.dirty)
+        self.poll()
+        self.assertFalse(self.watcher.dirty)
+        with redirect_stdout(io.StringIO()) as out:
+            build_incremental("/", self.static, self.content, self.template, self.docs, self.manifest)
+        self.assertIn("0 pages generated", out.getvalue())
+
+    def test_tree_state(self):
+        state = TreeState(self.content)
+        self.assertEqual(state.poll(), ([], []))
+        self.write("content/new/index.md", "# New")
+        self.write("content/index.md", "# Home\n\nChanged", mtime=1)
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        changed, removed = state.poll()
+        self.assertEqual(sorted(changed), [os.path.join(self.content, "index.md"), os.path.join(self.content, "new", "index.md")])
+        self.assertEqual(removed, [os.path.join(self.content, "blog", "post", "index.md")])
+
+if __name__ == "__main__":
+    unittest.main()
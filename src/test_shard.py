@@ -0,0 +1,77 @@
+import os
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from sitetest import SiteTestCase
+from shard import parse_shard, partition_pages
+from main import build_full, build_shard, merge_shards, list_pages
+from sitefiles import SiteFiles
+
+class TestPartition(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(40):
+            self.write(f"content/section{i % 4}/page{i}.md", f"# Page {i}\n\n" + "word " * (i * 50))
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "x/4", "2"):
+            with self.assertRaises(Exception):
+                parse_shard(text)
+
+    def test_partition_is_complete_stable_and_balanced(self):
+        pages = list(list_pages(self.content, "docs"))
+        shards = partition_pages(pages, self.content, 3)
+        self.assertEqual(sorted(page for shard in shards for page in shard), sorted(pages))
+        self.assertEqual(partition_pages(list(reversed(pages)), self.content, 3), shards)
+        costs = [sum(os.path.getsize(source) for source, target in shard) for shard in shards]
+        largest = max(os.path.getsize(source) for source, target in pages)
+        self.assertLessEqual(max(costs) - min(costs), 2 * largest)
+
+class TestShardedBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("static/index.css", "body {}")
+        self.write("static/images/cat.png", "png")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(9):
+            self.write(f"content/blog/post{i}/index.md", f"# Post {i}\n\nSome text with ![a cat](/images/cat.png) number {i}")
+        self.write("content/index.md", "# Home\n\n[first post](/blog/post0)")
+
+    def shard(self, index, count, summarize=False):
+        return build_shard("/", self.path("content"), self.path("template.html"), self.path("docs"), self.path("shards"), index, count, summarize=summarize)
+
+    def merge(self, count, **options):
+        return merge_shards("/", self.path("static"), self.path("content"), self.path("template.html"), self.path("docs"), self.path("shards"), count, self.path("cache/manifest.json"), **options)
+
+    def test_merge_matches_full_build(self):
+        with redirect_stdout(io.StringIO()):
+            build_full("/", self.path("static"), self.path("content"), self.path("template.html"), self.path("expected"))
+            for index in (1, 2, 3):
+                self.assertEqual(self.shard(index, 3), [])
+            self.assertFalse(os.path.exists(self.path("docs")))
+            self.assertEqual(self.merge(3), [])
+        self.assertEqual(self.tree(self.path("docs")), self.tree(self.path("expected")))
+        with open(self.path("cache/manifest.json")) as f:
+            self.assertEqual(len(json.load(f)["pages"]), 10)
+
+    def test_missing_shard_fails_the_merge(self):
+        with redirect_stdout(io.StringIO()):
+            self.shard(1, 2)
+            with self.assertRaises(Exception):
+                self.merge(2)
+
+    def test_site_files_need_summaries(self):
+        site_files = SiteFiles(self.path("docs"), "/", "https://example.com")
+        with redirect_stdout(io.StringIO()):
+            self.shard(1, 1)
+            with self.assertRaises(Exception):
+                self.merge(1, site_files=site_files)
+            self.shard(1, 1, summarize=True)
+            self.merge(1, site_files=site_files)
+        self.assertTrue(os.path.exists(self.path("docs/sitemap.xml")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from sitetest import SiteTestCase
+from blockmarkdown import markdown_to_html_node
+from blockcache import BlockCache
+from sitefiles import SiteFiles, summarize_page
+from main import build_full, build_incremental
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+POST = "# Post {i}\n\n[< Back](/)\n\nThe **first** real paragraph of post {i}, long enough to summarize.\n\n- list item"
+
+class TestSummarizePage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.NamedTemporaryFile("w", suffix=".md", delete=False)
+        self.tmp.close()
+
+    def tearDown(self):
+        os.remove(self.tmp.name)
+
+    def test_summary_and_terms(self):
+        node = markdown_to_html_node(POST.format(i=1))
+        page = summarize_page(self.tmp.name, "Post 1", node)
+        self.assertEqual(page["summary"], "The first real paragraph of post 1, long enough to summarize.")
+        self.assertIn("back", page["terms"])
+        self.assertIn("item", page["terms"])
+        self.assertNotIn("li", page["terms"])
+
+    def test_cached_blocks_give_the_same_summary(self):
+        cache = BlockCache()
+        markdown_to_html_node(POST.format(i=1), "/", cache)
+        cached = summarize_page(self.tmp.name, "Post 1", markdown_to_html_node(POST.format(i=1), "/", cache))
+        self.assertEqual(cached, summarize_page(self.tmp.name, "Post 1", markdown_to_html_node(POST.format(i=1))))
+
+class TestSiteFiles(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home & Garden\n\nWelcome")
+        self.write("content/blog/index.md", "# Blog\n\nAll posts")
+        for i in range(3):
+            self.write(f"content/blog/post{i}/index.md", POST.format(i=i))
+            os.utime(os.path.join(self.content, "blog", f"post{i}", "index.md"), (1700000000 + i * 86400,) * 2)
+        self.write("template.html", TEMPLATE)
+
+    def build(self, build, *args):
+        site_files = SiteFiles(self.docs, "/site/", "https://example.com/")
+        with redirect_stdout(io.StringIO()):
+            build("/site/", self.static, self.content, self.template, self.docs, *args, site_files=site_files)
+
+    def test_full_build(self):
+        self.build(build_full)
+        sitemap = self.read("docs/sitemap.xml")
+        self.assertIn("<url><loc>https://example.com/site/</loc>", sitemap)
+        self.assertIn("<loc>https://example.com/site/blog/post2/</loc><lastmod>2023-11-16</lastmod>", sitemap)
+        feed = self.read("docs/feed.xml")
+        self.assertIn("<title>Home &amp; Garden</title>", feed)
+        self.assertNotIn("<title>Blog</title>", feed)
+        self.assertLess(feed.index("Post 2"), feed.index("Post 1"))
+        index = json.loads(self.read("docs/search-index.json"))
+        urls = [page[0] for page in index["pages"]]
+        self.assertEqual(urls, ["/site/", "/site/blog/", "/site/blog/post0/", "/site/blog/post1/", "/site/blog/post2/"])
+        self.assertEqual(index["terms"]["summarize"], [2, 3, 4])
+        self.assertEqual(index["terms"]["welcome"], [0])
+
+    def test_incremental_build_keeps_unchanged_pages(self):
+        self.build(build_incremental, self.manifest)
+        first = self.read("docs/search-index.json")
+        self.build(build_incremental, self.manifest)
+        self.assertEqual(self.read("docs/search-index.json"), first)
+        self.write("content/index.md", "# Home & Garden\n\nGoodbye")
+        self.build(build_incremental, self.manifest)
+        index = json.loads(self.read("docs/search-index.json"))
+        self.assertNotIn("welcome", index["terms"])
+        self.assertEqual(index["terms"]["goodbye"], [0])
+        self.assertEqual(index["terms"]["summarize"], [2, 3, 4])
+
+    def test_files_are_pruned_without_site_url(self):
+        self.build(build_full)
+        with redirect_stdout(io.StringIO()):
+            build_full("/site/", self.static, self.content, self.template, self.docs)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "sitemap.xml")))
+
+    def test_incremental_build_removes_files_without_site_url(self):
+        self.build(build_incremental, self.manifest)
+        with redirect_stdout(io.StringIO()):
+            build_incremental("/site/", self.static, self.content, self.template, self.docs, self.manifest)
+        for name in ("sitemap.xml", "feed.xml", "search-index.json"):
+            self.assertFalse(os.path.exists(os.path.join(self.docs, name)))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+if __name__ == "__main__":
+    unittest.main()
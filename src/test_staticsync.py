@@ -0,0 +1,75 @@
+import os
+import stat
+import unittest
+
+from sitetest import SiteTestCase
+import log
+from staticsync import sync_static, prune_outputs, copy_file, files_match
+
+class TestStaticSync(SiteTestCase):
+    def setUp(self):
+        log.set_verbose(False)
+        super().setUp()
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "png bytes")
+        os.makedirs(os.path.join(self.static, "empty"))
+
+    def tearDown(self):
+        log.set_verbose(True)
+        super().tearDown()
+
+    def test_first_sync_copies_everything(self):
+        copied, skipped, pairs, directories = sync_static(self.static, self.docs, jobs=4)
+        self.assertEqual((len(copied), skipped), (2, 0))
+        self.assertEqual(self.read("docs/images/a.png"), "png bytes")
+        self.assertTrue(os.path.isdir(os.path.join(self.docs, "empty")))
+
+    def test_unchanged_files_are_skipped(self):
+        sync_static(self.static, self.docs)
+        copied, skipped, pairs, directories = sync_static(self.static, self.docs)
+        self.assertEqual((copied, skipped), ([], 2))
+
+    def test_changed_file_is_copied(self):
+        sync_static(self.static, self.docs)
+        source = self.write("static/index.css", "body { color: red }")
+        copied, skipped, pairs, directories = sync_static(self.static, self.docs)
+        self.assertEqual(copied, [(source, os.path.join(self.docs, "index.css"))])
+        self.assertEqual(self.read("docs/index.css"), "body { color: red }")
+
+    def test_hash_compare(self):
+        sync_static(self.static, self.docs)
+        target = os.path.join(self.docs, "index.css")
+        with open(target, "w") as f:
+            f.write("body {{")
+        os.utime(target, ns=(0, os.stat(os.path.join(self.static, "index.css")).st_mtime_ns))
+        self.assertFalse(files_match(os.path.join(self.static, "index.css"), target, "hash"))
+
+    def test_mode_is_copied(self):
+        source = os.path.join(self.static, "index.css")
+        os.chmod(source, 0o640)
+        copy_file(source, os.path.join(self.docs, "index.css"))
+        self.assertEqual(stat.S_IMODE(os.stat(os.path.join(self.docs, "index.css")).st_mode), 0o640)
+
+    def test_hardlink_mode(self):
+        sync_static(self.static, self.docs, mode="hardlink")
+        self.assertTrue(os.path.samefile(os.path.join(self.static, "index.css"), os.path.join(self.docs, "index.css")))
+        copied, skipped, pairs, directories = sync_static(self.static, self.docs)
+        self.assertEqual(len(copied), 2)
+        self.assertFalse(os.path.samefile(os.path.join(self.static, "index.css"), os.path.join(self.docs, "index.css")))
+
+    def test_auto_mode_output_matches_copy(self):
+        sync_static(self.static, self.docs, mode="auto")
+        self.assertEqual(self.read("docs/index.css"), "body {}")
+
+    def test_prune_outputs(self):
+        copied, skipped, pairs, directories = sync_static(self.static, self.docs)
+        self.write("docs/old/page.html", "stale")
+        self.write("docs/index.html", "page")
+        keep = [target for source, target in pairs] + [os.path.join(self.docs, "index.html")]
+        removed = prune_outputs(self.docs, keep, directories)
+        self.assertEqual(removed, [os.path.join(self.docs, "old", "page.html")])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "old")))
+        self.assertTrue(os.path.isdir(os.path.join(self.docs, "empty")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import io
+import os
+import tempfile
+import unittest
+
+from template import Template, load_template, resolve_url
+from blockmarkdown import markdown_to_html_node
+from htmlnode import LeafNode, ParentNode
+
+class TestTemplate(unittest.TestCase):
+    def test_render_slots(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>body</p>"}),
+            "<title>Hi</title><main><p>body</p></main>",
+        )
+
+    def test_basepath_applied_to_literals_only(self):
+        template = Template('<link href="/index.css" /><img src="/a.png" />{{ Content }}', "/site/")
+        self.assertEqual(
+            template.render({"Content": 'code: href="/x"'}),
+            '<link href="/site/index.css" /><img src="/site/a.png" />code: href="/x"',
+        )
+
+    def test_missing_slot_is_left_as_written(self):
+        template = Template("{{ Title }} by {{author}}")
+        self.assertEqual(template.render({"Title": "Post"}), "Post by {{author}}")
+
+    def test_slot_values_are_not_reparsed(self):
+        template = Template("{{ Content }}|{{ Title }}")
+        self.assertEqual(template.render({"Title": "T", "Content": "{{ Title }}"}), "{{ Title }}|T")
+
+    def test_repeated_slot(self):
+        template = Template("{{ Title }}-{{ Title }}")
+        self.assertEqual(template.slots, {"Title"})
+        self.assertEqual(template.render({"Title": "x"}), "x-x")
+
+    def test_write_streams_nodes(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}{{ Other }}")
+        values = {"Title": "T", "Content": ParentNode("p", [LeafNode("b", "x")])}
+        out = io.StringIO()
+        template.write(out, values)
+        self.assertEqual(out.getvalue(), "<title>T</title><p><b>x</b></p>{{ Other }}")
+        self.assertEqual(template.render(values), out.getvalue())
+
+    def test_resolve_url(self):
+        self.assertEqual(resolve_url("/images/a.png", "/site/"), "/site/images/a.png")
+        self.assertEqual(resolve_url("https://boot.dev", "/site/"), "https://boot.dev")
+        self.assertEqual(resolve_url("/contact", "/"), "/contact")
+
+    def test_links_resolved_in_tree(self):
+        node = markdown_to_html_node("[home](/) and ![pic](/images/a.png)", "/site/")
+        self.assertEqual(
+            node.to_html(),
+            '<div><p><a href="/site/">home</a> and <img src="/site/images/a.png" alt="pic"></img></p></div>',
+        )
+
+    def test_load_template_is_cached_until_changed(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Title }}")
+            first = load_template(path, "/")
+            self.assertIs(load_template(path, "/"), first)
+            with open(path, "w") as f:
+                f.write("<b>{{ Title }}</b>")
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(load_template(path, "/").render({"Title": "x"}), "<b>x</b>")
+
+if __name__ == "__main__":
+    unittest.main()
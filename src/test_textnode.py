@@ -1,6 +1,6 @@
 import unittest
 
-from textnode import TextNode, TextType, text_node_to_html_node, split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes
+from textnode import TextNode, TextType, text_node_to_html_node, split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes, scan_inline
 from extract_markdown import extract_markdown_images, extract_markdown_links
 
 class TestTextNode(unittest.TestCase):
@@ -24,6 +24,17 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.BOLD, "www.google.com")
         self.assertEqual(node, node2)
 
+    def test_textnode_from_value(self):
+        node = TextNode("x", "bold")
+        self.assertEqual(node.text_type, TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_repeated_links_share_props(self):
+        first = text_node_to_html_node(TextNode("a", TextType.LINK, "/same"))
+        second = text_node_to_html_node(TextNode("b", TextType.LINK, "/same"))
+        self.assertIs(first.props, second.props)
+        self.assertEqual(second.to_html(), '<a href="/same">b</a>')
+
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
         html_node = text_node_to_html_node(node)
@@ -166,5 +177,47 @@ class TestTextNode(unittest.TestCase):
     TextNode("link", TextType.LINK, "https://boot.dev"),
 ]
         )
+
+    def test_text_to_textnodes_matches_split_cascade(self):
+        text = "Start [a](/a) **b** and ![c](/c.png) then _d_ `e` [f](/f) end"
+        textnodes = [TextNode(text, TextType.TEXT)]
+        textnodes = split_nodes_delimiter(textnodes, "**", TextType.BOLD)
+        textnodes = split_nodes_delimiter(textnodes, "_", TextType.ITALIC)
+        textnodes = split_nodes_delimiter(textnodes, "`", TextType.CODE)
+        textnodes = split_nodes_image(textnodes)
+        textnodes = split_nodes_link(textnodes)
+        self.assertListEqual(text_to_textnodes(text), textnodes)
+
+    def test_text_to_textnodes_unclosed_delimiter(self):
+        with self.assertRaises(Exception):
+            text_to_textnodes("This is **not closed")
+
+    def test_text_to_textnodes_code_is_literal(self):
+        self.assertListEqual(
+            text_to_textnodes("Use `snake_case` and [docs](https://example.com/a_b)"),
+            [
+                TextNode("Use ", TextType.TEXT),
+                TextNode("snake_case", TextType.CODE),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("docs", TextType.LINK, "https://example.com/a_b"),
+            ],
+        )
+
+    def test_scan_inline_lenient(self):
+        self.assertListEqual(scan_inline("a_b and **c", strict=False), [TextNode("a_b and **c", TextType.TEXT)])
+
+    def test_bold_inside_link(self):
+        html_node = text_node_to_html_node(TextNode("a **bold** link", TextType.LINK, "/url"), "/base/")
+        self.assertEqual(html_node.to_html(), '<a href="/base/url">a <b>bold</b> link</a>')
+
+    def test_link_inside_bold(self):
+        nodes = text_to_textnodes("**[bold link](/url)**")
+        self.assertListEqual(nodes, [TextNode("[bold link](/url)", TextType.BOLD)])
+        self.assertEqual(text_node_to_html_node(nodes[0]).to_html(), '<b><a href="/url">bold link</a></b>')
+
+    def test_literal_underscore_in_bold(self):
+        html_node = text_node_to_html_node(TextNode("snake_case", TextType.BOLD))
+        self.assertEqual(html_node.to_html(), "<b>snake_case</b>")
+
 if __name__ == "__main__":
     unittest.main()
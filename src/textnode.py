@@ -1,6 +1,9 @@
+import re
 from enum import Enum 
-from htmlnode import LeafNode
+from functools import lru_cache
+from htmlnode import LeafNode, ParentNode
 from extract_markdown import *
+from template import resolve_url, image_attributes
 
 class TextType(Enum):
     TEXT = "text"
@@ -11,9 +14,12 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url = None):
         self.text = text
-        self.text_type = TextType(text_type)
+        #skip the Enum lookup for the common case of already having a TextType
+        self.text_type = text_type if type(text_type) is TextType else TextType(text_type)
         self.url = url
 
     def __eq__(self, other_text):
@@ -24,7 +30,33 @@ class TextNode:
     def __repr__(self):
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
-def text_node_to_html_node(text_node):
+@lru_cache(maxsize=8192)
+def shared_props(*items):
+    #nodes pointing at the same url share one props dict, so treat the result as read-only
+    return dict(zip(items[::2], items[1::2]))
+
+NESTING_TAGS = {TextType.BOLD: "b", TextType.ITALIC: "i", TextType.LINK: "a"}
+
+def nested_children(text_node, basepath, links=None):
+    #bold, italic and link text may hold more inline markup, e.g. [**bold** link](/url)
+    if text_node.text_type not in NESTING_TAGS or INLINE_MARKER.search(text_node.text) is None:
+        return None
+    inner_nodes = scan_inline(text_node.text, strict=False)
+    if len(inner_nodes) == 1 and inner_nodes[0].text_type == TextType.TEXT:
+        return None
+    return [text_node_to_html_node(node, basepath, links) for node in inner_nodes]
+
+def text_node_to_html_node(text_node, basepath=None, links=None):
+    #when links is a list, every resolved href/src is appended to it as (attribute, url)
+    if links is not None and text_node.text_type in (TextType.LINK, TextType.IMAGE):
+        attribute = "href" if text_node.text_type == TextType.LINK else "src"
+        links.append((attribute, resolve_url(text_node.url, basepath)))
+    children = nested_children(text_node, basepath, links)
+    if children is not None:
+        props = None
+        if text_node.text_type == TextType.LINK:
+            props = shared_props("href", resolve_url(text_node.url, basepath))
+        return ParentNode(NESTING_TAGS[text_node.text_type], children, props)
     match text_node.text_type:
         case TextType.TEXT:
             return LeafNode(None, text_node.text)
@@ -35,9 +67,13 @@ def text_node_to_html_node(text_node):
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            return LeafNode("a", text_node.text, shared_props("href", resolve_url(text_node.url, basepath)))
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            props = ("src", resolve_url(text_node.url, basepath), "alt", text_node.text)
+            attributes = image_attributes(text_node.url)
+            if attributes is not None:
+                props += attributes
+            return LeafNode("img", "", shared_props(*props))
         case _:
             raise Exception("Error: Invalid text type")
 
@@ -114,12 +150,66 @@ def split_nodes_link(old_nodes):
                         new_nodes.append(TextNode(split_nodes[-1], TextType.TEXT))
     return new_nodes
 
+INLINE_MARKER = re.compile(r"[*_`\[!]")
+DELIMITER_TYPES = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
+
+def scan_inline(text, strict=True, problems=None):
+    #single left-to-right pass: plain text is only sliced out when a marker is consumed,
+    #and every closer search starts past the opener, so the scan is linear in len(text);
+    #with problems, every unclosed opener is added to it as (offset, delimiter) instead of raising
+    nodes = []
+    pending = 0
+    no_closer = set()
+    match = INLINE_MARKER.search(text)
+    while match is not None:
+        i = match.start()
+        char = text[i]
+        node = None
+        end = i + 1
+        if char == "*" and text.startswith("**", i):
+            delimiter = "**"
+        elif char == "_" or char == "`":
+            delimiter = char
+        else:
+            delimiter = None
+
+        if delimiter is not None:
+            close = -1
+            if delimiter not in no_closer:
+                close = text.find(delimiter, i + len(delimiter))
+            if close == -1:
+                if problems is not None:
+                    problems.append((i, delimiter))
+                elif strict:
+                    raise Exception(f'Error: Invalid Markdown syntax, no closing "{delimiter}" found.')
+                #nothing later can close it either, so remember that instead of searching again
+                no_closer.add(delimiter)
+                end = i + len(delimiter)
+            else:
+                node = TextNode(text[i + len(delimiter):close], DELIMITER_TYPES[delimiter])
+                end = close + len(delimiter)
+        elif char == "!":
+            image = IMAGE_REGEX.match(text, i)
+            if image is not None:
+                node = TextNode(image.group(1), TextType.IMAGE, image.group(2))
+                end = image.end()
+        elif char == "[":
+            link = LINK_REGEX.match(text, i)
+            if link is not None:
+                node = TextNode(link.group(1), TextType.LINK, link.group(2))
+                end = link.end()
+
+        if node is not None:
+            if pending < i:
+                nodes.append(TextNode(text[pending:i], TextType.TEXT))
+            #empty spans like `` are dropped, the same way the delimiter split skips empty pieces
+            if node.text != "" or node.text_type in (TextType.IMAGE, TextType.LINK):
+                nodes.append(node)
+            pending = end
+        match = INLINE_MARKER.search(text, end)
+    if pending < len(text):
+        nodes.append(TextNode(text[pending:], TextType.TEXT))
+    return nodes
+
 def text_to_textnodes(text):
-    textnodes = [TextNode(text, TextType.TEXT)]
-    textnodes = split_nodes_delimiter(textnodes, "**", TextType.BOLD)
-    textnodes = split_nodes_delimiter(textnodes, "_", TextType.ITALIC)
-    textnodes = split_nodes_delimiter(textnodes, "`", TextType.CODE)
-    textnodes = split_nodes_image(textnodes)
-    textnodes = split_nodes_link(textnodes)
-    return textnodes
-    
\ No newline at end of file
+    return scan_inline(text)